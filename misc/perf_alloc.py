@@ -0,0 +1,130 @@
+"""Benchmark allocation throughput of compiled programs.
+
+Build and drop millions of small class instances, while keeping a long
+linked list alive, both compiled via C and under the Python interpreter.
+Report the elapsed, user and system time of the fastest run of each and the
+garbage collector statistics of the compiled program (see MPrintGCStats in
+vm/gc.c).
+
+Usage (in the repository root directory; requires a C compiler):
+
+  python misc/perf_alloc.py [RUNS]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from typing import List, Tuple
+
+from mypy import build
+
+
+PROGRAM = '''\
+from typing import Undefined
+class Node:
+    value = Undefined(int)
+    next = Undefined('Node')
+    def __init__(self, value: int, next: 'Node') -> None:
+        self.value = value
+        self.next = next
+def build(n: int) -> Node:
+    head = None # type: Node
+    i = 0
+    while i < n:
+        head = Node(i, head)
+        i = i + 1
+    return head
+def total(head: Node) -> int:
+    s = 0
+    while head:
+        s = s + head.value
+        head = head.next
+    return s
+def churn(n: int) -> int:
+    s = 0
+    i = 0
+    while i < n:
+        short = Node(i, Node(i + 1, None))
+        s = s + short.next.value
+        i = i + 1
+    return s
+def main() -> None:
+    kept = build(200000)
+    r = 0
+    while r < 5:
+        print(churn(1000000))
+        r = r + 1
+    print(total(kept))
+main()
+'''
+
+PROGRAM_NAME = '_perf_alloc'
+
+
+def run(args: List[str], runs: int,
+        env: dict = None) -> Tuple[Tuple[float, float, float], str, str]:
+    """Run a command several times.
+
+    Return tuple ((elapsed, user and system time) of the fastest run,
+    output, error output).
+    """
+    times = List[Tuple[float, float, float]]()
+    output = ''
+    errors = ''
+    for i in range(runs):
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        t0 = time.time()
+        process = subprocess.Popen(args, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, env=env)
+        out, err = process.communicate()
+        elapsed = time.time() - t0
+        new_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        if process.returncode != 0:
+            sys.stderr.write(str(err, 'utf8'))
+            sys.exit(1)
+        output = str(out, 'utf8')
+        errors = str(err, 'utf8')
+        times.append((elapsed, new_usage.ru_utime - usage.ru_utime,
+                      new_usage.ru_stime - usage.ru_stime))
+    return min(times), output, errors
+
+
+def main(args: List[str]) -> None:
+    runs = int(args[0]) if args else 3
+    build.build(PROGRAM_NAME + '.py',
+                target=build.C,
+                program_text=PROGRAM,
+                alt_lib_path='lib',
+                flags=[build.TEST_BUILTINS])
+    env = dict(os.environ)
+    env['MYPY_GC_STATS'] = '1'
+    try:
+        compiled_time, compiled_output, stats = run(['./' + PROGRAM_NAME],
+                                                    runs, env)
+    finally:
+        os.remove(PROGRAM_NAME)
+    program_file = PROGRAM_NAME + '.py'
+    f = open(program_file, 'w')
+    f.write(PROGRAM)
+    f.close()
+    try:
+        interpreted_time, interpreted_output, _ = run(
+            [sys.executable, program_file], runs)
+    finally:
+        os.remove(program_file)
+    if compiled_output != interpreted_output:
+        sys.stderr.write('Output differs:\n{}---\n{}'.format(
+            compiled_output, interpreted_output))
+        sys.exit(1)
+    for name, times in [('compiled', compiled_time),
+                        ('interpreted', interpreted_time)]:
+        print('{:12} {:.3f} s (user {:.3f} s, system {:.3f} s)'.format(
+            name + ':', times[0], times[1], times[2]))
+    sys.stdout.write(stats)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
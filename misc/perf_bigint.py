@@ -0,0 +1,112 @@
+"""Benchmark long int arithmetic in compiled programs.
+
+Run factorial and Fibonacci workloads whose values grow past the range of
+short ints, both compiled via C and under the Python interpreter, and report
+the elapsed, user and system time of the fastest run of each.
+
+Usage (in the repository root directory; requires a C compiler):
+
+  python misc/perf_bigint.py [RUNS]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from typing import List, Tuple
+
+from mypy import build
+
+
+PROGRAM = '''\
+import typing
+def factorial(n: int) -> int:
+    f = 1
+    while n > 1:
+        f = f * n
+        n = n - 1
+    return f
+def fib(n: int) -> int:
+    a = 0
+    b = 1
+    while n > 0:
+        t = b
+        b = a + b
+        a = t
+        n = n - 1
+    return a
+def main() -> None:
+    modulus = 1000000007
+    i = 0
+    s = 0
+    while i < 200:
+        s = (s + factorial(400 + i) % modulus) % modulus
+        i = i + 1
+    print(s)
+    i = 0
+    s = 0
+    while i < 20:
+        s = (s + fib(10000 + i) % modulus) % modulus
+        i = i + 1
+    print(s)
+    print(factorial(100) // fib(200) >> 100)
+main()
+'''
+
+PROGRAM_NAME = '_perf_bigint'
+
+
+def run(args: List[str], runs: int) -> Tuple[Tuple[float, float, float],
+                                               str]:
+    """Run a command several times.
+
+    Return tuple ((elapsed, user and system time) of the fastest run,
+    output).
+    """
+    times = List[Tuple[float, float, float]]()
+    output = ''
+    for i in range(runs):
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        t0 = time.time()
+        output = str(subprocess.check_output(args), 'utf8')
+        elapsed = time.time() - t0
+        new_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        times.append((elapsed, new_usage.ru_utime - usage.ru_utime,
+                      new_usage.ru_stime - usage.ru_stime))
+    return min(times), output
+
+
+def main(args: List[str]) -> None:
+    runs = int(args[0]) if args else 3
+    build.build(PROGRAM_NAME + '.py',
+                target=build.C,
+                program_text=PROGRAM,
+                alt_lib_path='lib',
+                flags=[build.TEST_BUILTINS])
+    try:
+        compiled_time, compiled_output = run(['./' + PROGRAM_NAME], runs)
+    finally:
+        os.remove(PROGRAM_NAME)
+    program_file = PROGRAM_NAME + '.py'
+    f = open(program_file, 'w')
+    f.write(PROGRAM)
+    f.close()
+    try:
+        interpreted_time, interpreted_output = run(
+            [sys.executable, program_file], runs)
+    finally:
+        os.remove(program_file)
+    if compiled_output != interpreted_output:
+        sys.stderr.write('Output differs:\n{}---\n{}'.format(
+            compiled_output, interpreted_output))
+        sys.exit(1)
+    for name, times in [('compiled', compiled_time),
+                        ('interpreted', interpreted_time)]:
+        print('{:12} {:.3f} s (user {:.3f} s, system {:.3f} s)'.format(
+            name + ':', times[0], times[1], times[2]))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,76 @@
+"""Benchmark build scheduling using a large synthetic import graph.
+
+Generate a program that consists of many small modules, each of which imports
+a few other modules, and time a type checking build of the program. The time
+spent in the build manager grows with the number of modules, while the time
+spent in the passes themselves is roughly linear.
+
+Usage (in the repository root directory):
+
+  python misc/perf_build.py [NUM_MODULES [NUM_IMPORTS [JOBS]]]
+
+JOBS is the number of parallel jobs (as in the -j option of scripts/mypy).
+"""
+
+import os
+import os.path
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mypy import build
+
+
+def generate_program(dir: str, num_modules: int, num_imports: int) -> str:
+    """Generate a synthetic program in a directory.
+
+    Module mN imports num_imports random modules mK with K < N, so that the
+    import graph is acyclic. Return the text of the main file, which imports
+    every module.
+    """
+    rand = random.Random(1)
+    for n in range(num_modules):
+        deps = List[int]()
+        if n > 0:
+            deps = sorted(set(rand.randrange(n) for i in range(num_imports)))
+        lines = ['import m{}'.format(dep) for dep in deps]
+        lines.append('def f(x: int) -> int:')
+        if deps:
+            lines.append('    return m{}.f(x)'.format(deps[0]))
+        else:
+            lines.append('    return x')
+        f = open(os.path.join(dir, 'm{}.py'.format(n)), 'w')
+        f.write('\n'.join(lines) + '\n')
+        f.close()
+    return '\n'.join('import m{}'.format(n) for n in range(num_modules))
+
+
+def main(args: List[str]) -> None:
+    num_modules = int(args[0]) if args else 5000
+    num_imports = int(args[1]) if args[1:] else 3
+    jobs = int(args[2]) if args[2:] else 1
+    dir = tempfile.mkdtemp()
+    try:
+        text = generate_program(dir, num_modules, num_imports)
+        t0 = time.time()
+        build.build('main',
+                    target=build.TYPE_CHECK,
+                    program_text=text,
+                    flags=[build.TEST_BUILTINS],
+                    alt_lib_path=dir,
+                    jobs=jobs)
+        elapsed = time.time() - t0
+    finally:
+        shutil.rmtree(dir)
+    print('{} modules, {} imports per module, {} jobs: {:.2f} s'.format(
+        num_modules, num_imports, jobs, elapsed))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
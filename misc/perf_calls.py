@@ -0,0 +1,119 @@
+"""Benchmark method calls in compiled programs.
+
+Compile programs that call methods in a loop via C, with and without
+devirtualization (see mypy.cgen.CGenerator.method_call), and report the
+number of calls per second (including loop overhead) of the fastest run of
+each.
+
+Usage (in the repository root directory; requires a C compiler):
+
+  python misc/perf_calls.py [RUNS]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+from typing import List, Tuple
+
+from mypy import build
+
+
+CLASSES = '''\
+from typing import Undefined
+class Counter:
+    x = Undefined(int)
+    def __init__(self) -> None:
+        self.x = 1
+    def step(self, k: int) -> int:
+        return k + 1
+class Shape:
+    def area(self) -> int:
+        return 1
+class Square(Shape):
+    def area(self) -> int:
+        return 4
+'''
+
+LOOP = '''\
+def main() -> None:
+    {}
+    i = 0
+    s = 0
+    while i < {}:
+        s = s + {}
+        i = i + 1
+    print(s)
+main()
+'''
+
+# Number of calls in each program
+CALLS = 200000000
+
+# Tuples (description, receiver definition, call expression)
+WORKLOADS = [
+    ('leaf class method', 'o = Counter()', 'o.step(i)'),
+    ('attribute getter', 'o = Counter()', 'o.x'),
+    ('overridden, base instance', 'o = Shape()', 'o.area()'),
+    ('overridden, subclass instance', 'o = Square() # type: Shape',
+     'o.area()')
+]
+
+PROGRAM_NAME = '_perf_calls'
+
+
+def compile(program: str, optimizations: List[str]) -> str:
+    """Compile a program and return the binary path."""
+    build.build(PROGRAM_NAME + '.py',
+                target=build.C,
+                program_text=program,
+                alt_lib_path='lib',
+                flags=[build.TEST_BUILTINS],
+                optimizations=optimizations)
+    binary = '{}_{}'.format(PROGRAM_NAME, len(optimizations))
+    os.rename(PROGRAM_NAME, binary)
+    return binary
+
+
+def run(binary: str, runs: int) -> Tuple[float, str]:
+    """Run a binary and return (shortest time, output)."""
+    times = List[float]()
+    output = ''
+    for i in range(runs):
+        t0 = time.time()
+        output = str(subprocess.check_output(['./' + binary]), 'utf8')
+        times.append(time.time() - t0)
+    return min(times), output
+
+
+def main(args: List[str]) -> None:
+    runs = int(args[0]) if args else 3
+    without = [name for name in build.OPTIMIZATIONS
+               if name != build.DEVIRTUALIZATION]
+    configurations = [('vtable', without),
+                      ('devirtualize', build.OPTIMIZATIONS)]
+    print('{:32} {:>16} {:>16}'.format('', configurations[0][0],
+                                       configurations[1][0]))
+    for description, receiver, call in WORKLOADS:
+        program = CLASSES + LOOP.format(receiver, CALLS, call)
+        rates = List[float]()
+        outputs = List[str]()
+        for name, optimizations in configurations:
+            binary = compile(program, optimizations)
+            try:
+                elapsed, output = run(binary, runs)
+            finally:
+                os.remove(binary)
+            rates.append(CALLS / elapsed)
+            outputs.append(output)
+        if outputs[0] != outputs[1]:
+            sys.stderr.write('Output of {} differs:\n{}---\n{}'.format(
+                description, outputs[0], outputs[1]))
+            sys.exit(1)
+        print('{:32} {:>10.1f} M/s {:>10.1f} M/s'.format(
+            description + ':', rates[0] / 1e6, rates[1] / 1e6))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,107 @@
+"""Report the effect of register allocation on compiled test programs.
+
+Compile the programs of the C run test cases (cgen-*.test) via C, with and
+without register allocation (see mypy.regalloc), and report the total
+number of stack frame slots of the generated functions and the total
+shortest running time of the resulting binaries for each.
+
+Usage (in the repository root directory; requires a C compiler):
+
+  python misc/perf_frames.py [RUNS]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+from typing import List, Tuple
+
+from mypy import build
+from mypy import regalloc
+from mypy.errors import CompileError
+from mypy.test.config import test_data_prefix, test_temp_dir
+from mypy.test.data import parse_test_cases, DataDrivenTestCase
+
+
+FILES = ['cgen-basic.test',
+         'cgen-intops.test',
+         'cgen-classes.test']
+
+PROGRAM_NAME = '_perf_frames'
+
+
+def compile(program: str, optimizations: List[str]) -> Tuple[str, int]:
+    """Compile a program and return (binary path, number of frame slots)."""
+    result = build.build(PROGRAM_NAME + '.py',
+                         target=build.C,
+                         program_text=program,
+                         alt_lib_path='lib',
+                         flags=[build.TEST_BUILTINS],
+                         optimizations=optimizations)
+    slots = 0
+    for func in result.icode.values():
+        if build.REGISTER_ALLOCATION in optimizations:
+            slots += regalloc.allocate_registers(func).frame_size
+        else:
+            slots += func.num_registers
+    binary = '{}_{}'.format(PROGRAM_NAME, len(optimizations))
+    os.rename(PROGRAM_NAME, binary)
+    return binary, slots
+
+
+def run(binary: str, runs: int) -> Tuple[float, str]:
+    """Run a binary and return (shortest time, output)."""
+    times = List[float]()
+    output = ''
+    for i in range(runs):
+        t0 = time.time()
+        output = str(subprocess.check_output(['./' + binary],
+                                             stderr=subprocess.STDOUT),
+                     'utf8')
+        times.append(time.time() - t0)
+    return min(times), output
+
+
+def main(args: List[str]) -> None:
+    runs = int(args[0]) if args else 3
+    testcases = List[DataDrivenTestCase]()
+    for f in FILES:
+        testcases += parse_test_cases(os.path.join(test_data_prefix, f),
+                                      None, test_temp_dir, True)
+    without = [name for name in build.OPTIMIZATIONS
+               if name != build.REGISTER_ALLOCATION]
+    configurations = [('frame only', without),
+                      ('regalloc', build.OPTIMIZATIONS)]
+    slots = [0] * len(configurations)
+    times = [0.0] * len(configurations)
+    programs = 0
+    for testcase in testcases:
+        program = '\n'.join(testcase.input)
+        outputs = List[str]()
+        try:
+            for i, configuration in enumerate(configurations):
+                binary, num_slots = compile(program, configuration[1])
+                try:
+                    elapsed, output = run(binary, runs)
+                finally:
+                    os.remove(binary)
+                slots[i] += num_slots
+                times[i] += elapsed
+                outputs.append(output)
+        except CompileError:
+            # Test cases may expect compile errors.
+            continue
+        if outputs[0] != outputs[1]:
+            sys.stderr.write('Output of {} differs:\n{}---\n{}'.format(
+                testcase.name, outputs[0], outputs[1]))
+            sys.exit(1)
+        programs += 1
+    print('{} programs'.format(programs))
+    for i, configuration in enumerate(configurations):
+        print('{:12} {:5} frame slots  {:.3f} s'.format(
+            configuration[0] + ':', slots[i], times[i]))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
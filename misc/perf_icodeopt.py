@@ -0,0 +1,122 @@
+"""Benchmark the effect of optimizations on compiled programs.
+
+Compile a Fibonacci program (iterative and recursive variants) via C, with
+and without optimizations (see mypy.build.OPTIMIZATIONS), and report the
+number of icode opcodes and the shortest running time of the resulting
+binary for each.
+
+Usage (in the repository root directory; requires a C compiler):
+
+  python misc/perf_icodeopt.py [RUNS]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+from typing import List, Tuple
+
+from mypy import build
+
+
+PROGRAM = '''\
+import typing
+def fib(n: int) -> int:
+    a = 0
+    b = 1
+    i = 0
+    while i < n:
+        t = b
+        b = a + b
+        a = t
+        i = i + 1
+    return a
+def fib_mod(n: int) -> int:
+    modulus = 1000003
+    step = 1
+    a = 0
+    b = 1
+    i = 0
+    while i < n:
+        t = b
+        b = (a + b) % modulus
+        a = t
+        i = i + step
+    return a
+def rfib(n: int) -> int:
+    if n < 2:
+        return n
+    return rfib(n - 1) + rfib(n - 2)
+def main() -> None:
+    verbose = 0
+    rounds = 100000
+    i = 0
+    s = 0
+    while i < rounds:
+        f = fib(80)
+        if verbose > 0:
+            print(f)
+        s = (s + f) % 1000
+        i = i + 1
+    print(s)
+    print(fib_mod(20000000))
+    print(rfib(30))
+main()
+'''
+
+PROGRAM_NAME = '_perf_icodeopt'
+
+
+def compile(optimizations: List[str]) -> Tuple[str, int]:
+    """Compile the program and return (binary path, number of opcodes)."""
+    result = build.build(PROGRAM_NAME + '.py',
+                         target=build.C,
+                         program_text=PROGRAM,
+                         alt_lib_path='lib',
+                         flags=[build.TEST_BUILTINS],
+                         optimizations=optimizations)
+    num_ops = 0
+    for func in result.icode.values():
+        for block in func.blocks:
+            num_ops += len(block.ops)
+    binary = '{}_{}'.format(PROGRAM_NAME, len(optimizations))
+    os.rename(PROGRAM_NAME, binary)
+    return binary, num_ops
+
+
+def run(binary: str, runs: int) -> Tuple[float, str]:
+    """Run a binary and return (shortest time, output)."""
+    times = List[float]()
+    output = ''
+    for i in range(runs):
+        t0 = time.time()
+        output = str(subprocess.check_output(['./' + binary]), 'utf8')
+        times.append(time.time() - t0)
+    return min(times), output
+
+
+def main(args: List[str]) -> None:
+    runs = int(args[0]) if args else 5
+    results = List[Tuple[str, int, float]]()
+    outputs = List[str]()
+    for name, optimizations in [('no optimizations', List[str]()),
+                                ('all passes', build.OPTIMIZATIONS)]:
+        binary, num_ops = compile(optimizations)
+        try:
+            elapsed, output = run(binary, runs)
+        finally:
+            os.remove(binary)
+        results.append((name, num_ops, elapsed))
+        outputs.append(output)
+    if outputs[0] != outputs[1]:
+        sys.stderr.write('Output differs:\n{}---\n{}'.format(outputs[0],
+                                                          outputs[1]))
+        sys.exit(1)
+    for name, num_ops, elapsed in results:
+        print('{:18} {:4} opcodes  {:.3f} s'.format(name + ':', num_ops,
+                                                   elapsed))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
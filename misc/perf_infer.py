@@ -0,0 +1,56 @@
+"""Benchmark type inference of large heterogeneous collection literals.
+
+Generate a program with a list literal whose items are instances of several
+related classes, a dict literal with the same kind of values and a list
+literal with unrelated item types, and time a type checking build of the
+program. Inferring the type of each literal joins the item types one at a
+time, so the number of joins is proportional to the number of items.
+
+Usage (in the repository root directory):
+
+  python misc/perf_infer.py [NUM_ITEMS]
+"""
+
+import os
+import os.path
+import sys
+import time
+
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mypy import build
+from mypy.join import join_cache_stats
+
+
+def generate_program(num_items: int) -> str:
+    """Return the text of a program with literals of num_items items."""
+    classes = ['A()', 'B()', 'C()', 'D()']
+    lines = ['class A: pass',
+             'class B(A): pass',
+             'class C(A): pass',
+             'class D(B): pass']
+    items = [classes[i % len(classes)] for i in range(num_items)]
+    lines.append('x = [{}]'.format(', '.join(items)))
+    lines.append('y = {{{}}}'.format(', '.join(
+        '{}: {}'.format(i, item) for i, item in enumerate(items))))
+    mixed = ['1', "''", 'A()']
+    lines.append('z = [{}]'.format(', '.join(
+        mixed[i % len(mixed)] for i in range(num_items))))
+    return '\n'.join(lines) + '\n'
+
+
+def main(args: List[str]) -> None:
+    num_items = int(args[0]) if args else 10000
+    text = generate_program(num_items)
+    t0 = time.time()
+    build.build('main', target=build.TYPE_CHECK, program_text=text)
+    elapsed = time.time() - t0
+    print('{} items: {:.2f} s ({} joins cached, {} computed)'.format(
+        num_items, elapsed, join_cache_stats['hits'],
+        join_cache_stats['misses']))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
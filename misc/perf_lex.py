@@ -0,0 +1,51 @@
+"""Benchmark the lexer.
+
+Lexically analyze the given source files (by default, the stubs and the
+Python library modules included in the repository) and report the number of
+tokens generated per second.
+
+Usage (in the repository root directory):
+
+  python misc/perf_lex.py [FILE ...]
+"""
+
+import os
+import os.path
+import sys
+import time
+
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mypy import lex
+
+
+def find_source_files(dirs: List[str]) -> List[str]:
+    result = List[str]()
+    for dir in dirs:
+        for root, dirnames, filenames in os.walk(dir):
+            for name in sorted(filenames):
+                if name.endswith('.py'):
+                    result.append(os.path.join(root, name))
+    return sorted(result)
+
+
+def main(args: List[str]) -> None:
+    paths = args or find_source_files(['stubs', 'lib-python'])
+    sources = List[str]()
+    for path in paths:
+        f = open(path)
+        sources.append(f.read())
+        f.close()
+    num_tokens = 0
+    t0 = time.time()
+    for text in sources:
+        num_tokens += len(lex.lex(text))
+    elapsed = time.time() - t0
+    print('{} files, {} tokens: {:.2f} s, {:.0f} tokens/s'.format(
+        len(sources), num_tokens, elapsed, num_tokens / elapsed))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,62 @@
+"""Benchmark type checking member accesses through deep class hierarchies.
+
+Generate a program with several chains of classes, each of which inherits
+from the previous class in the chain, and functions that access attributes
+and call methods defined at every level of a chain through an instance of
+the most derived class. Time a type checking build of the program.
+
+Usage (in the repository root directory):
+
+  python misc/perf_member.py [NUM_CHAINS [DEPTH [NUM_ACCESSES]]]
+
+NUM_ACCESSES is the number of member accesses per function (there is one
+function per chain).
+"""
+
+import os
+import os.path
+import sys
+import time
+
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mypy import build
+
+
+def generate_program(num_chains: int, depth: int, num_accesses: int) -> str:
+    """Return the text of the program."""
+    lines = List[str]()
+    for c in range(num_chains):
+        for d in range(depth):
+            name = 'C{}_{}'.format(c, d)
+            if d == 0:
+                lines.append('class {}:'.format(name))
+            else:
+                lines.append('class {}(C{}_{}):'.format(name, c, d - 1))
+            lines.append('    def __init__(self) -> None:')
+            lines.append('        self.a{} = {}'.format(d, d))
+            lines.append('    def m{}(self, x: int) -> int:'.format(d))
+            lines.append('        return x')
+        lines.append('def f{}(o: C{}_{}) -> None:'.format(c, c, depth - 1))
+        for i in range(num_accesses):
+            d = i % depth
+            lines.append('    o.m{}(o.a{})'.format(d, d))
+    return '\n'.join(lines) + '\n'
+
+
+def main(args: List[str]) -> None:
+    num_chains = int(args[0]) if args else 50
+    depth = int(args[1]) if args[1:] else 10
+    num_accesses = int(args[2]) if args[2:] else 200
+    text = generate_program(num_chains, depth, num_accesses)
+    t0 = time.time()
+    build.build('main', target=build.TYPE_CHECK, program_text=text)
+    elapsed = time.time() - t0
+    print('{} chains of depth {}, {} accesses per chain: {:.2f} s'.format(
+        num_chains, depth, num_accesses, elapsed))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
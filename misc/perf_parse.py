@@ -0,0 +1,76 @@
+"""Benchmark parsing.
+
+Parse the given source files, or all the .py files in the given directories
+(by default, stubs/3.2), keeping all the parse trees alive. Report the time
+spent and the increase in peak memory use (resident set size).
+
+Usage (in the repository root directory):
+
+  python misc/perf_parse.py [--no-repr] [FILE_OR_DIR ...]
+
+With --no-repr, parse without preserving node representations, as in type
+checking builds. Peak memory use can only grow, so measure the two modes in
+separate runs.
+"""
+
+import os
+import os.path
+import resource
+import sys
+import time
+
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mypy import parse
+from mypy.errors import Errors
+from mypy.nodes import MypyFile
+
+
+def find_source_files(paths: List[str]) -> List[str]:
+    result = List[str]()
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirnames, filenames in os.walk(path):
+                for name in filenames:
+                    if name.endswith('.py'):
+                        result.append(os.path.join(root, name))
+        else:
+            result.append(path)
+    return sorted(result)
+
+
+def peak_rss() -> int:
+    """Return the peak resident set size of the process in kilobytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def main(args: List[str]) -> None:
+    preserve_repr = True
+    if args[:1] == ['--no-repr']:
+        preserve_repr = False
+        args = args[1:]
+    paths = find_source_files(args or ['stubs/3.2'])
+    sources = List[str]()
+    for path in paths:
+        f = open(path)
+        sources.append(f.read())
+        f.close()
+    rss0 = peak_rss()
+    t0 = time.time()
+    trees = List[MypyFile]()
+    num_errors = 0
+    for path, text in zip(paths, sources):
+        errors = Errors()
+        trees.append(parse.parse(text, path, errors,
+                                 preserve_repr=preserve_repr))
+        if errors.is_errors():
+            num_errors += 1
+    elapsed = time.time() - t0
+    print('{} files ({} with errors): {:.2f} s, peak RSS +{} KB'.format(
+        len(paths), num_errors, elapsed, peak_rss() - rss0))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
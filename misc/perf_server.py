@@ -0,0 +1,122 @@
+"""Benchmark repeated type checks of a program using the type checking server.
+
+Generate a program consisting of a main module and a chain of library
+modules, each of which imports the previous one. Then repeatedly modify the
+main module and type check the program, first by running scripts/mypy -S
+and then by running scripts/mypy-client against a server started with
+scripts/mypy --server. Report the shortest and the average wall clock time
+of a check for both. The times include starting the Python interpreter of
+the command.
+
+Usage (in the repository root directory):
+
+  python misc/perf_server.py [RUNS [NUM_MODULES]]
+"""
+
+import os
+import os.path
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from typing import List, Mapping, Tuple
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def generate_module(i: int) -> str:
+    """Return the text of library module number i."""
+    lines = List[str]()
+    if i > 0:
+        lines.append('import lib{}'.format(i - 1))
+    for c in range(10):
+        lines.append('class C{}:'.format(c))
+        lines.append('    def __init__(self, n: int) -> None:')
+        lines.append('        self.n = n')
+        lines.append('    def get(self, s: str) -> str:')
+        lines.append('        return s * self.n')
+        lines.append('def f{}(x: int) -> str:'.format(c))
+        if i > 0:
+            lines.append('    return lib{}.f{}(x) + C{}(x).get("a")'.format(
+                i - 1, c, c))
+        else:
+            lines.append('    return C{}(x).get("a")'.format(c))
+    return '\n'.join(lines) + '\n'
+
+
+def write_file(path: str, text: str) -> None:
+    f = open(path, 'w')
+    f.write(text)
+    f.close()
+
+
+def run(command: List[str], env: Mapping[str, str]) -> float:
+    """Run a command and return the time it took."""
+    t0 = time.time()
+    status = subprocess.call(command, env=env)
+    elapsed = time.time() - t0
+    if status != 0:
+        sys.stderr.write('{} failed\n'.format(' '.join(command)))
+        sys.exit(1)
+    return elapsed
+
+
+def check_repeatedly(command: List[str], main: str, num_modules: int,
+                     runs: int,
+                     env: Mapping[str, str]) -> Tuple[float, float]:
+    """Modify and type check the main module runs times.
+
+    Return the shortest and the average time of a check.
+    """
+    last = 'lib{}'.format(num_modules - 1)
+    times = List[float]()
+    for i in range(runs):
+        write_file(main, 'import {}\n'
+                         'print({}.f{}({}))\n'.format(last, last, i % 10, i))
+        times.append(run(command + [main], env))
+    return min(times), sum(times) / len(times)
+
+
+def main(args: List[str]) -> None:
+    runs = int(args[0]) if args else 10
+    num_modules = int(args[1]) if args[1:] else 20
+    env = os.environ.copy()
+    env['PYTHONPATH'] = os.pathsep.join([root] +
+                                        env.get('PYTHONPATH', '').split(
+                                            os.pathsep))
+    mypy = [sys.executable, os.path.join(root, 'scripts', 'mypy')]
+    client = [sys.executable, os.path.join(root, 'scripts', 'mypy-client')]
+    dir = tempfile.mkdtemp()
+    try:
+        for i in range(num_modules):
+            write_file(os.path.join(dir, 'lib{}.py'.format(i)),
+                       generate_module(i))
+        main = os.path.join(dir, 'main.py')
+        address = os.path.join(dir, 'server.sock')
+        plain = check_repeatedly(mypy + ['-S'], main, num_modules, runs,
+                                 env)
+        server = subprocess.Popen(mypy + ['--server', address], env=env)
+        try:
+            while not os.path.exists(address):
+                time.sleep(0.05)
+            first = check_repeatedly(client + [address], main,
+                                     num_modules, 1, env)
+            warm = check_repeatedly(client + [address], main, num_modules,
+                                    runs, env)
+        finally:
+            subprocess.call(client + [address, '--stop'], env=env)
+            server.wait()
+    finally:
+        shutil.rmtree(dir)
+    print('{} library modules, {} runs'.format(num_modules, runs))
+    print('mypy -S:                  min {:.3f} s, average {:.3f} s'.format(
+        plain[0], plain[1]))
+    print('mypy-client (first run):  {:.3f} s'.format(first[0]))
+    print('mypy-client:              min {:.3f} s, average {:.3f} s'.format(
+        warm[0], warm[1]))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,63 @@
+"""Benchmark the startup latency of type checking a hello world program.
+
+Run scripts/mypy -S on a program that only prints a message, both without
+and with a stub snapshot (see mypy.snapshot), and report the shortest wall
+clock time of each. The times include starting the Python interpreter and
+importing mypy.
+
+Usage (in the repository root directory):
+
+  python misc/perf_startup.py [RUNS]
+"""
+
+import os
+import os.path
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from typing import List
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_mypy(args: List[str]) -> float:
+    """Run scripts/mypy with the given arguments and return the time."""
+    env = os.environ.copy()
+    env['PYTHONPATH'] = os.pathsep.join([root] +
+                                        env.get('PYTHONPATH', '').split(
+                                            os.pathsep))
+    t0 = time.time()
+    status = subprocess.call([sys.executable,
+                              os.path.join(root, 'scripts', 'mypy')] + args,
+                             env=env)
+    elapsed = time.time() - t0
+    if status != 0:
+        sys.stderr.write('mypy {} failed\n'.format(' '.join(args)))
+        sys.exit(1)
+    return elapsed
+
+
+def main(args: List[str]) -> None:
+    runs = int(args[0]) if args else 10
+    dir = tempfile.mkdtemp()
+    try:
+        program = os.path.join(dir, 'hello.py')
+        f = open(program, 'w')
+        f.write('print("Hello, world")\n')
+        f.close()
+        snapshot = os.path.join(dir, 'stubs.snapshot')
+        run_mypy(['--create-snapshot', snapshot])
+        plain = min(run_mypy(['-S', program]) for i in range(runs))
+        fast = min(run_mypy(['--snapshot', snapshot, '-S', program])
+                   for i in range(runs))
+    finally:
+        shutil.rmtree(dir)
+    print('without snapshot: {:.3f} s, with snapshot: {:.3f} s'.format(
+        plain, fast))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
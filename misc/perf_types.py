@@ -0,0 +1,58 @@
+"""Count the type objects allocated while running the type checker tests.
+
+Run the test cases of mypy.test.testcheck (optionally only those matching
+the given myunit patterns, such as '*Generic*') and report the number of
+instances of each Type subclass that were created, and an estimate of the
+memory they use.
+
+Usage (in the repository root directory):
+
+  python misc/perf_types.py [PATTERN ...]
+"""
+
+import os
+import os.path
+import sys
+
+from typing import Dict, List, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mypy import types
+from mypy.myunit import run_test
+from mypy.test.testcheck import TypeCheckSuite
+
+
+counts = Dict[str, int]()
+sizes = Dict[str, int]()
+
+
+def count_type(init: Any) -> Any:
+    """Wrap Type.__init__ so that allocations are recorded."""
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> None:
+        init(self, *args, **kwargs)
+        name = type(self).__name__
+        counts[name] = counts.get(name, 0) + 1
+        if name not in sizes:
+            size = sys.getsizeof(self)
+            if hasattr(self, '__dict__'):
+                size += sys.getsizeof(self.__dict__)
+            sizes[name] = size
+    return wrapper
+
+
+def main(args: List[str]) -> None:
+    setattr(types.Type, '__init__', count_type(types.Type.__init__))
+    run_test(TypeCheckSuite(), args)
+    total = 0
+    total_size = 0
+    for name in sorted(counts, key=lambda name: -counts[name]):
+        print('{:15} {:8} x {:3} bytes'.format(name, counts[name],
+                                               sizes[name]))
+        total += counts[name]
+        total_size += counts[name] * sizes[name]
+    print('{} type objects, {:.1f} MB'.format(total, total_size / 1e6))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
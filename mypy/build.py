@@ -9,24 +9,42 @@ file.  The individual passes are implemented in separate modules.
 The function build() is the main interface to this module.
 """
 
+import concurrent.futures
+import hashlib
+import heapq
+import multiprocessing
+import multiprocessing.connection
 import os
 import os.path
 import shlex
 import subprocess
 import sys
+import threading
+import time
+import traceback
 from os.path import dirname, basename
 
-from typing import Undefined, Dict, List, Tuple, cast, Set
+from typing import Undefined, Dict, List, Tuple, Any, cast, Set, Function
 
 from mypy.types import Type
 from mypy.nodes import MypyFile, Node, Import, ImportFrom, ImportAll
-from mypy.nodes import SymbolTableNode, MODULE_REF
+from mypy.nodes import SymbolTableNode, MODULE_REF, TypeInfo
 from mypy.semanal import SemanticAnalyzer, FirstPass, ThirdPass
 from mypy.checker import TypeChecker
-from mypy.errors import Errors, CompileError
+from mypy.errors import Errors, ErrorInfo, ErrorReporter, CompileError
+from mypy.subtypes import clear_subtype_cache, subtype_cache_stats
+from mypy.join import clear_join_cache, join_cache_stats
+from mypy.meet import clear_meet_cache, meet_cache_stats
+from mypy.cache import (
+    BuildCache, source_hash, dump_types, load_types, module_var_types,
+    restore_var_types, lookup_var
+)
+from mypy.snapshot import StubSnapshot, load_snapshot, write_snapshot
+from mypy.stats import BuildStats, counters, reset_counters
 from mypy.icode import FuncIcode
 from mypy import cgen
 from mypy import icode
+from mypy import icodeopt
 from mypy import parse
 from mypy import transform
 
@@ -47,6 +65,24 @@ COMPILE_ONLY = 'compile-only'   # Compile only to C, do not generate binary
 VERBOSE = 'verbose'             # More verbose messages (for troubleshooting)
 MODULE = 'module'               # Build/run module as a script
 TEST_BUILTINS = 'test-builtins' # Use stub builtins to speed up tests
+INCREMENTAL = 'incremental'     # Reuse cached results of unchanged modules
+# Process all modules that do not depend on modules that could not be
+# processed, instead of stopping at the first module with errors
+CONTINUE_ON_ERRORS = 'continue-on-errors'
+
+
+# Name of the optimization that stores only registers visible to the garbage
+# collector in stack frames (see mypy.regalloc)
+REGISTER_ALLOCATION = 'regalloc'
+# Name of the optimization that calls methods directly instead of through the
+# vtable when possible (see mypy.cgen.CGenerator.method_call)
+DEVIRTUALIZATION = 'devirtualize'
+# All optimizations performed when compiling via C
+OPTIMIZATIONS = icodeopt.PASSES + [REGISTER_ALLOCATION, DEVIRTUALIZATION]
+
+
+# Default location of the cache used by incremental builds
+DEFAULT_CACHE_DIR = '.mypy_cache'
 
 
 # State ids. These describe the states a source file / module can be in a
@@ -69,6 +105,17 @@ TYPE_CHECKED_STATE = 5
 final_state = TYPE_CHECKED_STATE
 
 
+# Names of the passes performed when advancing a file from a state (for
+# BuildStats). Parsing and the first pass of semantic analysis are both
+# performed when advancing from UNPROCESSED_STATE, and they are recorded
+# separately.
+pass_names = {
+    PARSED_STATE: 'semanal pass 2',
+    PARTIAL_SEMANTIC_ANALYSIS_STATE: 'semanal pass 3',
+    SEMANTICALLY_ANALYSED_STATE: 'type check',
+} # type: Dict[int, str]
+
+
 def earlier_state(s: int, t: int) -> bool:
     return s < t
 
@@ -102,7 +149,14 @@ def build(program_path: str,
           bin_dir: str = None,
           output_dir: str = None,
           pyversion: int = 3,
-          flags: List[str] = None) -> BuildResult:
+          flags: List[str] = None,
+          cache_dir: str = None,
+          jobs: int = 1,
+          snapshot_path: str = None,
+          snapshot: StubSnapshot = None,
+          stats: BuildStats = None,
+          reporter: ErrorReporter = None,
+          optimizations: List[str] = None) -> BuildResult:
     """Build a mypy program.
 
     A single call to build performs parsing, semantic analysis and optionally
@@ -125,9 +179,38 @@ def build(program_path: str,
       output_dir: directory where the output (Python) is stored
       pyversion: Python version (2 for 2.x or 3 for 3.x)
       flags: list of build options (e.g. COMPILE_ONLY)
+      cache_dir: directory for cached results of incremental builds (only
+        used with the INCREMENTAL flag); DEFAULT_CACHE_DIR by default
+      jobs: maximum number of worker processes used for type checking
+        (only with the TYPE_CHECK target; the types of expressions are not
+        collected if more than one job is used)
+      snapshot_path: file created by create_snapshot; take the modules in
+        it from the snapshot instead of processing them (only with the
+        TYPE_CHECK target; the types of expressions in these modules are
+        not collected)
+      snapshot: in-memory snapshot to use instead of snapshot_path; modules
+        whose sources have changed are removed from it and the modules
+        type checked during the build are added to it, so that it can be
+        reused by subsequent builds (only with the TYPE_CHECK target)
+      stats: record the times of build passes and operation counts in this
+        object (also if the build fails)
+      reporter: report the errors of each module using this as soon as the
+        module has been type checked (CompileError still contains all the
+        messages)
+      optimizations: names of the optimizations to perform when generating
+        C (only with the C target): icode optimization passes (see
+        mypy.icodeopt.PASSES), REGISTER_ALLOCATION and DEVIRTUALIZATION;
+        all of OPTIMIZATIONS by default
     """
     flags = flags or []
     module = module or '__main__'
+    
+    # Source files may have changed since the previous build.
+    clear_find_module_cache()
+    clear_subtype_cache()
+    clear_join_cache()
+    clear_meet_cache()
+    reset_counters()
 
     data_dir = default_data_dir(bin_dir)
     
@@ -151,13 +234,25 @@ def build(program_path: str,
     if alt_lib_path:
         lib_path.insert(0, alt_lib_path)
     
+    if snapshot and target == TYPE_CHECK:
+        # The main module is always processed, and the modules in the
+        # snapshot must not refer to an earlier version of it.
+        snapshot.remove_modules([module])
+    
     # Construct a build manager object that performs all the stages of the
     # build in the correct order.
     #
     # Ignore current directory prefix in error messages.
     manager = BuildManager(data_dir, lib_path, target, output_dir,
                            pyversion=pyversion, flags=flags,
-                           ignore_prefix=os.getcwd())
+                           ignore_prefix=os.getcwd(),
+                           cache_dir=cache_dir,
+                           jobs=jobs,
+                           snapshot_path=snapshot_path,
+                           snapshot=snapshot,
+                           stats=stats,
+                           reporter=reporter,
+                           optimizations=optimizations)
 
     program_path = program_path or lookup_program(module, lib_path)
     if program_text is None:
@@ -169,7 +264,38 @@ def build(program_path: str,
     # Perform the build by sending the file as new file (UnprocessedFile is the
     # initial state of all files) to the manager. The manager will process the
     # file and all dependant modules recursively.
-    return manager.process(UnprocessedFile(info, program_text))
+    try:
+        return manager.process(UnprocessedFile(info, program_text))
+    finally:
+        if stats:
+            stats.add_counters(counters)
+
+
+def create_snapshot(path: str,
+                    modules: List[str],
+                    bin_dir: str = None,
+                    pyversion: int = 3,
+                    flags: List[str] = None,
+                    alt_lib_path: str = None) -> None:
+    """Create a stub snapshot file for speeding up builds.
+
+    The snapshot contains the given modules, builtins and all the modules
+    that they import (directly or indirectly), semantically analyzed and
+    type checked. Raise CompileError if there are errors in the modules.
+
+    The optional arguments are as for build.
+    """
+    program_text = ''.join('import {}\n'.format(id) for id in modules)
+    snapshot = StubSnapshot(pyversion)
+    build('<snapshot>',
+          target=TYPE_CHECK,
+          program_text=program_text,
+          alt_lib_path=alt_lib_path,
+          bin_dir=bin_dir,
+          pyversion=pyversion,
+          flags=flags,
+          snapshot=snapshot)
+    write_snapshot(path, snapshot)
 
 
 def default_data_dir(bin_dir: str) -> str:
@@ -270,13 +396,41 @@ class BuildManager:
                        by a single state object (after it has been encountered
                        for the first time). This is the only place where
                        states are stored.
+      state_index:     Map from source file path to the index of the related
+                       state in states
+      module_index:    Map from module name to the index of the related state
+                       in states
       module_files:    Map from module name to source file path. There is a
                        1:1 mapping between modules and source files.
       icode:           Generated icode (when compiling via C)
+      optimizations:   Names of the optimizations to perform when
+                       compiling via C (see OPTIMIZATIONS)
       binary_path:     Path of the generated binary (or None)
-      module_deps:     Cache for module dependencies (direct or indirect).
-                       Item (m, n) indicates whether m depends on n (directly
-                       or indirectly).
+      cache:           Cache of type checking results of modules (None if
+                       not an incremental build)
+      source_hashes:   Map from module name to the hash of its source
+                       (only used in incremental builds and when extending
+                       a snapshot)
+      cache_keys:      Map from module name to the key of its cached results
+                       (only used in incremental builds)
+      jobs:            Maximum number of worker processes for type checking
+      prefetcher:      Reads and parses imported modules in the background
+                       (None if jobs is 1)
+      preserve_repr:   Record the tokens of parse tree nodes (they are needed
+                       for pretty-printing and transforming trees, but the
+                       type checker does not use them)
+      snapshot:        Type checked stub modules to use instead of
+                       processing their source files (None if no snapshot
+                       is used)
+      extend_snapshot: Add type checked modules to the snapshot?
+      main_module:     Id of the main module
+      stats:           Record the times of build passes here (None if not
+                       recorded)
+      modules_with_errors:
+                       Ids of modules with errors, in the order the errors
+                       were found (only when continuing after errors)
+      skipped_modules: Map from module id to the reason why the module was
+                       not processed (only when continuing after errors)
 
     TODO Refactor code related to transformation, icode generation etc. to
          external objects.  This module should not directly depend on them.
@@ -288,25 +442,64 @@ class BuildManager:
                  output_dir: str,
                  pyversion: int,
                  flags: List[str],
-                 ignore_prefix: str) -> None:
+                 ignore_prefix: str,
+                 cache_dir: str = None,
+                 jobs: int = 1,
+                 snapshot_path: str = None,
+                 snapshot: StubSnapshot = None,
+                 stats: BuildStats = None,
+                 reporter: ErrorReporter = None,
+                 optimizations: List[str] = None) -> None:
         self.data_dir = data_dir
         self.errors = Errors()
+        self.errors.reporter = reporter
         self.errors.set_ignore_prefix(ignore_prefix)
         self.lib_path = lib_path
         self.target = target
         self.output_dir = output_dir
         self.pyversion = pyversion
         self.flags = flags
+        self.jobs = jobs
+        # Callers may pretty-print the trees of a semantic analysis build.
+        self.preserve_repr = target != TYPE_CHECK
         self.semantic_analyzer = SemanticAnalyzer(lib_path, self.errors)
         self.semantic_analyzer_pass3 = ThirdPass(self.errors)
         self.type_checker = TypeChecker(self.errors,
                                         self.semantic_analyzer.modules,
                                         self.pyversion)
         self.states = List[State]()
+        self.state_index = Dict[str, int]()
+        self.module_index = Dict[str, int]()
         self.module_files = Dict[str, str]()
         self.icode = Dict[str, FuncIcode]()
+        if optimizations is None:
+            optimizations = OPTIMIZATIONS
+        self.optimizations = optimizations
         self.binary_path = None # type: str
-        self.module_deps = Dict[Tuple[str, str], bool]()
+        self.source_hashes = Dict[str, str]()
+        self.cache_keys = Dict[str, str]()
+        self.cache = None # type: BuildCache
+        if INCREMENTAL in flags and target == TYPE_CHECK:
+            # Cached modules are not type checked, and thus they have no
+            # entries in the type map. Only targets that do not need the type
+            # map after type checking can use the cache.
+            options = '{} {}'.format(pyversion, os.pathsep.join(lib_path))
+            self.cache = BuildCache(cache_dir or DEFAULT_CACHE_DIR, options)
+        self.snapshot = None # type: StubSnapshot
+        self.extend_snapshot = False
+        if snapshot and target == TYPE_CHECK:
+            self.snapshot = snapshot
+            self.extend_snapshot = True
+            self.remove_invalid_snapshot_modules()
+        elif snapshot_path and target == TYPE_CHECK:
+            self.snapshot = self.load_snapshot(snapshot_path)
+        self.main_module = None # type: str
+        self.stats = stats
+        self.modules_with_errors = List[str]()
+        self.skipped_modules = Dict[str, str]()
+        self.prefetcher = None # type: ModulePrefetcher
+        if jobs > 1:
+            self.prefetcher = ModulePrefetcher(self, jobs)
     
     def process(self, initial_state: 'UnprocessedFile') -> BuildResult:
         """Perform a build.
@@ -316,34 +509,67 @@ class BuildManager:
         manager object.  The return values are identical to the return
         values of the build function.
         """
-        self.states.append(initial_state)
+        self.main_module = initial_state.id
+        self.add_state(initial_state)
         
-        # Process states in a loop until all files (states) have been
-        # semantically analyzed or type checked (depending on target).
+        # Parse all files reachable from the initial file via imports. Files
+        # are parsed in the order they are encountered; this also guarantees
+        # that packages are parsed before the modules they contain.
+        try:
+            i = 0
+            while i < len(self.states):
+                # Modules taken from the stub snapshot are already processed.
+                state = self.states[i]
+                if state.state() == UNPROCESSED_STATE:
+                    reason = self.skip_reason(state)
+                    if reason:
+                        self.skipped_modules[state.id] = reason
+                    else:
+                        self.process_state(state)
+                i += 1
+        finally:
+            if self.prefetcher:
+                # Worker threads must not be running when we fork worker
+                # processes for type checking.
+                self.prefetcher.shutdown()
+        
+        # Process the strongly connected components of the import graph
+        # (sets of modules that import each other, directly or indirectly) as
+        # units, dependencies first. The remaining passes of each module in a
+        # component are performed in lock step, which breaks import cycles.
         #
         # We type check all files before the rest of the passes so that we can
         # report errors and fail as quickly as possible.
-        while True:
-            # Find the next state that has all its dependencies met.
-            next = self.next_available_state()
-            if not next:
-                trace('done')
-                break
-            
-            # Potentially output some debug information.
-            trace('next {} ({})'.format(next.path, next.state()))
-            
-            # Set the import context for reporting error messages correctly.
-            self.errors.set_import_context(next.import_context)
-            # Process the state. The process method is reponsible for adding a
-            # new state object representing the new state of the file.
-            next.process()
+        components = self.sorted_components()
+        if (self.jobs > 1 and self.target == TYPE_CHECK and
+                hasattr(os, 'fork') and CONTINUE_ON_ERRORS not in self.flags):
+            self.process_components_in_parallel(components)
+        else:
+            for component in components:
+                self.process_component(component)
+        trace('done')
+        
+        if self.cache:
+            self.log('cache: {} hits, {} misses'.format(self.cache.hits,
+                                                        self.cache.misses))
+        self.log('find_module: {} directories listed, {} stat calls '
+                 'avoided'.format(find_module_stats['listdir'],
+                                  find_module_stats['stat_calls_avoided']))
+        for name, stats in [('subtype', subtype_cache_stats),
+                            ('join', join_cache_stats),
+                            ('meet', meet_cache_stats)]:
+            self.log('{} cache: {} hits, {} misses'.format(
+                name, stats['hits'], stats['misses']))
+        self.log('operations: {}'.format(', '.join(
+            '{} {}'.format(count, name)
+            for name, count in sorted(counters.items()))))
         
-            # Raise exception if the build failed. The build can fail for
-            # various reasons, such as parse error, semantic analysis error,
-            # etc.
-            if self.errors.is_errors():
-                self.errors.raise_error()
+        if self.errors.is_errors():
+            # We continued after errors; report all of them.
+            self.errors.flush()
+            summary = self.error_summary()
+            raise CompileError(self.errors.messages() + summary, summary,
+                               reported=self.errors.reporter is not None)
         
         # If there were no errors, all files should have been fully processed.
         for s in self.states:
@@ -362,18 +588,440 @@ class BuildManager:
                            self.type_checker.type_map,
                            self.icode, self.binary_path)
     
-    def next_available_state(self) -> 'State':
-        """Find a ready state (one that has all its dependencies met)."""
-        i = len(self.states) - 1
-        while i >= 0:
-            if self.states[i].is_ready():
-                num_incomplete = self.states[i].num_incomplete_deps()
-                if num_incomplete == 0:
-                    # This is perfect; no need to look for the best match.
-                    return self.states[i]
-            i -= 1
+    def process_state(self, state: 'State') -> None:
+        """Advance a single file to the next state.
+
+        Raise CompileError if there were errors, unless continuing after
+        errors. In that case, record the module as having errors, or as
+        skipped if it could not be parsed.
+        """
+        if CONTINUE_ON_ERRORS in self.flags:
+            self.process_state_continuing_after_errors(state)
+            return
+        
+        self.advance_state(state)
+        
+        # Raise exception if the build failed. The build can fail for
+        # various reasons, such as parse error, semantic analysis error,
+        # etc.
+        if self.errors.is_errors():
+            self.errors.raise_error()
+    
+    def process_state_continuing_after_errors(self, state: 'State') -> None:
+        num_errors = self.errors.num_messages()
+        try:
+            self.advance_state(state)
+        except CompileError:
+            # Parse error; there is no tree to process.
+            self.skipped_modules[state.id] = 'parse errors'
+        if (self.errors.num_messages() != num_errors and
+                state.id not in self.modules_with_errors):
+            self.modules_with_errors.append(state.id)
+        if (state.state() == SEMANTICALLY_ANALYSED_STATE and
+                state.id in self.modules_with_errors):
+            # Dependents use Any as the types of variables whose types
+            # could not be inferred, instead of reporting errors about
+            # them.
+            tree = cast(ParsedFile, state).tree
+            for name, typ in module_var_types(tree):
+                if typ is None:
+                    lookup_var(tree, name).is_ready = True
+    
+    def skip_reason(self, state: 'State') -> str:
+        """Return the reason why a file cannot be processed because of
+        errors in other modules, or None if it can be processed."""
+        if CONTINUE_ON_ERRORS not in self.flags:
+            return None
+        for dep in state.dependencies:
+            if dep in self.skipped_modules:
+                return 'depends on {}'.format(dep)
+            elif not self.has_module(dep):
+                return '{} not found'.format(dep)
         return None
     
+    def error_summary(self) -> List[str]:
+        """Describe the modules with errors and the skipped modules of a
+        build that continued after errors."""
+        summary = List[str]()
+        checked = [id for id in self.modules_with_errors
+                   if id not in self.skipped_modules]
+        if checked:
+            summary.append('Type checked despite errors: {}'.format(
+                ', '.join(checked)))
+        skipped = List[str]()
+        for state in self.states:
+            if state.id in self.skipped_modules:
+                skipped.append('{} ({})'.format(
+                    state.id, self.skipped_modules[state.id]))
+        if skipped:
+            summary.append('Not type checked because of errors: {}'.format(
+                ', '.join(skipped)))
+        return summary
+    
+    def advance_state(self, state: 'State') -> None:
+        """Advance a single file to the next state, collecting any errors."""
+        # Potentially output some debug information.
+        trace('next {} ({})'.format(state.path, state.state()))
+        
+        # Set the import context for reporting error messages correctly.
+        self.errors.set_import_context(state.import_context)
+        # Process the state. The process method is reponsible for adding a
+        # new state object representing the new state of the file.
+        pass_name = pass_names.get(state.state())
+        if self.stats and pass_name:
+            t0 = time.time()
+            try:
+                state.process()
+            finally:
+                self.stats.record(pass_name, state.id, t0)
+        else:
+            state.process()
+    
+    def process_component(self, component: List[str]) -> None:
+        """Advance all the modules in a component to the final state.
+
+        Each pass is performed for every module in the component before
+        moving on to the next pass. All the dependencies of the component
+        outside it must have been processed already.
+        """
+        for id in component:
+            if id in self.skipped_modules:
+                reason = 'depends on {}'.format(id)
+            else:
+                reason = self.skip_reason(self.lookup_state(id))
+            if reason:
+                # Skip the entire component.
+                for other in component:
+                    self.skipped_modules.setdefault(other, reason)
+                return
+        if self.cache:
+            self.update_cache_keys(component)
+        while True:
+            state = self.lookup_state(component[0])
+            if state.state() == final_state:
+                break
+            for id in component:
+                self.process_state(self.lookup_state(id))
+    
+    def process_components_in_parallel(self,
+                                       components: List[List[str]]) -> None:
+        """Process components, type checking them in worker processes.
+
+        Semantically analyze all the components in this process first.
+        Then type check the components in worker processes, each forked to
+        check a batch of components whose dependencies have all been type
+        checked. The types of variables inferred by a worker are sent back
+        and stored in the symbol tables of this process, so that subsequent
+        workers see them. If a worker fails, raise RuntimeError with the
+        traceback of the failure.
+        
+        Report exactly the same errors as process_component would when
+        processing the components in order: the errors of the first failing
+        step.
+        """
+        # Semantic analysis does not depend on the results of type checking.
+        # Stop at the first component with errors, but hold the errors back
+        # until we know whether an earlier component has type errors.
+        # Modules taken from the stub snapshot need no processing, but the
+        # cache keys of the modules that depend on them refer to their keys.
+        remaining = List[List[str]]()
+        for component in components:
+            if self.lookup_state(component[0]).state() == final_state:
+                if self.cache:
+                    self.update_cache_keys(component)
+            else:
+                remaining.append(component)
+        components = remaining
+        semanal_errors = None # type: List[ErrorInfo]
+        for i, component in enumerate(components):
+            if not self.analyze_component(component):
+                semanal_errors = self.errors.error_info
+                self.errors.error_info = []
+                components = components[:i]
+                break
+        
+        check_errors = self.type_check_in_parallel(components)
+        if check_errors or semanal_errors:
+            self.errors.error_info = check_errors or semanal_errors
+            self.errors.raise_error()
+    
+    def analyze_component(self, component: List[str]) -> bool:
+        """Perform the remaining semantic analysis passes for a component.
+
+        Return False if there were errors.
+        """
+        if self.cache:
+            self.update_cache_keys(component)
+        for state_id in [PARSED_STATE, PARTIAL_SEMANTIC_ANALYSIS_STATE]:
+            for id in component:
+                state = self.lookup_state(id)
+                assert state.state() == state_id
+                self.advance_state(state)
+                if self.errors.is_errors():
+                    return False
+        return True
+    
+    def type_check_in_parallel(self,
+                               components: List[List[str]]) -> List[ErrorInfo]:
+        """Type check semantically analyzed components in worker processes.
+
+        Run at most self.jobs workers at a time. Each worker type checks a
+        batch of components that are ready, i.e. not waiting for other
+        components. Return the errors of the first component (in the given
+        order) that has errors, or None.
+        """
+        self.log('type checking {} components using {} processes'.format(
+            len(components), self.jobs))
+        component_index = Dict[str, int]()
+        for i, component in enumerate(components):
+            for id in component:
+                component_index[id] = i
+        # Number of components each component is waiting for, and reverse
+        # dependencies.
+        num_waiting = List[int]()
+        dependents = List[List[int]]()
+        for i, component in enumerate(components):
+            deps = Set[int]()
+            for id in component:
+                for dep in self.lookup_state(id).dependencies:
+                    # Modules not in any component are type checked already.
+                    if dep in component_index:
+                        deps.add(component_index[dep])
+            deps.discard(i)
+            num_waiting.append(len(deps))
+            dependents.append([])
+            for j in sorted(deps):
+                dependents[j].append(i)
+        ready = List[int]()
+        for i in range(len(components)):
+            if num_waiting[i] == 0:
+                ready.append(i)
+        
+        context = multiprocessing.get_context('fork')
+        # Map from connection to (worker process, indexes of its components)
+        running = Dict[Any, Tuple[Any, List[int]]]()
+        first_failure = len(components)
+        failure_errors = None # type: List[ErrorInfo]
+        while ready or running:
+            while ready and len(running) < self.jobs:
+                # Divide the ready components evenly between idle workers.
+                batch_size = -(-len(ready) // (self.jobs - len(running)))
+                batch = List[int]()
+                while ready and len(batch) < batch_size:
+                    i = heapq.heappop(ready)
+                    # Errors of later components would not be reported.
+                    if i < first_failure:
+                        batch.append(i)
+                if not batch:
+                    break
+                receiver, sender = context.Pipe(duplex=False)
+                worker = context.Process(
+                    target=self.type_check_worker,
+                    args=([components[i] for i in batch], batch, sender))
+                worker.start()
+                sender.close()
+                running[receiver] = (worker, batch)
+            for receiver in multiprocessing.connection.wait(list(running)):
+                try:
+                    message = receiver.recv() # type: Any
+                except EOFError:
+                    message = None
+                receiver.close()
+                worker, batch = running.pop(receiver)
+                worker.join()
+                if message is None or message[0] == 'error':
+                    for other, other_batch in running.values():
+                        other.terminate()
+                        other.join()
+                    raise RuntimeError(self.worker_failure_message(
+                        message, worker.exitcode,
+                        [components[i] for i in batch]))
+                _, results, events, counts = message
+                if self.stats:
+                    self.stats.events.extend(events)
+                for name, count in counts.items():
+                    counters[name] += count
+                for i, types, errors in results:
+                    self.store_worker_results(types)
+                    if errors:
+                        if i < first_failure:
+                            first_failure = i
+                            failure_errors = errors
+                    else:
+                        for dependent in dependents[i]:
+                            num_waiting[dependent] -= 1
+                            if num_waiting[dependent] == 0:
+                                heapq.heappush(ready, dependent)
+        return failure_errors
+    
+    def type_check_worker(self, components: List[List[str]],
+                          indexes: List[int], sender: Any) -> None:
+        """Type check components in a worker process.
+
+        Send back tuple ('ok', results, events, counts), where results is a
+        list of tuples (component index, variable types of each successfully
+        type checked module, errors), events are the timings of the passes
+        performed by the worker (see BuildStats) and counts are the numbers
+        of operations performed by the worker. Stop type checking a
+        component at the first module with errors.
+
+        If type checking a module fails with an exception, send back tuple
+        ('error', module id, component, traceback) instead.
+        """
+        first_event = len(self.stats.events) if self.stats else 0
+        initial_counters = counters.copy()
+        # The errors are reported by the parent process.
+        self.errors.reporter = None
+        results = List[Tuple[int, List[Tuple[str, bytes]],
+                             List[ErrorInfo]]]()
+        for component, index in zip(components, indexes):
+            types = List[Tuple[str, bytes]]()
+            for id in component:
+                try:
+                    state = self.lookup_state(id)
+                    self.advance_state(state)
+                    if self.errors.is_errors():
+                        break
+                    tree = cast(ParsedFile, state).tree
+                    types.append((id, dump_types(module_var_types(tree))))
+                except Exception:
+                    sender.send(('error', id, component,
+                                 traceback.format_exc()))
+                    sender.close()
+                    return
+            results.append((index, types, self.errors.error_info))
+            self.errors.error_info = []
+        events = self.stats.events[first_event:] if self.stats else []
+        counts = Dict[str, int]()
+        for name, count in counters.items():
+            counts[name] = count - initial_counters[name]
+        sender.send(('ok', results, events, counts))
+        sender.close()
+    
+    def worker_failure_message(self, message: Any,
+                               exit_status: int,
+                               components: List[List[str]]) -> str:
+        """Describe the failure of a type checking worker.
+
+        The message is the tuple sent by the worker (see type_check_worker),
+        or None if the worker exited without sending one.
+        """
+        if message is None:
+            ids = List[str]()
+            for component in components:
+                ids.extend(component)
+            return ('Internal error: type checking worker exited with '
+                    'status {} while checking modules {}'.format(
+                        exit_status, ', '.join(ids)))
+        _, id, component, tb = message
+        return ('Internal error: type checking module {} (strongly connected '
+                'component {}) failed in a worker process:\n{}'.format(
+                    id, ', '.join(component), tb))
+    
+    def store_worker_results(self, types: List[Tuple[str, bytes]]) -> None:
+        """Store the variable types of modules type checked by a worker."""
+        modules = self.semantic_analyzer.modules
+        for id, data in types:
+            restore_var_types(modules[id], load_types(data, modules))
+            state = cast(ParsedFile, self.lookup_state(id))
+            self.replace_state(TypeCheckedFile(state.info(), state.tree))
+            if self.extend_snapshot:
+                self.add_to_snapshot(state)
+    
+    def load_snapshot(self, path: str) -> StubSnapshot:
+        """Load a stub snapshot, or return None if it cannot be used."""
+        snapshot = load_snapshot(path, self.pyversion)
+        if snapshot:
+            for id in snapshot.modules:
+                module_path = find_module(id, self.lib_path)
+                if (module_path is None or
+                        os.path.abspath(module_path) != snapshot.paths[id]):
+                    snapshot = None
+                    break
+        if snapshot:
+            self.log('using stub snapshot {} ({} modules)'.format(
+                path, len(snapshot.modules)))
+        else:
+            self.log('stub snapshot {} is not valid; ignored'.format(path))
+        return snapshot
+    
+    def remove_invalid_snapshot_modules(self) -> None:
+        """Remove the modules that cannot be used from the snapshot.
+
+        Remove modules whose sources have changed and modules that would be
+        found in a different file during the build, together with the
+        modules that depend on them.
+        """
+        invalid = self.snapshot.stale_modules()
+        for id, path in self.snapshot.paths.items():
+            module_path = find_module(id, self.lib_path)
+            if module_path is None or os.path.abspath(module_path) != path:
+                invalid.append(id)
+        removed = self.snapshot.remove_modules(invalid)
+        self.log('snapshot: {} modules, {} removed'.format(
+            len(self.snapshot.modules), len(removed)))
+    
+    def add_to_snapshot(self, state: 'ParsedFile') -> None:
+        """Add a type checked module to the snapshot (unless it is the main
+        module)."""
+        if state.id != self.main_module:
+            self.snapshot.add(state.id, state.tree,
+                              self.source_hashes[state.id], state.path,
+                              list(state.dependencies))
+    
+    def add_snapshot_module(self, id: str,
+                            import_context: List[Tuple[str, int]]) -> None:
+        """Add a module and the modules it imports from the stub snapshot.
+
+        These modules have been type checked already, so their states are
+        final.
+        """
+        tree = self.snapshot.modules[id]
+        path = find_module(id, self.lib_path)
+        self.semantic_analyzer.modules[id] = tree
+        self.module_files[id] = path
+        if self.cache:
+            self.source_hashes[id] = self.snapshot.hashes[id]
+        state = TypeCheckedFile(StateInfo(path, id, import_context, self),
+                                tree)
+        state.dependencies.extend(super_packages(id))
+        self.add_state(state)
+        for dep in state.dependencies:
+            if not self.has_module(dep) and dep in self.snapshot.modules:
+                self.add_snapshot_module(dep, import_context)
+    
+    def sorted_components(self) -> List[List[str]]:
+        """Return the strongly connected components of the import graph.
+
+        Each component comes after all the components it depends on. Within
+        a component, modules are ordered so that the most recently
+        encountered module comes first.
+        """
+        vertices = [state.id for state in self.states]
+        edges = Dict[str, List[str]]()
+        for state in self.states:
+            edges[state.id] = [dep for dep in state.dependencies
+                               if dep in self.module_index]
+        components = strongly_connected_components(vertices, edges)
+        result = List[List[str]]()
+        for component in components:
+            result.append(sorted(component,
+                                 key=lambda id: -self.module_index[id]))
+        return result
+    
+    def add_state(self, state: 'State') -> None:
+        """Add the state of a file that was not seen before."""
+        self.state_index[state.path] = len(self.states)
+        self.module_index[state.id] = len(self.states)
+        self.states.append(state)
+    
+    def replace_state(self, state: 'State') -> None:
+        """Replace the state of a file with a new state object."""
+        index = self.state_index.get(state.path)
+        if index is None:
+            raise RuntimeError('State for {} not found'.format(state.path))
+        self.states[index] = state
+    
     def has_module(self, name: str) -> bool:
         """Have we seen a module yet?"""
         return name in self.module_files
@@ -386,10 +1034,10 @@ class BuildManager:
 
         This function does not consider any dependencies.
         """
-        for s in self.states:
-            if s.path == path:
-                return s.state()
-        return UNSEEN_STATE
+        index = self.state_index.get(path)
+        if index is None:
+            return UNSEEN_STATE
+        return self.states[index].state()
     
     def module_state(self, name: str) -> int:
         """Return the state of a module.
@@ -407,38 +1055,33 @@ class BuildManager:
             state = fs
         return state
 
-    def is_dep(self, m1: str, m2: str, done: Set[str] = None) -> bool:
-        """Does m1 import m2 directly or indirectly?"""
-        # Have we computed this previously?
-        dep = self.module_deps.get((m1, m2))
-        if dep is not None:
-            return dep
-        
-        if not done:
-            done = set([m1])
-            
-        # m1 depends on m2 iff one of the deps of m1 depends on m2.
-        st = self.lookup_state(m1)
-        for m in st.dependencies:
-            if m in done:
-                continue
-            done.add(m)
-            # Cache this dependency.
-            self.module_deps[m1, m] = True
-            # Search recursively.
-            if m == m2 or self.is_dep(m, m2, done):
-                # Yes! Mark it in the cache.
-                self.module_deps[m1, m2] = True
-                return True
-        # No dependency. Mark it in the cache.
-        self.module_deps[m1, m2] = False
-        return False
-
     def lookup_state(self, module: str) -> 'State':
-        for state in self.states:
-            if state.id == module:
-                return state
-        raise RuntimeError('%s not found' % str)
+        index = self.module_index.get(module)
+        if index is None:
+            raise RuntimeError('%s not found' % module)
+        return self.states[index]
+    
+    def update_cache_keys(self, component: List[str]) -> None:
+        """Compute the keys for looking up cached results of modules.
+
+        The key of a module describes the sources of all the modules in its
+        component and, via their keys, of all the modules that the component
+        depends on. The keys of all the dependencies must have been computed
+        already.
+        """
+        key = hashlib.md5()
+        deps = Set[str]()
+        for id in sorted(component):
+            state = self.lookup_state(id)
+            key.update('{} {} {}\n'.format(id, state.path,
+                                           self.source_hashes[id]).encode(
+                                               'utf-8'))
+            deps.update(set(state.dependencies))
+        for dep in sorted(deps.difference(set(component))):
+            key.update('{} {}\n'.format(dep,
+                                        self.cache_keys[dep]).encode('utf-8'))
+        for id in component:
+            self.cache_keys[id] = key.hexdigest()
     
     def all_imported_modules_in_file(self,
                                      file: MypyFile) -> List[Tuple[str, int]]:
@@ -479,6 +1122,7 @@ class BuildManager:
         elif self.target == C:
             self.transform(files)
             self.generate_icode(files, types)
+            self.optimize_icode()
             self.generate_c_and_compile(files)
         elif self.target in [SEMANTIC_ANALYSIS, TYPE_CHECK]:
             pass # Nothing to do.
@@ -503,11 +1147,14 @@ class BuildManager:
                 # transformed.
                 continue
             # Transform parse tree and produce pretty-printed output.
+            t0 = time.time()
             v = transform.DyncheckTransformVisitor(
                 self.type_checker.type_map,
                 self.semantic_analyzer.modules,
                 is_pretty=True)
             f.accept(v)
+            if self.stats:
+                self.stats.record('transform', f.fullname(), t0)
 
     def generate_icode(self, files: List[MypyFile],
                        types: Dict[Node, Type]) -> None:
@@ -515,14 +1162,36 @@ class BuildManager:
         for f in files:
             # TODO remove ugly builtins hack
             if not f.path.endswith('/builtins.py'):
+                t0 = time.time()
                 f.accept(builder)
+                if self.stats:
+                    self.stats.record('icode', f.fullname(), t0)
         self.icode = builder.generated
 
+    def optimize_icode(self) -> None:
+        t0 = time.time()
+        passes = [name for name in self.optimizations
+                  if name in icodeopt.PASSES]
+        for func in self.icode.values():
+            icodeopt.optimize(func, passes)
+        if self.stats:
+            self.stats.record('icode optimization', self.main_module, t0)
+
     def generate_c_and_compile(self, files: List[MypyFile]) -> None:
-        gen = cgen.CGenerator()
+        t0 = time.time()
+        subclasses = None # type: Dict[TypeInfo, List[TypeInfo]]
+        if DEVIRTUALIZATION in self.optimizations:
+            # Derive the class hierarchy from the files being compiled, as
+            # the TypeInfos of library modules may be shared between builds.
+            subclasses = cgen.class_hierarchy(files)
+        gen = cgen.CGenerator(
+            allocate_registers=REGISTER_ALLOCATION in self.optimizations,
+            subclasses=subclasses)
         
         for fn, icode in self.icode.items():
             gen.generate_function('M' + fn, icode)
+        if self.stats:
+            self.stats.record('cgen', self.main_module, t0)
 
         program_name = os.path.splitext(basename(files[0].path))[0]
         c_file = '%s.c' % program_name
@@ -542,9 +1211,13 @@ class BuildManager:
             cmdline = [cc] + cflags +['-I%s' % vm_dir,
                                       '-o%s' % program_name,
                                       c_file,
-                                      os.path.join(vm_dir, 'runtime.c')]
+                                      os.path.join(vm_dir, 'runtime.c'),
+                                      os.path.join(vm_dir, 'gc.c')]
             self.log(' '.join(cmdline))
+            t0 = time.time()
             status = subprocess.call(cmdline)
+            if self.stats:
+                self.stats.record('C compile', self.main_module, t0)
             # TODO check status
             self.log('removing %s' % c_file)
             os.remove(c_file)
@@ -638,21 +1311,6 @@ class State:
     def process(self) -> None:
         raise RuntimeError('Not implemented')
     
-    def is_ready(self) -> bool:
-        """Return True if all dependencies are at least in the same state
-        as this object (but not in the initial state).
-        """
-        for module in self.dependencies:
-            state = self.manager.module_state(module)
-            if earlier_state(state,
-                             self.state()) or state == UNPROCESSED_STATE:
-                return False
-        return True
-
-    def num_incomplete_deps(self) -> int:
-        """Return the number of dependencies that are ready but incomplete."""
-        return 0 # Does not matter in this state
-    
     def state(self) -> int:
         raise RuntimeError('Not implemented')
     
@@ -661,11 +1319,7 @@ class State:
 
         Also notify the manager.
         """
-        for i in range(len(self.manager.states)):
-            if self.manager.states[i].path == state_object.path:
-                self.manager.states[i] = state_object
-                return 
-        raise RuntimeError('State for {} not found'.format(state_object.path))
+        self.manager.replace_state(state_object)
     
     def errors(self) -> Errors:
         return self.manager.errors
@@ -686,10 +1340,21 @@ class State:
 
 
 class UnprocessedFile(State):
-    def __init__(self, info: StateInfo, program_text: str) -> None:
+    def __init__(self, info: StateInfo, program_text: str,
+                 tree: MypyFile = None,
+                 parse_errors: List[ErrorInfo] = None) -> None:
+        """Construct a state for a file that has not been parsed.
+
+        If the file has already been parsed by the module prefetcher, the
+        tree and the parse errors are given as arguments.
+        """
         super().__init__(info)
         self.program_text = program_text
+        self.prefetched_tree = tree
+        self.prefetched_errors = parse_errors
         trace('waiting {}'.format(info.path))
+        if self.manager.cache or self.manager.extend_snapshot:
+            self.manager.source_hashes[self.id] = source_hash(program_text)
         
         # Add surrounding package(s) as dependencies.
         for p in super_packages(self.id):
@@ -701,7 +1366,10 @@ class UnprocessedFile(State):
     
     def process(self) -> None:
         """Parse the file, store global names and advance to the next state."""
+        t0 = time.time()
         tree = self.parse(self.program_text, self.path)
+        if self.manager.stats:
+            self.manager.stats.record('parse', self.id, t0)
 
         # Store the parsed module in the shared module symbol table.
         self.manager.semantic_analyzer.modules[self.id] = tree
@@ -714,6 +1382,13 @@ class UnprocessedFile(State):
             sem_anal.modules[p].names[c[-1]] = SymbolTableNode(
                 MODULE_REF, tree, p)
         
+        imported = self.manager.all_imported_modules_in_file(tree)
+        if self.manager.prefetcher:
+            # Start reading and parsing the imported modules in the
+            # background.
+            self.manager.prefetcher.prefetch(
+                ['builtins'] + [id for id, line in imported])
+        
         if self.id != 'builtins':
             # The builtins module is imported implicitly in every program (it
             # contains definitions of int, print etc.).
@@ -723,7 +1398,7 @@ class UnprocessedFile(State):
 
         # Add all directly imported modules to be processed (however they are
         # not processed yet, just waiting to be processed).
-        for id, line in self.manager.all_imported_modules_in_file(tree):
+        for id, line in imported:
             self.errors().push_import_context(self.path, line)
             try:
                 res = self.import_module(id)
@@ -734,8 +1409,11 @@ class UnprocessedFile(State):
 
         # Do the first pass of semantic analysis: add top-level definitions in
         # the file to the symbol table.
+        t0 = time.time()
         first = FirstPass(self.semantic_analyzer())
         first.analyze(tree, self.path, self.id)
+        if self.manager.stats:
+            self.manager.stats.record('semanal pass 1', self.id, t0)
         # Initialize module symbol table, which was populated by the semantic
         # analyzer.
         tree.names = self.semantic_analyzer().globals
@@ -753,11 +1431,24 @@ class UnprocessedFile(State):
             # Do nothing:f already being compiled.
             return True
         
-        path, text = read_module_source_from_file(id, self.manager.lib_path)
+        snapshot = self.manager.snapshot
+        if snapshot and id in snapshot.modules:
+            self.manager.add_snapshot_module(id,
+                                             self.errors().import_context())
+            return True
+        
+        tree = None # type: MypyFile
+        parse_errors = None # type: List[ErrorInfo]
+        if self.manager.prefetcher:
+            path, text, tree, parse_errors = self.manager.prefetcher.result(id)
+        else:
+            path, text = read_module_source_from_file(id,
+                                                      self.manager.lib_path)
         if text is not None:
             info = StateInfo(path, id, self.errors().import_context(),
                              self.manager)
-            self.manager.states.append(UnprocessedFile(info, text))
+            self.manager.add_state(UnprocessedFile(info, text, tree,
+                                                   parse_errors))
             self.manager.module_files[id] = path
             return True
         else:
@@ -769,8 +1460,17 @@ class UnprocessedFile(State):
         Raise CompileError if there is a parse error.
         """
         num_errs = self.errors().num_messages()
-        tree = parse.parse(source_text, fnam, self.errors(),
-                           pyversion=self.manager.pyversion)
+        if self.prefetched_tree is not None:
+            # The file has already been parsed. Report any parse errors now,
+            # in the current import context.
+            tree = self.prefetched_tree
+            for info in self.prefetched_errors:
+                info.import_ctx = self.errors().import_context()
+                self.errors().add_error_info(info)
+        else:
+            tree = parse.parse(source_text, fnam, self.errors(),
+                               pyversion=self.manager.pyversion,
+                               preserve_repr=self.manager.preserve_repr)
         tree._fullname = self.id
         if self.errors().num_messages() != num_errs:
             self.errors().raise_error()
@@ -808,21 +1508,6 @@ class ParsedFile(State):
         self.switch_state(PartiallySemanticallyAnalyzedFile(self.info(),
                                                             self.tree))
         
-    def num_incomplete_deps(self) -> int:        
-        """Return the number of dependencies that are incomplete.
-
-        Here complete means that their state is *later* than this module.
-        Cyclic dependencies are omitted to break cycles forcibly (and somewhat
-        arbitrarily).
-        """
-        incomplete = 0
-        for module in self.dependencies:
-            state = self.manager.module_state(module)
-            if (not earlier_state(self.state(), state) and
-                    not self.manager.is_dep(module, self.id)):
-                incomplete += 1
-        return incomplete
-    
     def state(self) -> int:
         return PARSED_STATE
 
@@ -841,9 +1526,20 @@ class SemanticallyAnalyzedFile(ParsedFile):
     def process(self) -> None:
         """Type check file and advance to the next state."""
         if self.manager.target >= TYPE_CHECK:
-            self.type_checker().visit_file(self.tree, self.tree.path)
-        
-        # FIX remove from active state list to speed up processing
+            cache = self.manager.cache
+            key = self.manager.cache_keys.get(self.id)
+            if cache and cache.lookup(self.id, key,
+                                      self.semantic_analyzer().modules):
+                trace('cached {}'.format(self.path))
+            else:
+                self.type_checker().visit_file(self.tree, self.tree.path)
+                if cache and not self.errors().is_errors():
+                    cache.store(self.id, key, self.tree)
+            if self.manager.extend_snapshot and not self.errors().is_errors():
+                self.manager.add_to_snapshot(self)
+            # Report the errors of the module without waiting for the rest
+            # of the build.
+            self.errors().flush()
         
         self.switch_state(TypeCheckedFile(self.info(), self.tree))
     
@@ -856,10 +1552,6 @@ class TypeCheckedFile(SemanticallyAnalyzedFile):
         """Finished, so cannot process."""
         raise RuntimeError('Cannot process TypeCheckedFile')
     
-    def is_ready(self) -> bool:
-        """Finished, so cannot ever become ready."""
-        return False
-    
     def state(self) -> int:
         return TYPE_CHECKED_STATE
 
@@ -896,30 +1588,233 @@ def read_module_source_from_file(id: str,
         return None, None
 
 
+# Module lookups are cached during a build, since the same modules are looked
+# up repeatedly (e.g. for each 'from m import x' to check whether m.x is a
+# module). The caches assume that the files in the module search path do not
+# change during a build; clear_find_module_cache must be called before each
+# build. Modules are also looked up in the threads of ModulePrefetcher, so the
+# caches and statistics are only accessed while holding find_module_lock (but
+# files are checked and directories listed without holding it).
+
+# Map from (module id, search path) to the result of find_module and the
+# number of file existence checks performed to compute it.
+find_module_cache = Dict[Tuple[str, str], Tuple[str, int]]()
+
+# Map from directory path to the names of the entries in the directory (empty
+# if the directory cannot be listed).
+listdir_cache = Dict[str, Set[str]]()
+
+# Statistics: the number of directory listings, and the number of file
+# existence checks that were answered using the caches instead of stat calls.
+find_module_stats = {'listdir': 0,
+                     'stat_calls_avoided': 0} # type: Dict[str, int]
+
+find_module_lock = threading.Lock()
+
+
+def clear_find_module_cache() -> None:
+    with find_module_lock:
+        find_module_cache.clear()
+        listdir_cache.clear()
+        for key in find_module_stats:
+            find_module_stats[key] = 0
+
+
 def find_module(id: str, lib_path: List[str]) -> str:
     """Return the path of the module source file, or None if not found."""
+    key = (id, os.pathsep.join(lib_path))
+    with find_module_lock:
+        if key in find_module_cache:
+            path, num_checks = find_module_cache[key]
+            find_module_stats['stat_calls_avoided'] += num_checks
+            return path
+    checks = [0]
+    def isfile(path: str) -> bool:
+        checks[0] += 1
+        return file_exists(path)
+    result = None # type: str
+    comp = id.split('.')
     for pathitem in lib_path:
-        comp = id.split('.')
         path = os.path.join(pathitem, os.sep.join(comp[:-1]), comp[-1] + '.py')
-        text = ''
-        if not os.path.isfile(path):
+        if not isfile(path):
             path = os.path.join(pathitem, os.sep.join(comp), '__init__.py')
-        if os.path.isfile(path) and verify_module(id, path):
-            return path
-    return None
+        if isfile(path) and verify_module(id, path, isfile):
+            result = path
+            break
+    with find_module_lock:
+        find_module_cache[key] = (result, checks[0])
+    return result
 
 
-def verify_module(id: str, path: str) -> bool:
+def verify_module(id: str, path: str,
+                  isfile: Function[[str], bool] = os.path.isfile) -> bool:
     """Check that all packages containing id have a __init__ file."""
     if path.endswith('__init__.py'):
         path = dirname(path)
     for i in range(id.count('.')):
         path = dirname(path)
-        if not os.path.isfile(os.path.join(path, '__init__.py')):
+        if not isfile(os.path.join(path, '__init__.py')):
             return False
     return True
 
 
+def file_exists(path: str) -> bool:
+    """Does a file exist? Use a cached listing of the containing directory.
+
+    Unlike os.path.isfile, this is also true for directories.
+    """
+    dir, name = os.path.split(path)
+    with find_module_lock:
+        entries = listdir_cache.get(dir)
+        if entries is not None:
+            find_module_stats['stat_calls_avoided'] += 1
+            return name in entries
+    try:
+        entries = set(os.listdir(dir or os.curdir))
+    except OSError:
+        entries = set()
+    with find_module_lock:
+        listdir_cache[dir] = entries
+        find_module_stats['listdir'] += 1
+    return name in entries
+
+
+def strongly_connected_components(vertices: List[str],
+                                  edges: Dict[str, List[str]]
+                                  ) -> List[List[str]]:
+    """Compute the strongly connected components of a directed graph.
+
+    Use Tarjan's algorithm (without recursion, since import chains can be
+    long). Return the components in reverse topological order, i.e. each
+    component comes after all the components reachable from it. Vertices
+    and edges are visited in the given order, so the result is
+    deterministic.
+
+    Arguments:
+      vertices: all the vertices of the graph
+      edges:    map from each vertex to its successors
+    """
+    index = Dict[str, int]()
+    lowlink = Dict[str, int]()
+    stack = List[str]()
+    on_stack = Set[str]()
+    result = List[List[str]]()
+    for root in vertices:
+        if root in index:
+            continue
+        # Each work item is a vertex and the index of its next successor to
+        # visit.
+        work = [(root, 0)]
+        while work:
+            v, i = work.pop()
+            if i == 0:
+                index[v] = lowlink[v] = len(index)
+                stack.append(v)
+                on_stack.add(v)
+            successors = edges[v]
+            while i < len(successors):
+                w = successors[i]
+                i += 1
+                if w not in index:
+                    # Visit w before continuing with the rest of v.
+                    work.append((v, i))
+                    work.append((w, 0))
+                    break
+                elif w in on_stack:
+                    lowlink[v] = min(lowlink[v], index[w])
+            else:
+                # All successors of v have been visited.
+                if lowlink[v] == index[v]:
+                    component = List[str]()
+                    while True:
+                        w = stack.pop()
+                        on_stack.remove(w)
+                        component.append(w)
+                        if w == v:
+                            break
+                    result.append(component)
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[v])
+    return result
+
+
+class ModulePrefetcher:
+    """Read and parse the source files of modules in background threads.
+
+    Imported modules are requested when the importing module is parsed, and
+    the imports of each prefetched module are requested in turn, so reading
+    files (which can be slow, e.g. on network file systems) and parsing
+    overlap with the rest of the build.
+
+    Each module is parsed using a separate Errors object. The errors are
+    reported by the build manager when it processes the module, so that
+    they are reported exactly as in a build without prefetching.
+    """
+    
+    def __init__(self, manager: BuildManager, num_threads: int) -> None:
+        self.manager = manager
+        self.executor = concurrent.futures.ThreadPoolExecutor(num_threads)
+        # Map from module id to a future of the result of load.
+        self.futures = Dict[str, Any]()
+        self.lock = threading.Lock()
+        self.closed = False
+    
+    def prefetch(self, ids: List[str]) -> None:
+        """Start loading modules (and their surrounding packages).
+
+        Do nothing for modules that have already been requested.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            snapshot = self.manager.snapshot
+            for id in ids:
+                for p in super_packages(id) + [id]:
+                    if snapshot and p in snapshot.modules:
+                        # Taken from the stub snapshot; no need to parse.
+                        continue
+                    if p not in self.futures:
+                        self.futures[p] = self.executor.submit(self.load, p)
+    
+    def result(self, id: str) -> Tuple[str, str, MypyFile, List[ErrorInfo]]:
+        """Return the path, source, tree and parse errors of a module.
+
+        Wait until the module has been loaded, and load it now if it was not
+        requested. Return (None, None, None, None) if the module could not
+        be found or read.
+        """
+        self.prefetch([id])
+        with self.lock:
+            future = self.futures.get(id)
+        if future is None:
+            return self.load(id)
+        return future.result()
+    
+    def load(self, id: str) -> Tuple[str, str, MypyFile, List[ErrorInfo]]:
+        path, text = read_module_source_from_file(id, self.manager.lib_path)
+        if text is None:
+            return None, None, None, None
+        errors = Errors()
+        errors.ignore_prefix = self.manager.errors.ignore_prefix
+        tree = parse.parse(text, path, errors,
+                           pyversion=self.manager.pyversion,
+                           preserve_repr=self.manager.preserve_repr)
+        if not errors.is_errors():
+            self.prefetch(['builtins'] +
+                          [imp for imp, line in
+                           self.manager.all_imported_modules_in_file(tree)])
+        return path, text, tree, errors.error_info
+    
+    def shutdown(self) -> None:
+        """Cancel pending requests and wait for the threads to exit."""
+        with self.lock:
+            self.closed = True
+            for future in self.futures.values():
+                future.cancel()
+        self.executor.shutdown()
+
+
 def super_packages(id: str) -> List[str]:
     """Return the surrounding packages of a module, e.g. ['os'] for os.path."""
     c = id.split('.')
@@ -0,0 +1,279 @@
+"""Persistent cache of per-module type checking results.
+
+Incremental builds (build flag INCREMENTAL) use the cache to avoid type
+checking modules that have not changed since they were last successfully
+type checked. A module is considered unchanged if its source file and the
+source files of all modules it depends on (directly or indirectly) are
+identical to those seen when the cache entry was written.
+
+Parsing and semantic analysis are still performed for all modules, since
+symbol tables refer to each other across module boundaries. The results of
+type checking that other modules depend on, i.e. the types of the variables
+and decorated functions defined in the module (many of them inferred), are
+stored in the cache and restored instead of running the type checker.
+
+Each module has a separate cache file that contains a pickled dictionary.
+References from types to TypeInfo objects are stored by fully qualified name
+and resolved against the symbol tables of the current build when loading.
+Entries written by a different version of mypy (see implementation_hash)
+are ignored, as are cache files that cannot be read.
+"""
+
+import hashlib
+import io
+import os
+import os.path
+import pickle
+
+from typing import Dict, List, Tuple, Any, cast
+
+from mypy.nodes import (
+    MypyFile, SymbolTable, SymbolNode, TypeInfo, Var, Decorator
+)
+from mypy.types import Type
+
+
+# Increment this when the format of cache files changes.
+CACHE_VERSION = 1
+
+# Hash of the mypy implementation (see implementation_hash)
+_implementation_hash = None # type: str
+
+
+def source_hash(text: str) -> str:
+    """Return a hash of the contents of a source file."""
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+def implementation_hash() -> str:
+    """Return a hash of the source files of the mypy package.
+
+    Type checking results depend on the implementation of mypy, so cache
+    entries written by a modified mypy must not be used.
+    """
+    global _implementation_hash
+    if _implementation_hash is None:
+        md5 = hashlib.md5()
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(package_dir)):
+            if name.endswith('.py'):
+                f = open(os.path.join(package_dir, name), 'rb')
+                try:
+                    md5.update(name.encode('utf-8') + b'\0' + f.read())
+                finally:
+                    f.close()
+        _implementation_hash = md5.hexdigest()
+    return _implementation_hash
+
+
+class BuildCache:
+    """Directory of cached type checking results, one file per module.
+
+    Attributes:
+      cache_dir: Directory that contains the cache files
+      options:   Description of build options that affect type checking;
+                 entries written using different options are ignored
+      hits:      Number of modules that were loaded from the cache
+      misses:    Number of modules that had to be type checked
+    """
+
+    def __init__(self, cache_dir: str, options: str) -> None:
+        self.cache_dir = cache_dir
+        self.options = options
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, id: str, key: str,
+               modules: Dict[str, MypyFile]) -> bool:
+        """Restore cached type checking results of a module.
+
+        The key argument describes the source files of the module and its
+        dependencies. Return True if the results were restored; in this case
+        the module does not need to be type checked.
+        """
+        data = None # type: Dict[str, Any]
+        try:
+            f = open(self.cache_path(id), 'rb')
+            try:
+                data = pickle.load(f)
+            finally:
+                f.close()
+        except (IOError, EOFError, ValueError, TypeError, AttributeError,
+                ImportError, IndexError, KeyError, pickle.UnpicklingError):
+            # The file is missing, truncated or otherwise corrupt.
+            data = None
+        if (not isinstance(data, dict) or
+                data.get('version') != CACHE_VERSION or
+                data.get('implementation') != implementation_hash() or
+                data.get('options') != self.options or
+                data.get('key') != key):
+            self.misses += 1
+            return False
+        try:
+            types = load_types(data['types'], modules)
+            restore_var_types(modules[id], types)
+        except (KeyError, pickle.UnpicklingError, EOFError, ValueError,
+                TypeError, AttributeError, ImportError, IndexError):
+            # Could not resolve a reference to a class or a variable in the
+            # current build, or the cached types are corrupt.
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, id: str, key: str, tree: MypyFile) -> None:
+        """Write the type checking results of a module to the cache.
+
+        Do nothing if the results cannot be represented in the cache.
+        """
+        try:
+            types = dump_types(module_var_types(tree))
+        except pickle.PicklingError:
+            return
+        data = {'version': CACHE_VERSION,
+                'implementation': implementation_hash(),
+                'options': self.options,
+                'key': key,
+                'types': types}
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        f = open(self.cache_path(id), 'wb')
+        try:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+
+    def cache_path(self, id: str) -> str:
+        return os.path.join(self.cache_dir, id + '.cache')
+
+
+def module_var_types(tree: MypyFile) -> List[Tuple[str, Type]]:
+    """Return the types of the variables defined in a module.
+
+    Include module-level variables, class attributes and decorated
+    functions, including those in nested classes. Names are qualified
+    relative to the module (e.g. 'C.x').
+    """
+    result = List[Tuple[str, Type]]()
+    collect_var_types(tree.fullname(), '', tree.names, result)
+    return result
+
+
+def collect_var_types(module: str, prefix: str, names: SymbolTable,
+                      result: List[Tuple[str, Type]]) -> None:
+    for name in sorted(names.keys()):
+        node = names[name].node
+        qualified = prefix + name
+        var = None # type: Var
+        if isinstance(node, Decorator):
+            var = cast(Decorator, node).var
+        elif isinstance(node, Var):
+            var = cast(Var, node)
+        if var:
+            # Skip names imported from other modules.
+            if prefix or var.fullname() == module + '.' + name:
+                result.append((qualified, var.type))
+        elif (isinstance(node, TypeInfo) and
+              node.fullname() == module + '.' + qualified):
+            collect_var_types(module, qualified + '.',
+                              cast(TypeInfo, node).names, result)
+
+
+def restore_var_types(tree: MypyFile,
+                      types: List[Tuple[str, Type]]) -> None:
+    """Store cached variable types in a semantically analyzed module.
+
+    Only replace missing (i.e. not yet inferred) types. Raise KeyError if a
+    variable cannot be found; in this case no types are stored.
+    """
+    resolved = List[Tuple[Var, Type]]()
+    for name, typ in types:
+        resolved.append((lookup_var(tree, name), typ))
+    for var, typ in resolved:
+        if var.type is None and typ is not None:
+            var.type = typ
+            var.is_ready = True
+
+
+def lookup_var(tree: MypyFile, name: str) -> Var:
+    """Find a variable or a decorated function by a name relative to a module.
+
+    Raise KeyError if not found.
+    """
+    names = tree.names
+    node = None # type: SymbolNode
+    for component in name.split('.'):
+        node = names[component].node
+        if isinstance(node, TypeInfo):
+            names = cast(TypeInfo, node).names
+    if isinstance(node, Decorator):
+        return cast(Decorator, node).var
+    if not isinstance(node, Var):
+        raise KeyError(name)
+    return cast(Var, node)
+
+
+class TypePickler(pickle.Pickler):
+    """Pickler that stores references to classes by name."""
+
+    def persistent_id(self, obj: object) -> Any:
+        if isinstance(obj, TypeInfo):
+            if not obj.fullname():
+                raise pickle.PicklingError('cannot refer to anonymous class')
+            return obj.fullname()
+        return None
+
+
+class TypeUnpickler(pickle.Unpickler):
+    """Unpickler that resolves class references produced by TypePickler."""
+
+    def __init__(self, file: Any, modules: Dict[str, MypyFile]) -> None:
+        super().__init__(file)
+        self.modules = modules
+
+    def persistent_load(self, fullname: str) -> TypeInfo:
+        info = lookup_type_info(fullname, self.modules)
+        if info is None:
+            raise pickle.UnpicklingError(
+                'unknown class {}'.format(fullname))
+        return info
+
+
+def dump_types(types: Any) -> bytes:
+    """Serialize a structure containing types.
+
+    Store references to classes by name.
+    """
+    f = io.BytesIO()
+    TypePickler(f, pickle.HIGHEST_PROTOCOL).dump(types)
+    return f.getvalue()
+
+
+def load_types(data: bytes, modules: Dict[str, MypyFile]) -> Any:
+    """Deserialize types produced by dump_types.
+
+    Resolve references to classes using the module symbol tables. Raise
+    UnpicklingError if a class cannot be found.
+    """
+    return TypeUnpickler(io.BytesIO(data), modules).load()
+
+
+def lookup_type_info(fullname: str,
+                     modules: Dict[str, MypyFile]) -> TypeInfo:
+    """Find the TypeInfo with the given fully qualified name (or None)."""
+    components = fullname.split('.')
+    # Find the longest prefix that is a module name.
+    for i in range(len(components) - 1, 0, -1):
+        module = '.'.join(components[:i])
+        if module in modules:
+            names = modules[module].names
+            node = None # type: Any
+            for component in components[i:]:
+                if names is None or component not in names:
+                    return None
+                node = names[component].node
+                names = node.names if isinstance(node, TypeInfo) else None
+            if isinstance(node, TypeInfo):
+                return node
+            return None
+    return None
@@ -2,22 +2,28 @@
 
 import os
 
-from typing import Undefined, List, Dict, overload
+from typing import Undefined, List, Dict, Set, overload
 
 from mypy import errors
 from mypy import icode
+from mypy import regalloc
 from mypy.icode import (
     BasicBlock, SetRI, SetRR, SetRNone, IfOp, BinOp, Goto, Return, Opcode,
     CallDirect, CallMethod, FuncIcode, UnaryOp, SetGR, SetRG, Construct,
     SetAttr, GetAttr, IfR
 )
-from mypy.nodes import TypeInfo, FuncBase
+from mypy.nodes import TypeInfo, FuncBase, MypyFile, TypeDef
+from mypy.regalloc import RegisterAllocation
+from mypy.traverser import TraverserVisitor
 from mypy import transform
 
 
 INDENT = 4
 
 
+# Number of bits in a value (M_VALUE_BITS in mypy.h)
+VALUE_BITS = 64
+
 # Operator flags
 OVERFLOW_CHECK_3_ARGS = 1
 SHR_OPERAND = 2
@@ -30,7 +36,12 @@ int main(int argc, char **argv) {
     MEnv env;
     env.frame = stack;
     env.stack_top = stack + 1024 - 16; // Reserve 16 entries for arguments
+    env.stack = stack;
+    env.globals = Mglobals;
+    env.num_globals = sizeof(Mglobals) / sizeof(MValue);
     M__init(&env);
+    if (getenv("MYPY_GC_STATS"))
+        MPrintGCStats();
     return 0;
 }
 '''
@@ -40,8 +51,19 @@ class CGenerator:
     """Translate icode to C."""
     
     func = Undefined(FuncIcode)
-
-    def __init__(self) -> None:
+    # Storage of the registers of the current function
+    allocation = Undefined(RegisterAllocation)
+
+    def __init__(self, allocate_registers: bool = True,
+                 subclasses: Dict[TypeInfo, List[TypeInfo]] = None) -> None:
+        """Construct a code generator.
+
+        If allocate_registers is False, store each register in a separate
+        frame slot (see mypy.regalloc). If subclasses is given, it must map
+        each class of the program to its direct subclasses (see
+        class_hierarchy), and method calls are devirtualized when possible
+        (see method_call). Otherwise always call methods through the vtable.
+        """
         self.prolog = ['#include "mypy.h"\n']
         self.types = [] # type: List[str]
         self.out = [] # type: List[str]
@@ -51,6 +73,8 @@ class CGenerator:
         self.classes = {} # type: Dict[TypeInfo, ClassRepresentation]
         # Count temp labels.
         self.num_labels = 0
+        self.allocate_registers = allocate_registers
+        self.subclasses = subclasses
 
     def output(self) -> List[str]:
         result = self.prolog[:]
@@ -65,7 +89,11 @@ class CGenerator:
         # Initialize function-specific state information.
         self.func = func
         self.num_labels = 0
-        self.frame_size = func.num_registers
+        if self.allocate_registers:
+            self.allocation = regalloc.allocate_registers(func)
+        else:
+            self.allocation = regalloc.frame_allocation(func)
+        self.frame_size = self.allocation.frame_size
 
         # Simplistic name mangling.
         name = name.replace('.', '_')
@@ -81,6 +109,9 @@ class CGenerator:
 
         # Generate code that updates and checks the stack pointer.
         self.emit('MValue t;')
+        if self.allocation.num_locals:
+            self.emit('MValue %s;' % ', '.join(
+                [local_var(n) for n in range(self.allocation.num_locals)]))
         self.emit('MValue *frame = e->frame;')
         self.emit('e->frame = frame + %d;' % self.frame_size)
         self.emit('if (e->frame >= e->stack_top)')
@@ -88,11 +119,25 @@ class CGenerator:
 
         # Geneate code that initializes the stack frame. The gc must not see
         # uninitialized values.
-        for i in range(func.num_args, self.frame_size):
-            if func.register_types[i] == icode.INT:
-                self.emit('frame[%d] = 0;' % i)
+        types = self.allocation.initial_frame_values(func)
+        for i, type in enumerate(types):
+            if type == icode.INT:
+                self.emit('frame[%d] = 0;' % (func.num_args + i))
             else:
-                self.emit('frame[%d] = MNone;' % i)
+                self.emit('frame[%d] = MNone;' % (func.num_args + i))
+
+        # Collect garbage deferred by int operations. Function entry is a GC
+        # point, so this must precede loading arguments to local variables.
+        self.emit('MCollectIfPending(e);')
+        
+        # Load arguments stored in local variables, and initialize local
+        # variables whose initial values may be used.
+        for reg, n in sorted(self.allocation.locals.items()):
+            if reg < func.num_args:
+                self.emit('%s = %s;' % (local_var(n), frame_slot(reg)))
+            elif reg in self.allocation.initialized:
+                self.emit('%s = %s;' % (local_var(n),
+                                        initial_value(func, reg)))
 
         # Translate function body, one basic block at a time.
         for b in func.blocks:
@@ -119,38 +164,45 @@ class CGenerator:
                SHR_OPERAND | CLEAR_LSB),
         '%': ('%', 'MIsPotentialModOverflow', 'MIntMod', 0),
         '&': ('&', None, 'MIntAnd', 0),
-        '|': ('|', None, 'MIntAnd', 0),
-        '^': ('^', None, 'MIntAnd', 0),
+        '|': ('|', None, 'MIntOr', 0),
+        '^': ('^', None, 'MIntXor', 0),
         '<<': ('<<', 'MIsShlOverflow', 'MIntShl', SHR_OPERAND),
         '>>': ('>>', 'MIsShrOverflow', 'MIntShr', SHR_OPERAND | CLEAR_LSB)
     }
 
     @overload
     def opcode(self, opcode: SetRI) -> None:
-        self.emit('%s = %d;' % (reg(opcode.target), 2 * opcode.intval))
+        if icode.SHORT_MIN <= opcode.intval <= icode.SHORT_MAX:
+            self.emit('%s = %d;' % (self.reg(opcode.target),
+                                    2 * opcode.intval))
+        else:
+            # Long int literal
+            self.emit('%s = MIntFromDecimal(e, "%d");' % (
+                self.reg(opcode.target), opcode.intval))
 
     @overload
     def opcode(self, opcode: SetRR) -> None:
-        self.emit('%s = %s;' % (reg(opcode.target), reg(opcode.source)))
+        self.emit('%s = %s;' % (self.reg(opcode.target),
+                                self.reg(opcode.source)))
 
     @overload
     def opcode(self, opcode: SetRNone) -> None:
-        self.emit('%s = MNone;' % reg(opcode.target))
+        self.emit('%s = MNone;' % self.reg(opcode.target))
 
     @overload
     def opcode(self, opcode: SetGR) -> None:
         self.emit('%s = %s;' % (self.globalvar(opcode.target),
-                                reg(opcode.source)))
+                                self.reg(opcode.source)))
 
     @overload
     def opcode(self, opcode: SetRG) -> None:
-        self.emit('%s = %s;' % (reg(opcode.target),
+        self.emit('%s = %s;' % (self.reg(opcode.target),
                                 self.globalvar(opcode.source)))
 
     @overload
     def opcode(self, opcode: IfOp) -> None:
-        left = operand(opcode.left, opcode.left_kind)
-        right = operand(opcode.right, opcode.right_kind)
+        left = self.operand(opcode.left, opcode.left_kind)
+        right = self.operand(opcode.right, opcode.right_kind)
         op = self.int_conditionals[opcode.op]
         self.emit('if (%s(%s, %s))' % (op, left, right))
         self.emit('    goto %s;' % (label(opcode.true_block.label)))
@@ -162,17 +214,23 @@ class CGenerator:
         op = '!='
         if opcode.negated:
             op = '=='
-        self.emit('if (%s %s MNone)' % (reg(opcode.value), op))
+        self.emit('if (%s %s MNone)' % (self.reg(opcode.value), op))
         self.emit('    goto %s;' % (label(opcode.true_block.label)))
         self.emit('else')
         self.emit('    goto %s;' % (label(opcode.false_block.label)))
 
     @overload
     def opcode(self, opcode: BinOp) -> None:
-        target = reg(opcode.target)
-        left = operand(opcode.left, opcode.left_kind)
-        right = operand(opcode.right, opcode.right_kind)
+        target = self.reg(opcode.target)
+        left = self.operand(opcode.left, opcode.left_kind)
+        right = self.operand(opcode.right, opcode.right_kind)
         op, overflow, opfn, flags = self.int_arithmetic[opcode.op]
+        if (opcode.op in ('<<', '>>') and opcode.right_kind == icode.INT_KIND
+                and not 0 <= opcode.right < VALUE_BITS):
+            # The shift count is too large for the fast path.
+            self.emit('%s = %s(e, %s, %s);' % (target, opfn, left, right))
+            self.emit_error_check(target)
+            return
         if flags & SHR_OPERAND:
             operation = '%s %s (%s >> 1)' % (left, op, right)
         else:
@@ -212,8 +270,8 @@ class CGenerator:
 
     @overload
     def opcode(self, opcode: UnaryOp) -> None:
-        target = reg(opcode.target)
-        operand = reg(opcode.operand)
+        target = self.reg(opcode.target)
+        operand = self.reg(opcode.operand)
         if opcode.op == '-':
             self.emit('if (MIsShort(%s) && %s != M_SHORT_MIN)' % (
                 operand, operand))
@@ -238,21 +296,23 @@ class CGenerator:
 
     @overload
     def opcode(self, opcode: Return) -> None:
-        self.emit_return(reg(opcode.retval))
+        self.emit_return(self.reg(opcode.retval))
 
     @overload
     def opcode(self, opcode: CallDirect) -> None:
         for i, arg in enumerate(opcode.args):
-            self.emit('%s = %s;' % (reg(self.frame_size + i), reg(arg)))
+            self.emit('%s = %s;' % (frame_slot(self.frame_size + i),
+                                    self.reg(arg)))
         self.direct_call(opcode.target, opcode.func)
 
     @overload
     def opcode(self, opcode: CallMethod) -> None:
-        recv = reg(opcode.object)
-        self.emit('%s = %s;' % (reg(self.frame_size), recv))
+        recv = self.reg(opcode.object)
+        self.emit('%s = %s;' % (frame_slot(self.frame_size), recv))
         for i, arg in enumerate(opcode.args):
-            self.emit('%s = %s;' % (reg(self.frame_size + 1 + i), reg(arg)))
-        target = reg(opcode.target)
+            self.emit('%s = %s;' % (frame_slot(self.frame_size + 1 + i),
+                                    self.reg(arg)))
+        target = self.reg(opcode.target)
         self.get_class_representation(opcode.type)
         rep = self.classes[opcode.type]
         method = opcode.method.replace('$', '_') # Simple name mangling.
@@ -260,11 +320,10 @@ class CGenerator:
             self.direct_call(opcode.target, '%s_%s' % (opcode.type.name(),
                                                        method))
         else:
-            vtable_index = rep.vtable_index[method]
-            self.emit('t = MInvokeVirtual(e, %s, %d);' % (recv, vtable_index))
+            self.method_call(recv, opcode.type, method)
             self.emit('if (t == MError)')
             self.emit('    return MError;')
-            self.emit('%s = t;' % reg(opcode.target))
+            self.emit('%s = t;' % self.reg(opcode.target))
 
     @overload
     def opcode(self, opcode: Construct) -> None:
@@ -272,21 +331,21 @@ class CGenerator:
         self.emit('t = MAlloc(e, sizeof(MInstanceHeader) + '
                   '%d * sizeof(MValue));' % len(rep.slotmap))
         self.emit('MInitInstance(t, &%s);' % rep.cname)
-        self.emit('%s = t;' % reg(opcode.target))
+        self.emit('%s = t;' % self.reg(opcode.target))
 
     @overload
     def opcode(self, opcode: SetAttr) -> None:
         rep = self.get_class_representation(opcode.type)
         slot = rep.slotmap[opcode.attr]
-        self.emit('MSetSlot(%s, %d, %s);' % (reg(opcode.object),
-                                             slot, reg(opcode.source)))
+        self.emit('MSetSlot(%s, %d, %s);' % (self.reg(opcode.object),
+                                             slot, self.reg(opcode.source)))
 
     @overload
     def opcode(self, opcode: GetAttr) -> None:
         rep = self.get_class_representation(opcode.type)
         slot = rep.slotmap[opcode.attr]
-        self.emit('%s = MGetSlot(%s, %d);' % (reg(opcode.target),
-                                              reg(opcode.object), slot))
+        self.emit('%s = MGetSlot(%s, %d);' % (self.reg(opcode.target),
+                                              self.reg(opcode.object), slot))
 
     @overload
     def opcode(self, opcode: Opcode) -> None:
@@ -297,6 +356,19 @@ class CGenerator:
     # Helpers
     #
 
+    def reg(self, n: int) -> str:
+        """Return the C lvalue that holds a register."""
+        if n in self.allocation.locals:
+            return local_var(self.allocation.locals[n])
+        else:
+            return frame_slot(self.allocation.frame_slots[n])
+
+    def operand(self, n: int, kind: int) -> str:
+        if kind == icode.INT_KIND:
+            return str(n * 2)
+        else:
+            return self.reg(n)
+
     def get_class_representation(self, cls: TypeInfo) -> 'ClassRepresentation':
         rep = self.classes.get(cls)
         if not rep:
@@ -328,11 +400,60 @@ class CGenerator:
         
         return rep
 
+    def method_call(self, recv: str, cls: TypeInfo, method: str) -> None:
+        """Generate a method call that stores the return value in t.
+
+        If devirtualizing and the receiver type and its subclasses share an
+        implementation of the method, call it directly. Otherwise, if
+        devirtualizing, guess that the receiver is a direct instance of the
+        receiver type and check the guess before calling the implementation
+        of that type directly; if the guess is wrong, use the vtable.
+        """
+        rep = self.classes[cls]
+        if self.subclasses is not None:
+            defining_class = self.resolve_method(cls, method)
+            if defining_class:
+                self.emit('t = MInvokeDirect(e, %s, M%s_%s);' % (
+                    recv, defining_class, method))
+                return
+            self.emit('if (MHasType(%s, &%s))' % (recv, rep.cname))
+            self.emit('    t = M%s_%s(e);' % (rep.defining_class[method],
+                                              method))
+            self.emit('else')
+            self.emit('    t = MInvokeVirtual(e, %s, %d);' % (
+                recv, rep.vtable_index[method]))
+        else:
+            self.emit('t = MInvokeVirtual(e, %s, %d);' % (
+                recv, rep.vtable_index[method]))
+
+    def resolve_method(self, cls: TypeInfo, method: str) -> str:
+        """Return the name of the class that defines the implementation of
+        a method for all instances of cls, or None if subclasses of cls
+        override the method.
+
+        This is a whole-program analysis, since self.subclasses includes all
+        the classes in the program.
+        """
+        subtypes = [cls]
+        i = 0
+        while i < len(subtypes):
+            for subclass in self.subclasses.get(subtypes[i], []):
+                if subclass not in subtypes:
+                    subtypes.append(subclass)
+            i += 1
+        defining_classes = Set[str]()
+        for subtype in subtypes:
+            rep = self.get_class_representation(subtype)
+            defining_classes.add(rep.defining_class[method])
+        if len(defining_classes) == 1:
+            return defining_classes.pop()
+        return None
+
     def direct_call(self, target: int, funcname: str) -> None:
         self.emit('t = M%s(e);' % funcname)
         self.emit('if (t == MError)')
         self.emit('    return MError;')
-        self.emit('%s = t;' % reg(target))
+        self.emit('%s = t;' % self.reg(target))
 
     def emit(self, s: str) -> None:
         if '}' in s:
@@ -372,19 +493,52 @@ class CGenerator:
         return 'Mglobals[%d]' % num
 
 
-def reg(n: int) -> str:
+def frame_slot(n: int) -> str:
     return 'frame[%d]' % n
 
 
+def initial_value(func: FuncIcode, reg: int) -> str:
+    if func.register_types[reg] == icode.INT:
+        return '0'
+    else:
+        return 'MNone'
+
+
+def local_var(n: int) -> str:
+    return 'v%d' % n
+
+
 def label(n: int) -> str:
     return 'L%d' % n
 
 
-def operand(n: int, kind: int) -> str:
-    if kind == icode.INT_KIND:
-        return str(n * 2)
-    else:
-        return reg(n)
+def class_hierarchy(files: List[MypyFile]) -> Dict[TypeInfo, List[TypeInfo]]:
+    """Return a map from each class with subclasses in the given files to
+    its direct subclasses (in definition order)."""
+    finder = ClassFinder()
+    for f in files:
+        f.accept(finder)
+    subclasses = Dict[TypeInfo, List[TypeInfo]]()
+    for info in finder.classes:
+        for base in info.bases:
+            subclasses.setdefault(base.type, []).append(info)
+    return subclasses
+
+
+class ClassFinder(TraverserVisitor):
+    """Collect the TypeInfos of all classes defined in parse trees."""
+
+    classes = Undefined(List[TypeInfo])
+
+    def __init__(self) -> None:
+        self.classes = List[TypeInfo]()
+
+    def visit_type_def(self, o: TypeDef) -> None:
+        # Generic wrapper classes generated by mypy.transform have no
+        # TypeInfo.
+        if o.info:
+            self.classes.append(o.info)
+        super().visit_type_def(o)
 
 
 class ClassRepresentation:
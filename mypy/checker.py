@@ -98,6 +98,14 @@ class TypeChecker(NodeVisitor[Type]):
     locals = Undefined(SymbolTable)
     modules = Undefined(Dict[str, MypyFile])
     
+    # Classes and instance types without type arguments (shared, must not be
+    # modified) looked up by fully qualified name, and basic types (None if
+    # not constructed yet). Names must refer to the same classes during a
+    # build, so the type checker must not be reused between builds.
+    type_infos = Undefined(Dict[str, TypeInfo])
+    named_types = Undefined(Dict[str, Instance])
+    _basic_types = None # type: BasicTypes
+    
     def __init__(self, errors: Errors, modules: Dict[str, MypyFile],
                  pyversion: int = 3) -> None:
         """Construct a type checker.
@@ -117,6 +125,8 @@ class TypeChecker(NodeVisitor[Type]):
         self.type_context = []
         self.dynamic_funcs = []
         self.function_stack = []
+        self.type_infos = {}
+        self.named_types = {}
     
     def visit_file(self, file_node: MypyFile, path: str) -> None:  
         """Type check a mypy file with the given path."""
@@ -1019,10 +1029,15 @@ class TypeChecker(NodeVisitor[Type]):
         """Return an instance type with type given by the name and no
         type arguments. For example, named_type('builtins.object')
         produces the object type.
+
+        The result may be shared between calls and must not be modified.
         """
-        # Assume that the name refers to a type.
-        sym = self.lookup_qualified(name)
-        return Instance(cast(TypeInfo, sym.node), [])
+        typ = self.named_types.get(name)
+        if not typ:
+            typ = Instance(self.lookup_type_info(name), [])
+            if '.' in name:
+                self.named_types[name] = typ
+        return typ
     
     def named_type_if_exists(self, name: str) -> Type:
         """Return named instance type, or UnboundType if the type was
@@ -1033,9 +1048,7 @@ class TypeChecker(NodeVisitor[Type]):
         etc.).
         """
         try:
-            # Assume that the name refers to a type.
-            sym = self.lookup_qualified(name)
-            return Instance(cast(TypeInfo, sym.node), [])
+            return self.named_type(name)
         except KeyError:
             return UnboundType(name)
     
@@ -1044,8 +1057,7 @@ class TypeChecker(NodeVisitor[Type]):
         arguments. Assume that the number of arguments is correct.
         """
         # Assume that the name refers to a compatible generic type.
-        sym = self.lookup_qualified(name)
-        return Instance(cast(TypeInfo, sym.node), args)
+        return Instance(self.lookup_type_info(name), args)
     
     def type_type(self) -> Instance:
         """Return instance type 'type'."""
@@ -1111,6 +1123,19 @@ class TypeChecker(NodeVisitor[Type]):
                 n = cast(MypyFile, ((n.names.get(parts[i], None).node)))
             return n.names[parts[-1]]
     
+    def lookup_type_info(self, name: str) -> TypeInfo:
+        """Look up a class by name. Cache the result if name is qualified.
+
+        Raise KeyError if the name is not defined.
+        """
+        info = self.type_infos.get(name)
+        if not info:
+            # Assume that the name refers to a type.
+            info = cast(TypeInfo, self.lookup_qualified(name).node)
+            if '.' in name:
+                self.type_infos[name] = info
+        return info
+    
     def enter(self) -> None:
         self.locals = SymbolTable()
     
@@ -1120,10 +1145,15 @@ class TypeChecker(NodeVisitor[Type]):
     def basic_types(self) -> BasicTypes:
         """Return a BasicTypes instance that contains primitive types that are
         needed for certain type operations (joins, for example).
+
+        The result is shared between calls and must not be modified.
         """
-        return BasicTypes(self.object_type(), self.type_type(),
-                          self.named_type_if_exists('builtins.tuple'),
-                          self.named_type_if_exists('builtins.function'))
+        if not self._basic_types:
+            self._basic_types = BasicTypes(
+                self.object_type(), self.type_type(),
+                self.named_type_if_exists('builtins.tuple'),
+                self.named_type_if_exists('builtins.function'))
+        return self._basic_types
     
     def is_within_function(self) -> bool:
         """Are we currently type checking within a function?
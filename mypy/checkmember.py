@@ -15,6 +15,7 @@ from mypy.nodes import method_type
 from mypy.semanal import self_type
 from mypy import messages
 from mypy import subtypes
+from mypy.stats import counters
 
 
 def analyse_member_access(name: str, typ: Type, node: Context, is_lvalue: bool,
@@ -29,6 +30,7 @@ def analyse_member_access(name: str, typ: Type, node: Context, is_lvalue: bool,
       2. supertype access (when using super(); is_super == True and
          override_info should refer to the supertype)
     """
+    counters['member lookups'] += 1
     report_type = report_type or typ
     if isinstance(typ, Instance):
         if name == '__init__' and not is_super:
@@ -243,8 +245,8 @@ def class_callable(init_type: Callable, info: TypeInfo) -> Callable:
                  init_type.arg_names,
                  self_type(info),
                  True,
-                 None,
-                 variables).with_name('"{}"'.format(info.name()))
+                 '"{}"'.format(info.name()),
+                 variables)
     return convert_class_tvars_to_func_tvars(c, len(initvars))
 
 
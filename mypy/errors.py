@@ -1,10 +1,13 @@
+import json
 import os
 import os.path
 
-from typing import Undefined, Tuple, List, typevar, Sequence, Any, Function
+from typing import Undefined, Tuple, List, Set, Any, TextIO
 
 
-T = typevar('T')
+# Error reporter formats
+TEXT_FORMAT = 'text'    # As in CompileError messages
+JSON_FORMAT = 'json'    # A JSON object per line (JSON Lines)
 
 
 class ErrorInfo:
@@ -65,6 +68,12 @@ class Errors:
     # Stack of short names of current functions or members (or None).
     function_or_member = Undefined(List[str])
     
+    # Write messages using this when they are flushed (or None).
+    reporter = None # type: ErrorReporter
+    
+    # Number of messages in error_info that have been flushed.
+    num_flushed = 0
+    
     def __init__(self) -> None:
         self.error_info = []
         self.import_ctx = []
@@ -123,6 +132,10 @@ class Errors:
                          self.function_or_member[-1], line, message)
         self.error_info.append(info)
     
+    def add_error_info(self, info: ErrorInfo) -> None:
+        """Add a message generated using another Errors object."""
+        self.error_info.append(info)
+    
     def num_messages(self) -> int:
         """Return the number of generated messages."""
         return len(self.error_info)
@@ -134,17 +147,34 @@ class Errors:
     def raise_error(self) -> None:
         """Raise a CompileError with the generated messages.
 
-        Render the messages suitable for displaying.
+        Render the messages suitable for displaying. Messages that have not
+        been flushed are flushed first.
         """
-        raise CompileError(self.messages())
+        self.flush()
+        raise CompileError(self.messages(),
+                           reported=self.reporter is not None)
+    
+    def flush(self) -> None:
+        """Write the messages generated since the previous flush using the
+        reporter (if there is one).
+
+        The messages are still included in the messages of CompileError.
+        """
+        if self.reporter and self.num_flushed < len(self.error_info):
+            self.reporter.report(self, self.error_info[self.num_flushed:])
+        self.num_flushed = len(self.error_info)
     
     def messages(self) -> List[str]:
         """Return a string list that represents the error messages.
 
         Use a form suitable for displaying to the user.
         """
+        return self.format_messages(self.error_info)
+    
+    def format_messages(self, error_info: List[ErrorInfo]) -> List[str]:
+        """Return a string list that represents the given error messages."""
         a = [] # type: List[str]
-        errors = self.render_messages(self.sort_messages(self.error_info))
+        errors = self.render_messages(self.sort_messages(error_info))
         errors = self.remove_duplicates(errors)
         for file, line, message in errors:
             s = ''
@@ -244,31 +274,76 @@ class Errors:
                 i += 1
             i += 1
             
-            # Sort the errors specific to a file according to line number.
-            a = stable_sort(errors[i0:i], lambda x: x.line)
-            result.extend(a)
+            # Sort the errors specific to a file according to line number
+            # (sorting is stable).
+            result.extend(sorted(errors[i0:i], key=lambda x: x.line))
         return result
     
     def remove_duplicates(self, errors: List[Tuple[str, int, str]]
                           ) -> List[Tuple[str, int, str]]:
-        """Remove duplicates from a sorted error list."""
+        """Remove duplicates from a sorted error list.
+
+        A message is a duplicate if it is equal to a message in the same
+        run of consecutive messages with the same path and line.
+        """
         res = [] # type: List[Tuple[str, int, str]]
-        i = 0
-        while i < len(errors):
-            dup = False
-            j = i - 1
-            while (j >= 0 and errors[j][0] == errors[i][0] and
-                       errors[j][1] == errors[i][1]):
-                if errors[j] == errors[i]:
-                    dup = True
-                    break
-                j -= 1
-            if not dup:
-                res.append(errors[i])
-            i += 1
+        seen = Set[Tuple[str, int, str]]()
+        for i, error in enumerate(errors):
+            if i > 0 and (error[0] != errors[i - 1][0] or
+                          error[1] != errors[i - 1][1]):
+                seen = set()
+            if error not in seen:
+                seen.add(error)
+                res.append(error)
         return res
 
 
+class ErrorReporter:
+    """Writes error messages to a stream when they are flushed.
+
+    The build flushes the messages of each module as soon as the module has
+    been type checked, so the messages are reported before the build ends.
+    """
+    
+    def __init__(self, stream: TextIO, format: str = TEXT_FORMAT) -> None:
+        """Construct a reporter.
+
+        The format is TEXT_FORMAT or JSON_FORMAT. In the JSON format each
+        message is a JSON object with the keys 'file', 'line', 'message',
+        'type', 'function' and 'import_context' (a list of [path, line]
+        pairs), and context lines (such as 'In function "f":') are omitted.
+        """
+        self.stream = stream
+        self.format = format
+    
+    def report(self, errors: Errors, error_info: List[ErrorInfo]) -> None:
+        if self.format == JSON_FORMAT:
+            seen = Set[Tuple[str, int, str]]()
+            for e in errors.sort_messages(error_info):
+                key = (e.file, e.line, e.message)
+                if key not in seen:
+                    seen.add(key)
+                    self.stream.write(json.dumps(json_error(e, errors)) +
+                                      '\n')
+        else:
+            for message in errors.format_messages(error_info):
+                self.stream.write(message + '\n')
+        self.stream.flush()
+
+
+def json_error(e: ErrorInfo, errors: Errors) -> Any:
+    """Return a JSON-compatible representation of an error message."""
+    context = List[List[Any]]()
+    for path, line in e.import_ctx:
+        context.append([remove_path_prefix(path, errors.ignore_prefix), line])
+    return {'file': e.file,
+            'line': e.line,
+            'message': e.message,
+            'type': e.type,
+            'function': e.function_or_member,
+            'import_context': context}
+
+
 class CompileError(Exception):
     """Exception raised when there is a compile error.
 
@@ -278,26 +353,20 @@ class CompileError(Exception):
     
     messages = Undefined(List[str])
     
-    def __init__(self, messages: List[str]) -> None:
+    # Summary of the modules with errors, if the build continued after
+    # errors (the summary is also included at the end of messages).
+    summary = Undefined(List[str])
+    
+    # Have the messages (other than the summary) been written by an error
+    # reporter?
+    reported = False
+    
+    def __init__(self, messages: List[str], summary: List[str] = None,
+                 reported: bool = False) -> None:
         super().__init__()
         self.messages = messages
-
-
-def stable_sort(a: Sequence[T], key: Function[[T], Any]) -> List[T]:
-    """Perform a stable sort of a sequence.
-
-    If the original sequence has a[n] == a[n+m] (when comparing using
-    the comparison function f), in the sorted sequence item a[n] will
-    be at an earlier index than a[n + m].
-    """
-    # TODO use sorted with key (need support for keyword arguments)
-    l = List[Tuple[Any, int, T]]()
-    for i, x in enumerate(a):
-        l.append((key(x), i, x))
-    result = List[T]()
-    for k, j, y in sorted(l):
-        result.append(y)        
-    return result
+        self.summary = summary or []
+        self.reported = reported
 
 
 def remove_path_prefix(path: str, prefix: str) -> str:
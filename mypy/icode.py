@@ -16,7 +16,12 @@ from mypy.subtypes import is_named_instance
 
 # Operand kinds
 REG_KIND = 0 # Register
-INT_KIND = 1 # Integer literal
+INT_KIND = 1 # Integer literal (within the range of short ints)
+
+# Range of ints that are represented as short ints in compiled code; other
+# ints are boxed long ints
+SHORT_MIN = -2**62
+SHORT_MAX = 2**62 - 1
 
 
 class FuncIcode:
@@ -322,7 +327,8 @@ class IcodeBuilder(NodeVisitor[int]):
     register_types = Undefined(List[int])
 
     # Stack of inactive scopes
-    scopes = Undefined(List[Tuple[List[BasicBlock], int, Dict[Node, int]]])
+    scopes = Undefined(List[Tuple[List[BasicBlock], int, List[int],
+                                  Dict[Node, int]]])
 
     def __init__(self, types: Dict[Node, Type]) -> None:
         self.generated = {}
@@ -625,7 +631,8 @@ class IcodeBuilder(NodeVisitor[int]):
         return target
 
     def get_operand(self, n: Node) -> Tuple[int, int]:
-        if isinstance(n, IntExpr):
+        if (isinstance(n, IntExpr) and
+                SHORT_MIN <= (cast(IntExpr, n)).value <= SHORT_MAX):
             return (cast(IntExpr, n)).value, INT_KIND
         else:
             return self.accept(n), REG_KIND
@@ -765,7 +772,8 @@ class IcodeBuilder(NodeVisitor[int]):
 
         Each function and the file top level is a separate scope.
         """
-        self.scopes.append((self.blocks, self.num_registers, self.lvar_regs))
+        self.scopes.append((self.blocks, self.num_registers,
+                            self.register_types, self.lvar_regs))
         self.blocks = []
         self.num_registers = 0
         self.register_types= []
@@ -775,7 +783,8 @@ class IcodeBuilder(NodeVisitor[int]):
 
     def leave(self) -> None:
         """Leave a scope."""
-        self.blocks, self.num_registers, self.lvar_regs = self.scopes.pop()
+        (self.blocks, self.num_registers, self.register_types,
+         self.lvar_regs) = self.scopes.pop()
         self.current = self.blocks[-1]
 
     def new_block(self) -> BasicBlock:
@@ -0,0 +1,625 @@
+"""Optimization passes over icode (see mypy.icode).
+
+IcodeBuilder generates naive code: each subexpression gets a fresh register,
+variable reads are often register to register copies and control flow
+constructs generate jumps to blocks that only contain another jump. The
+passes in this module clean up the icode of a function before it is
+translated to C. Each pass can be enabled separately (see PASSES):
+
+  fold         Evaluate int operations and branches whose operands are
+               known constants within a basic block.
+  copy         Replace uses of registers assigned from another register
+               with the source register within a basic block.
+  jump         Retarget jumps to blocks that only contain a jump, replace
+               jumps to blocks that only return with a return and merge
+               blocks with their only predecessor.
+  unreachable  Remove blocks that are not reachable from the entry block.
+  dead         Remove operations without side effects whose results are
+               never used (based on register liveness).
+
+The passes are repeated until none of them changes the code. The passes
+preserve the meaning of the registers that hold arguments and local
+variables, and the number of registers is not changed.
+"""
+
+from typing import List, Dict, Set, Tuple, cast
+
+from mypy.icode import (
+    FuncIcode, BasicBlock, Opcode, SetRR, SetRI, SetRNone, SetGR, SetRG,
+    GetAttr, SetAttr, CallDirect, CallMethod, Construct, Return, Branch, IfOp,
+    IfR, Goto, BinOp, UnaryOp, REG_KIND, INT_KIND, SHORT_MIN, SHORT_MAX
+)
+
+
+# Names of the optimization passes, in the order they are performed.
+PASSES = ['fold', 'copy', 'jump', 'unreachable', 'dead']
+
+# Maximum number of times the passes are repeated for a function.
+MAX_ROUNDS = 10
+
+# Binary operations that can't fail if the operands are ints (and thus can
+# be removed if the result is not used).
+SAFE_BINARY_OPS = ['+', '-', '*', '&', '|', '^']
+
+
+def optimize(func: FuncIcode, passes: List[str] = None) -> None:
+    """Optimize the icode of a function in place.
+
+    Perform the given passes (all passes in PASSES by default).
+    """
+    if passes is None:
+        passes = PASSES
+    for name in passes:
+        if name not in PASSES:
+            raise ValueError('Unknown icode optimization pass: %s' % name)
+    if not passes:
+        return
+    add_fall_through_gotos(func)
+    for i in range(MAX_ROUNDS):
+        changed = False
+        for name in PASSES:
+            if name in passes and perform_pass(name, func):
+                changed = True
+        if not changed:
+            break
+
+
+def perform_pass(name: str, func: FuncIcode) -> bool:
+    """Perform an optimization pass; return True if it changed the code."""
+    if name == 'fold':
+        return fold_constants(func)
+    elif name == 'copy':
+        return propagate_copies(func)
+    elif name == 'jump':
+        return thread_jumps(func)
+    elif name == 'unreachable':
+        return remove_unreachable_blocks(func)
+    else:
+        return remove_dead_operations(func)
+
+
+def add_fall_through_gotos(func: FuncIcode) -> None:
+    """Make all control flow within a function explicit.
+
+    IcodeBuilder may leave opcodes after the first exit opcode of a block
+    (these are never executed), and an empty block falls through to the
+    next block. Remove the dead opcodes and end each block with an exit, so
+    that the order of the blocks no longer matters.
+    """
+    for i, block in enumerate(func.blocks):
+        for j, op in enumerate(block.ops):
+            if op.is_exit():
+                del block.ops[j + 1:]
+                break
+        else:
+            if i + 1 < len(func.blocks):
+                block.ops.append(Goto(func.blocks[i + 1]))
+
+
+#
+# Constant folding
+#
+
+
+def fold_constants(func: FuncIcode) -> bool:
+    """Evaluate operations and branches with constant operands.
+
+    Registers assigned an integer literal are known to have the value
+    within the rest of the block. If this is the only assignment to the
+    register and it is in the entry block, the value is also known in all
+    other blocks.
+    """
+    changed = False
+    entry_consts = entry_block_constants(func)
+    for block in func.blocks:
+        if block is func.blocks[0]:
+            consts = Dict[int, int]()
+        else:
+            consts = entry_consts.copy()
+        for i, op in enumerate(block.ops):
+            new = fold_operation(op, consts)
+            if new is not op:
+                block.ops[i] = new
+                op = new
+                changed = True
+            target = defined_register(op)
+            if target >= 0:
+                if isinstance(op, SetRI):
+                    consts[target] = (cast(SetRI, op)).intval
+                elif target in consts:
+                    del consts[target]
+    return changed
+
+
+def entry_block_constants(func: FuncIcode) -> Dict[int, int]:
+    """Return constants assigned in the entry block that are never changed.
+
+    Return a map from register to value.
+    """
+    consts = Dict[int, int]()
+    if predecessor_counts(func)[func.blocks[0]] > 0:
+        # The entry block is a loop header, so it doesn't precede all
+        # other blocks.
+        return consts
+    for op in func.blocks[0].ops:
+        if isinstance(op, SetRI):
+            setri = cast(SetRI, op)
+            consts[setri.target] = setri.intval
+    # Arguments are assigned by the caller.
+    for reg in range(func.num_args):
+        if reg in consts:
+            del consts[reg]
+    num_defs = Dict[int, int]()
+    for block in func.blocks:
+        for op in block.ops:
+            target = defined_register(op)
+            if target in consts:
+                num_defs[target] = num_defs.get(target, 0) + 1
+    for reg, count in num_defs.items():
+        if count > 1:
+            del consts[reg]
+    return consts
+
+
+def fold_operation(op: Opcode, consts: Dict[int, int]) -> Opcode:
+    """Return a simplified version of an opcode (or the original opcode).
+
+    The argument consts maps registers to known constant values.
+    """
+    if isinstance(op, SetRR):
+        setrr = cast(SetRR, op)
+        if setrr.source in consts:
+            return SetRI(setrr.target, consts[setrr.source])
+    elif isinstance(op, BinOp):
+        binop = cast(BinOp, op)
+        left = constant_operand(binop.left, binop.left_kind, consts)
+        right = constant_operand(binop.right, binop.right_kind, consts)
+        if left is not None and right is not None:
+            value = evaluate_binary(binop.op, left, right)
+            if value is not None:
+                return SetRI(binop.target, value)
+        if (right is not None and binop.right_kind == REG_KIND and
+                short_value(right) is not None):
+            # Only the right operand is replaced, as the C code generated
+            # for a shift with a literal left operand would use C ints.
+            return BinOp(binop.target, binop.left, binop.left_kind,
+                         right, INT_KIND, binop.op)
+    elif isinstance(op, UnaryOp):
+        unaryop = cast(UnaryOp, op)
+        if unaryop.operand in consts:
+            value = evaluate_unary(unaryop.op, consts[unaryop.operand])
+            if value is not None:
+                return SetRI(unaryop.target, value)
+    elif isinstance(op, IfOp):
+        ifop = cast(IfOp, op)
+        left = constant_operand(ifop.left, ifop.left_kind, consts)
+        right = constant_operand(ifop.right, ifop.right_kind, consts)
+        if left is not None and right is not None:
+            if evaluate_comparison(ifop.op, left, right):
+                return Goto(ifop.true_block)
+            else:
+                return Goto(ifop.false_block)
+        elif (left is not None and ifop.left_kind == REG_KIND and
+                  short_value(left) is not None):
+            return IfOp(left, INT_KIND, ifop.right, ifop.right_kind,
+                        ifop.op, ifop.true_block, ifop.false_block)
+        elif (right is not None and ifop.right_kind == REG_KIND and
+                  short_value(right) is not None):
+            return IfOp(ifop.left, ifop.left_kind, right, INT_KIND,
+                        ifop.op, ifop.true_block, ifop.false_block)
+    elif isinstance(op, IfR):
+        ifr = cast(IfR, op)
+        if ifr.value in consts:
+            # An int is never None.
+            if ifr.negated:
+                return Goto(ifr.false_block)
+            else:
+                return Goto(ifr.true_block)
+    return op
+
+
+def constant_operand(value: int, kind: int, consts: Dict[int, int]) -> int:
+    """Return the constant value of an operand, or None if not constant."""
+    if kind == INT_KIND:
+        return value
+    return consts.get(value)
+
+
+def evaluate_binary(op: str, left: int, right: int) -> int:
+    """Evaluate a binary int operation.
+
+    Return None if the operation would fail or if the result would not be
+    a short int.
+    """
+    if op in ('//', '%') and right == 0:
+        return None
+    if op in ('<<', '>>') and not 0 <= right < 64:
+        return None
+    if op == '+':
+        result = left + right
+    elif op == '-':
+        result = left - right
+    elif op == '*':
+        result = left * right
+    elif op == '//':
+        result = left // right
+    elif op == '%':
+        result = left % right
+    elif op == '&':
+        result = left & right
+    elif op == '|':
+        result = left | right
+    elif op == '^':
+        result = left ^ right
+    elif op == '<<':
+        result = left << right
+    elif op == '>>':
+        result = left >> right
+    else:
+        return None
+    return short_value(result)
+
+
+def evaluate_unary(op: str, operand: int) -> int:
+    """Evaluate a unary int operation (return None if not a short int)."""
+    if op == '-':
+        return short_value(-operand)
+    elif op == '~':
+        return short_value(~operand)
+    else:
+        return None
+
+
+def evaluate_comparison(op: str, left: int, right: int) -> bool:
+    if op == '==':
+        return left == right
+    elif op == '!=':
+        return left != right
+    elif op == '<':
+        return left < right
+    elif op == '<=':
+        return left <= right
+    elif op == '>':
+        return left > right
+    else:
+        return left >= right
+
+
+def short_value(n: int) -> int:
+    """Return n if it's a short int, or None otherwise.
+
+    Results of constant folding and int literal operands must be short ints.
+    The smallest short int is excluded, since it can't be negated in C.
+    """
+    if SHORT_MIN < n <= SHORT_MAX:
+        return n
+    else:
+        return None
+
+
+#
+# Copy propagation
+#
+
+
+def propagate_copies(func: FuncIcode) -> bool:
+    """Replace uses of copied registers with the original registers.
+
+    After rN = rM, uses of rN are replaced with rM within the rest of the
+    block, until either register is assigned again.
+    """
+    changed = False
+    for block in func.blocks:
+        copies = Dict[int, int]()
+        for op in block.ops:
+            if copies and replace_uses(op, copies):
+                changed = True
+            target = defined_register(op)
+            if target >= 0:
+                for reg, source in list(copies.items()):
+                    if reg == target or source == target:
+                        del copies[reg]
+                if isinstance(op, SetRR):
+                    setrr = cast(SetRR, op)
+                    if setrr.source != target:
+                        copies[target] = setrr.source
+    return changed
+
+
+#
+# Jump threading
+#
+
+
+def thread_jumps(func: FuncIcode) -> bool:
+    """Simplify jumps.
+
+    Jump directly to the final target of a chain of blocks that only
+    contain a goto, replace gotos to blocks that only contain a return
+    with the return, replace branches whose targets are the same block with
+    a goto, and merge blocks with their only predecessor if the predecessor
+    ends with a goto.
+    """
+    changed = False
+    for block in func.blocks:
+        exit = block.ops[-1] if block.ops else None
+        if isinstance(exit, Goto):
+            goto = cast(Goto, exit)
+            target = final_target(goto.next_block)
+            if target is not goto.next_block:
+                goto.next_block = target
+                changed = True
+            if (len(target.ops) == 1 and isinstance(target.ops[0], Return)
+                    and target is not block):
+                retval = (cast(Return, target.ops[0])).retval
+                block.ops[-1] = Return(retval)
+                changed = True
+        elif isinstance(exit, Branch):
+            branch = cast(Branch, exit)
+            true_block = final_target(branch.true_block)
+            false_block = final_target(branch.false_block)
+            if (true_block is not branch.true_block or
+                    false_block is not branch.false_block):
+                branch.true_block = true_block
+                branch.false_block = false_block
+                changed = True
+            if true_block is false_block:
+                block.ops[-1] = Goto(true_block)
+                changed = True
+    if merge_blocks(func):
+        changed = True
+    return changed
+
+
+def final_target(block: BasicBlock) -> BasicBlock:
+    """Follow a chain of blocks that only contain a goto."""
+    seen = Set[BasicBlock]()
+    while (len(block.ops) == 1 and isinstance(block.ops[0], Goto)
+           and block not in seen):
+        seen.add(block)
+        block = (cast(Goto, block.ops[0])).next_block
+    return block
+
+
+def merge_blocks(func: FuncIcode) -> bool:
+    """Append blocks to their only predecessor if it ends with a goto."""
+    changed = False
+    predecessors = predecessor_counts(func)
+    for block in func.blocks:
+        while block.ops and isinstance(block.ops[-1], Goto):
+            next = (cast(Goto, block.ops[-1])).next_block
+            if (next is block or next is func.blocks[0]
+                    or predecessors[next] != 1):
+                break
+            block.ops[-1:] = next.ops
+            next.ops = []
+            predecessors[next] = 0
+            changed = True
+    if changed:
+        # The merged blocks are no longer referenced.
+        func.blocks = [block for block in func.blocks
+                       if block.ops or block is func.blocks[0]]
+    return changed
+
+
+def predecessor_counts(func: FuncIcode) -> Dict[BasicBlock, int]:
+    """Return a map from block to the number of jumps to the block."""
+    counts = Dict[BasicBlock, int]()
+    for block in func.blocks:
+        counts.setdefault(block, 0)
+        for succ in successors(block):
+            counts[succ] = counts.get(succ, 0) + 1
+    return counts
+
+
+#
+# Unreachable block elimination
+#
+
+
+def remove_unreachable_blocks(func: FuncIcode) -> bool:
+    reachable = Set[BasicBlock]()
+    worklist = [func.blocks[0]]
+    while worklist:
+        block = worklist.pop()
+        if block not in reachable:
+            reachable.add(block)
+            worklist.extend(successors(block))
+    if len(reachable) == len(func.blocks):
+        return False
+    func.blocks = [block for block in func.blocks if block in reachable]
+    return True
+
+
+#
+# Dead register elimination
+#
+
+
+def remove_dead_operations(func: FuncIcode) -> bool:
+    """Remove operations without side effects that define dead registers."""
+    changed = False
+    live_out = liveness(func)
+    for block in func.blocks:
+        live = set(live_out[block])
+        new_ops = List[Opcode]()
+        for op in reversed(block.ops):
+            target = defined_register(op)
+            if target >= 0 and target not in live and is_removable(op):
+                changed = True
+                continue
+            if (isinstance(op, SetRR) and
+                    (cast(SetRR, op)).source == target):
+                # Copy to itself.
+                changed = True
+                continue
+            if target >= 0:
+                live.discard(target)
+            for reg in uses(op):
+                live.add(reg)
+            new_ops.append(op)
+        new_ops.reverse()
+        block.ops = new_ops
+    return changed
+
+
+def is_removable(op: Opcode) -> bool:
+    """Can op be removed if the register it defines is not used?"""
+    if isinstance(op, BinOp):
+        return (cast(BinOp, op)).op in SAFE_BINARY_OPS
+    return isinstance(op, (SetRR, SetRI, SetRNone, SetRG, UnaryOp))
+
+
+def liveness(func: FuncIcode) -> Dict[BasicBlock, Set[int]]:
+    """Return a map from block to the registers that are live at its end.
+
+    A register is live if its current value may be used later. This
+    assumes that each block ends with an exit opcode.
+    """
+    use_def = Dict[BasicBlock, Tuple[Set[int], Set[int]]]()
+    for block in func.blocks:
+        used = Set[int]()
+        defined = Set[int]()
+        for op in block.ops:
+            for reg in uses(op):
+                if reg not in defined:
+                    used.add(reg)
+            target = defined_register(op)
+            if target >= 0:
+                defined.add(target)
+        use_def[block] = (used, defined)
+    live_in = Dict[BasicBlock, Set[int]]()
+    live_out = Dict[BasicBlock, Set[int]]()
+    for block in func.blocks:
+        live_in[block] = set()
+        live_out[block] = set()
+    changed = True
+    while changed:
+        changed = False
+        for block in reversed(func.blocks):
+            out = Set[int]()
+            for succ in successors(block):
+                out.update(live_in.get(succ, set()))
+            used, defined = use_def[block]
+            new_in = used | (out - defined)
+            if out != live_out[block] or new_in != live_in[block]:
+                live_out[block] = out
+                live_in[block] = new_in
+                changed = True
+    return live_out
+
+
+#
+# Helpers
+#
+
+
+def successors(block: BasicBlock) -> List[BasicBlock]:
+    """Return the blocks that the exit opcode of a block may jump to."""
+    if not block.ops:
+        return []
+    exit = block.ops[-1]
+    if isinstance(exit, Goto):
+        return [(cast(Goto, exit)).next_block]
+    elif isinstance(exit, Branch):
+        branch = cast(Branch, exit)
+        return [branch.true_block, branch.false_block]
+    else:
+        return []
+
+
+def defined_register(op: Opcode) -> int:
+    """Return the register assigned by an opcode (or -1 if none)."""
+    if isinstance(op, (SetRR, SetRI, SetRNone, SetRG, GetAttr, CallDirect,
+                       CallMethod, Construct, BinOp, UnaryOp)):
+        return (cast(SetRR, op)).target
+    return -1
+
+
+def uses(op: Opcode) -> List[int]:
+    """Return the registers read by an opcode."""
+    if isinstance(op, SetRR):
+        return [(cast(SetRR, op)).source]
+    elif isinstance(op, SetGR):
+        return [(cast(SetGR, op)).source]
+    elif isinstance(op, GetAttr):
+        return [(cast(GetAttr, op)).object]
+    elif isinstance(op, SetAttr):
+        setattr = cast(SetAttr, op)
+        return [setattr.object, setattr.source]
+    elif isinstance(op, CallDirect):
+        return (cast(CallDirect, op)).args[:]
+    elif isinstance(op, CallMethod):
+        call = cast(CallMethod, op)
+        return [call.object] + call.args
+    elif isinstance(op, Return):
+        return [(cast(Return, op)).retval]
+    elif isinstance(op, IfR):
+        return [(cast(IfR, op)).value]
+    elif isinstance(op, UnaryOp):
+        return [(cast(UnaryOp, op)).operand]
+    elif isinstance(op, BinOp):
+        binop = cast(BinOp, op)
+        return register_operands([(binop.left, binop.left_kind),
+                                  (binop.right, binop.right_kind)])
+    elif isinstance(op, IfOp):
+        ifop = cast(IfOp, op)
+        return register_operands([(ifop.left, ifop.left_kind),
+                                  (ifop.right, ifop.right_kind)])
+    return []
+
+
+def register_operands(operands: List[Tuple[int, int]]) -> List[int]:
+    return [value for value, kind in operands if kind == REG_KIND]
+
+
+def replace_uses(op: Opcode, mapping: Dict[int, int]) -> bool:
+    """Replace registers read by an opcode according to mapping.
+
+    Return True if anything was replaced.
+    """
+    old = uses(op)
+    if not any(reg in mapping for reg in old):
+        return False
+    if isinstance(op, SetRR):
+        setrr = cast(SetRR, op)
+        setrr.source = mapping.get(setrr.source, setrr.source)
+    elif isinstance(op, SetGR):
+        setgr = cast(SetGR, op)
+        setgr.source = mapping.get(setgr.source, setgr.source)
+    elif isinstance(op, GetAttr):
+        getattr = cast(GetAttr, op)
+        getattr.object = mapping.get(getattr.object, getattr.object)
+    elif isinstance(op, SetAttr):
+        setattr = cast(SetAttr, op)
+        setattr.object = mapping.get(setattr.object, setattr.object)
+        setattr.source = mapping.get(setattr.source, setattr.source)
+    elif isinstance(op, CallDirect):
+        calldirect = cast(CallDirect, op)
+        calldirect.args = [mapping.get(arg, arg) for arg in calldirect.args]
+    elif isinstance(op, CallMethod):
+        call = cast(CallMethod, op)
+        call.object = mapping.get(call.object, call.object)
+        call.args = [mapping.get(arg, arg) for arg in call.args]
+    elif isinstance(op, Return):
+        ret = cast(Return, op)
+        ret.retval = mapping.get(ret.retval, ret.retval)
+    elif isinstance(op, IfR):
+        ifr = cast(IfR, op)
+        ifr.value = mapping.get(ifr.value, ifr.value)
+    elif isinstance(op, UnaryOp):
+        unaryop = cast(UnaryOp, op)
+        unaryop.operand = mapping.get(unaryop.operand, unaryop.operand)
+    elif isinstance(op, BinOp):
+        binop = cast(BinOp, op)
+        if binop.left_kind == REG_KIND:
+            binop.left = mapping.get(binop.left, binop.left)
+        if binop.right_kind == REG_KIND:
+            binop.right = mapping.get(binop.right, binop.right)
+    elif isinstance(op, IfOp):
+        ifop = cast(IfOp, op)
+        if ifop.left_kind == REG_KIND:
+            ifop.left = mapping.get(ifop.left, ifop.left)
+        if ifop.right_kind == REG_KIND:
+            ifop.right = mapping.get(ifop.right, ifop.right)
+    return True
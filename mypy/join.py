@@ -1,12 +1,31 @@
 """Calculation of the least upper bound types (joins)."""
 
-from typing import cast, List
+from typing import cast, List, Dict, Tuple, Any
 
 from mypy.types import (
     Type, AnyType, NoneTyp, Void, TypeVisitor, Instance, UnboundType,
-    ErrorType, TypeVar, Callable, TupleType, ErasedType, BasicTypes, TypeList
+    ErrorType, TypeVar, Callable, TupleType, ErasedType, BasicTypes, TypeList,
+    Overloaded, type_key
 )
 from mypy.subtypes import is_subtype, is_equivalent, map_instance_to_supertype
+from mypy.stats import counters
+
+
+# Results of joins, indexed by the structural keys of the operand types (see
+# mypy.types.type_key) and the BasicTypes object used. The same assumptions
+# as for mypy.subtypes.subtype_cache apply; clear_join_cache must be called
+# before each build.
+join_cache = Dict[Tuple[Any, Any, BasicTypes], Type]()
+
+# Statistics: the number of joins answered using the cache, and the number
+# of joins that had to be computed (joins of simple types are not counted).
+join_cache_stats = {'hits': 0, 'misses': 0} # type: Dict[str, int]
+
+
+def clear_join_cache() -> None:
+    join_cache.clear()
+    for key in join_cache_stats:
+        join_cache_stats[key] = 0
 
 
 def join_types(s: Type, t: Type, basic: BasicTypes) -> Type:
@@ -16,6 +35,7 @@ def join_types(s: Type, t: Type, basic: BasicTypes) -> Type:
 
     If the join does not exist, return an ErrorType instance.
     """
+    counters['joins'] += 1
     
     if isinstance(s, AnyType):
         return s
@@ -26,8 +46,31 @@ def join_types(s: Type, t: Type, basic: BasicTypes) -> Type:
     if isinstance(s, ErasedType):
         return t
 
+    if not (is_compound_type(s) and is_compound_type(t)):
+        return t.accept(TypeJoinVisitor(s, basic))
+    s_key = type_key(s)
+    t_key = type_key(t)
+    if s_key is None or t_key is None:
+        join_cache_stats['misses'] += 1
+        return t.accept(TypeJoinVisitor(s, basic))
+    key = (s_key, t_key, basic)
+    if key in join_cache:
+        join_cache_stats['hits'] += 1
+        return join_cache[key]
+    join_cache_stats['misses'] += 1
     # Use a visitor to handle non-trivial cases.
-    return t.accept(TypeJoinVisitor(s, basic))
+    result = t.accept(TypeJoinVisitor(s, basic))
+    join_cache[key] = result
+    return result
+
+
+def is_compound_type(t: Type) -> bool:
+    """Is t an instance, function or tuple type?
+
+    Operations on other types are cheaper than computing the cache key.
+    """
+    return (isinstance(t, Instance) or isinstance(t, Callable) or
+            isinstance(t, Overloaded) or isinstance(t, TupleType))
 
 
 class TypeJoinVisitor(TypeVisitor[Type]):
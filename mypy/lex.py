@@ -7,6 +7,7 @@ This module can be run as a script (lex.py FILE).
 """
 
 import re
+from sys import intern
 
 from mypy.util import short_type
 from typing import List, Undefined, Function, Dict, Any, Match, Pattern
@@ -15,6 +16,9 @@ from typing import List, Undefined, Function, Dict, Any, Match, Pattern
 class Token:
     """Base class for all tokens."""
     
+    # Programs have lots of tokens; avoid per-instance dictionaries.
+    __slots__ = ('string', 'pre', 'line')
+    
     def __init__(self, string: str, pre: str = '') -> None:
         """Initialize a token.
         
@@ -48,18 +52,26 @@ class Token:
 
 class Break(Token):
     """Statement break (line break or semicolon)"""
+    
+    __slots__ = ()
 
 
 class Indent(Token):
     """Increase block indent level."""
+    
+    __slots__ = ()
 
 
 class Dedent(Token):
     """Decrease block indent level."""
+    
+    __slots__ = ()
 
 
 class Eof(Token):
     """End of file"""
+    
+    __slots__ = ()
 
 
 class Keyword(Token):
@@ -67,19 +79,27 @@ class Keyword(Token):
 
     Examples: if, class, while, def.
     """
+    
+    __slots__ = ()
 
 
 class Name(Token):
     """An alphanumeric identifier"""
+    
+    __slots__ = ()
 
 
 class IntLit(Token):
     """Integer literal"""
+    
+    __slots__ = ()
 
 
 class StrLit(Token):
     """String literal"""
     
+    __slots__ = ()
+    
     def parsed(self) -> str:
         """Return the parsed contents of the literal."""
         return _parse_str_literal(self.string)
@@ -88,6 +108,8 @@ class StrLit(Token):
 class BytesLit(Token):
     """Bytes literal"""
     
+    __slots__ = ()
+    
     def parsed(self) -> str:
         """Return the parsed contents of the literal."""
         return _parse_str_literal(self.string)
@@ -96,6 +118,8 @@ class BytesLit(Token):
 class UnicodeLit(Token):
     """Unicode literal (Python 2.x)"""
     
+    __slots__ = ()
+    
     def parsed(self) -> str:
         """Return the parsed contents of the literal."""
         return _parse_str_literal(self.string)
@@ -103,27 +127,37 @@ class UnicodeLit(Token):
 
 class FloatLit(Token):
     """Float literal"""
+    
+    __slots__ = ()
 
 
 class Punct(Token):
     """Punctuator (e.g. comma, '(' or '=')"""
+    
+    __slots__ = ()
 
 
 class Colon(Token):
-    pass
+    __slots__ = ()
 
 
 class Op(Token):
     """Operator (e.g. '+' or 'in')"""
+    
+    __slots__ = ()
 
 
 class Bom(Token):
     """Byte order mark (at the start of a file)"""
+    
+    __slots__ = ()
 
 
 class LexError(Token):
     """Lexer error token"""
     
+    __slots__ = ('type',)
+    
     def __init__(self, string: str, type: int) -> None:
         """Initialize token.
 
@@ -183,6 +217,40 @@ punctuators = [re.compile('[=,()@]'),
                ] # type: List[Pattern]
 
 
+# Regular expression that matches the most common tokens, whitespace and
+# comments in a single step. The lexer falls back to dispatching on the
+# current character for anything else, e.g. string literals, line breaks and
+# most numeric literals. Each alternative must match exactly what the
+# corresponding lexer method would. Names followed by a quote are not
+# matched, since they may be string literal prefixes.
+fast_token_exp = re.compile(r"""
+    (?P<space>[ \t\x0c]+)
+  | (?P<comment>\#[^\n\r]*)
+  | (?P<name>[a-zA-Z_][a-zA-Z0-9_]*)(?![a-zA-Z0-9_'"])
+  | (?P<int>[0-9]+)(?![.a-zA-Z0-9_])
+  | (?P<misc>\*\*=|//=|<<=|>>=|==|!=|<=|>=|\*\*|//|<<|>>|[-+*/%&|^]=
+             |[-+*/<>%&|^~=,@]|\.(?![0-9]))
+  | (?P<colon>:)
+  | (?P<semicolon>;)
+  | (?P<open>[\[({])
+  | (?P<close>[])}])
+""", re.VERBOSE)
+
+# Token types of names that are not identifiers
+name_token_types = Dict[str, Any]()
+for _name in keywords:
+    name_token_types[_name] = Keyword
+for _name in alpha_operators:
+    name_token_types[_name] = Op
+
+# Token types of the operators and punctuators matched by fast_token_exp
+misc_token_types = Dict[str, Any]()
+for _op in '- + * / < > . % & | ^ ~ == != <= >= ** // << >>'.split():
+    misc_token_types[_op] = Op
+for _op in '= , @ -= += *= /= %= &= |= ^= **= //= <<= >>='.split():
+    misc_token_types[_op] = Punct
+
+
 # Source file encodings
 DEFAULT_ENCODING = 0
 ASCII_ENCODING = 1
@@ -317,17 +385,7 @@ class Lexer:
         # an error.
         self.lex_indent()
 
-        # Make a local copy of map as a simple optimization.
-        map = self.map
-        
-        # Lex the file. Repeatedly call the lexer method for the current char.
-        while self.i < len(s):
-            # Get the character code of the next character to lex.
-            c = ord(s[self.i])
-            # Dispatch to the relevant lexer method. This will consume some
-            # characters in the text, add a token to self.tok and increment
-            # self.i.
-            map[c]()
+        self.lex_tokens()
         
         # Append a break if there is no statement/block terminator at the end
         # of input.
@@ -345,6 +403,75 @@ class Lexer:
         
         self.add_token(Eof(''))
     
+    def lex_tokens(self) -> None:
+        """Lex the rest of the string, up to end of input.
+
+        Lex common tokens using fast_token_exp, and dispatch to a lexer
+        method based on the current character otherwise.
+        """
+        # Use local variables instead of attributes in the inner loop as an
+        # optimization. Synchronize them with the attributes when calling a
+        # lexer method.
+        s = self.s
+        n = len(s)
+        i = self.i
+        pre = self.pre_whitespace
+        line = self.line
+        tok = self.tok
+        open_brackets = self.open_brackets
+        match = fast_token_exp.match
+        map = self.map
+        t = Undefined # type: Token
+        
+        while i < n:
+            m = match(s, i)
+            if m is None:
+                # Dispatch to the relevant lexer method. This will consume some
+                # characters in the text, add a token to self.tok and
+                # increment self.i.
+                self.i = i
+                self.pre_whitespace = pre
+                map[ord(s[i])]()
+                i = self.i
+                pre = self.pre_whitespace
+                line = self.line
+                continue
+            kind = m.lastgroup
+            string = m.group()
+            i = m.end()
+            if kind == 'space':
+                pre += string
+                continue
+            elif kind == 'comment':
+                self.verify_encoding(string, COMMENT_CONTEXT)
+                pre += string
+                continue
+            elif kind == 'name':
+                # Names are often repeated; share the strings.
+                t = name_token_types.get(string, Name)(intern(string), pre)
+            elif kind == 'misc':
+                t = misc_token_types[string](string, pre)
+            elif kind == 'int':
+                t = IntLit(string, pre)
+            elif kind == 'colon':
+                t = Colon(string, pre)
+            elif kind == 'open':
+                open_brackets.append(string)
+                t = Punct(string, pre)
+            elif kind == 'close':
+                if (open_brackets != []
+                        and self.open_bracket[string] == open_brackets[-1]):
+                    open_brackets.pop()
+                t = Punct(string, pre)
+            else:
+                t = Break(string, pre)
+            t.line = line
+            tok.append(t)
+            pre = ''
+        
+        self.i = i
+        self.pre_whitespace = pre
+    
     def lex_number_or_dot(self) -> None:
         """Analyse a token starting with a dot.
 
@@ -401,7 +528,7 @@ class Lexer:
         A name can be an identifier, a keyword or an alphabetical operator.
         Also deal with prefixed string literals such as r'...'.
         """
-        s = self.match(self.name_exp)
+        s = intern(self.match(self.name_exp))
         if s in keywords:
             self.add_token(Keyword(s))
         elif s in alpha_operators:
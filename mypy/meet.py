@@ -1,22 +1,55 @@
-from typing import cast, List
+from typing import cast, List, Dict, Tuple, Any
 
-from mypy.join import is_similar_callables, combine_similar_callables
+from mypy.join import (
+    is_similar_callables, combine_similar_callables, is_compound_type
+)
 from mypy.types import (
     Type, AnyType, TypeVisitor, UnboundType, Void, ErrorType, NoneTyp, TypeVar,
-    Instance, Callable, TupleType, ErasedType, BasicTypes, TypeList
+    Instance, Callable, TupleType, ErasedType, BasicTypes, TypeList, type_key
 )
 from mypy.sametypes import is_same_type
 from mypy.subtypes import is_subtype
+from mypy.stats import counters
 
 
 # TODO Describe this module.
 
 
+# Results of meets; see mypy.join.join_cache. clear_meet_cache must be called
+# before each build.
+meet_cache = Dict[Tuple[Any, Any, BasicTypes], Type]()
+
+# Statistics: the number of meets answered using the cache, and the number
+# of meets that had to be computed (meets of simple types are not counted).
+meet_cache_stats = {'hits': 0, 'misses': 0} # type: Dict[str, int]
+
+
+def clear_meet_cache() -> None:
+    meet_cache.clear()
+    for key in meet_cache_stats:
+        meet_cache_stats[key] = 0
+
+
 def meet_types(s: Type, t: Type, basic: BasicTypes) -> Type:
+    counters['meets'] += 1
     if isinstance(s, AnyType) or isinstance(s, ErasedType):
         return s
     
-    return t.accept(TypeMeetVisitor(s, basic))
+    if not (is_compound_type(s) and is_compound_type(t)):
+        return t.accept(TypeMeetVisitor(s, basic))
+    s_key = type_key(s)
+    t_key = type_key(t)
+    if s_key is None or t_key is None:
+        meet_cache_stats['misses'] += 1
+        return t.accept(TypeMeetVisitor(s, basic))
+    key = (s_key, t_key, basic)
+    if key in meet_cache:
+        meet_cache_stats['hits'] += 1
+        return meet_cache[key]
+    meet_cache_stats['misses'] += 1
+    result = t.accept(TypeMeetVisitor(s, basic))
+    meet_cache[key] = result
+    return result
 
 
 class TypeMeetVisitor(TypeVisitor[Type]):
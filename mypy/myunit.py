@@ -1,9 +1,14 @@
+import io
+import multiprocessing
+import os
 import sys
 import re
 import time
 import traceback
 
-from typing import List, Tuple, Any, Function, overload, Undefined
+from typing import (
+    List, Dict, Tuple, Any, Function, Pattern, overload, Undefined, cast
+)
 
 
 # TODO remove global state
@@ -11,6 +16,8 @@ is_verbose = False
 is_quiet = False
 patterns = List[str]()
 times = List[Tuple[float, str]]()
+# Compiled regular expressions of test case name patterns (see match_pattern).
+pattern_cache = Dict[str, Pattern]()
 
 
 class AssertionFailure(Exception):
@@ -98,6 +105,14 @@ class TestCase:
     def tear_down(self) -> None:
         if self.suite:
             self.suite.tear_down()
+    
+    def is_isolated(self) -> bool:
+        """Can this be run concurrently with other isolated test cases?
+
+        Test cases that may use the same files as other test cases are not
+        isolated.
+        """
+        return False
 
 
 class Suite:
@@ -142,28 +157,71 @@ class Suite:
 
 
 def run_test(t: Suite, args: List[str] = None) -> None:
+    """Run the test cases of a suite that match the command line arguments.
+
+    Exit with status 1 if any test case fails.
+
+    The arguments are patterns of test case names (* matches any string;
+    by default all test cases are run) and these options:
+
+      -v           report each test case
+      -q           do not report success
+      -j N         run isolated test cases (see TestCase.is_isolated) in N
+                   worker processes
+      --shard I/N  run only every Nth matching test case, starting from
+                   test case I (1 <= I <= N); the shards of different values
+                   of I together contain all matching test cases
+      --slowest K  report the K slowest test cases
+    """
     global patterns, is_verbose, is_quiet
     if not args:
         args = []
     is_verbose = False
     is_quiet = False
     patterns = []
+    jobs = 1
+    shard = 1
+    num_shards = 1
+    num_slowest = 0
     i = 0
-    while i < len(args):
-        a = args[i]
-        if a == '-v':
-            is_verbose = True
-        elif a == '-q':
-            is_quiet = True
-        elif len(a) > 0 and a[0] != '-':
-            patterns.append(a)
-        else:
-            raise ValueError('Invalid arguments')
-        i += 1
+    try:
+        while i < len(args):
+            a = args[i]
+            if a == '-v':
+                is_verbose = True
+            elif a == '-q':
+                is_quiet = True
+            elif a == '-j' and i + 1 < len(args):
+                jobs = int(args[i + 1])
+                i += 1
+            elif a == '--shard' and i + 1 < len(args):
+                shard_str, num_shards_str = args[i + 1].split('/')
+                shard, num_shards = int(shard_str), int(num_shards_str)
+                if not 1 <= shard <= num_shards:
+                    raise ValueError()
+                i += 1
+            elif a == '--slowest' and i + 1 < len(args):
+                num_slowest = int(args[i + 1])
+                i += 1
+            elif len(a) > 0 and a[0] != '-':
+                patterns.append(a)
+            else:
+                raise ValueError()
+            i += 1
+    except ValueError:
+        raise ValueError('Invalid arguments')
     if len(patterns) == 0:
         patterns.append('*')
     
-    num_total, num_fail, num_skip = run_test_recursive(t, 0, 0, 0, '', 0)
+    tests = collect_tests(t, '', 0)
+    # Shards consist of interleaved test cases so that each shard gets a
+    # similar mix of fast and slow suites.
+    tests = tests[shard - 1::num_shards]
+    if jobs > 1 and hasattr(os, 'fork'):
+        num_fail, num_skip = run_tests_in_parallel(tests, jobs)
+    else:
+        num_fail, num_skip = run_tests(tests)
+    num_total = len(tests)
     
     skip_msg = ''
     if num_skip > 0:
@@ -178,24 +236,28 @@ def run_test(t: Suite, args: List[str] = None) -> None:
                                                            num_total,
                                                            skip_msg))
         sys.stderr.write('*** FAILURE ***\n')
+    
+    if num_slowest > 0:
+        sys.stderr.write('Slowest test cases:\n')
+        for duration, name in sorted(times, reverse=True)[:num_slowest]:
+            sys.stderr.write('  {:8.3f} s  {}\n'.format(duration, name))
+    
+    if num_fail > 0:
+        sys.exit(1)
+
 
+def collect_tests(test: Any, prefix: str,
+                  depth: int) -> List[Tuple[str, TestCase]]:
+    """Return (name, test case) tuples of test cases that match patterns.
 
-def run_test_recursive(test: Any, num_total: int, num_fail: int, num_skip: int,
-                       prefix: str, depth: int) -> Tuple[int, int, int]:
-    """The first argument may be TestCase, Suite or (str, Suite)."""
+    The first argument may be TestCase, Suite or (str, Suite).
+    """
     if isinstance(test, TestCase):
         name = prefix + test.name
         for pattern in patterns:
             if match_pattern(name, pattern):
-                match = True
-                break
-        else:
-            match = False
-        if match:
-            is_fail, is_skip = run_single_test(name, test)
-            if is_fail: num_fail += 1
-            if is_skip: num_skip += 1
-            num_total += 1
+                return [(name, cast(TestCase, test))]
+        return []
     else:
         suite = Undefined # type: Suite
         suite_prefix = ''
@@ -206,13 +268,108 @@ def run_test_recursive(test: Any, num_total: int, num_fail: int, num_skip: int,
             suite = test
             suite_prefix = test.prefix
         
+        result = List[Tuple[str, TestCase]]()
         for stest in suite.cases():
             new_prefix = prefix
             if depth > 0:
                 new_prefix = prefix + suite_prefix
-            num_total, num_fail, num_skip = run_test_recursive(
-                stest, num_total, num_fail, num_skip, new_prefix, depth + 1)
-    return num_total, num_fail, num_skip
+            result.extend(collect_tests(stest, new_prefix, depth + 1))
+        return result
+
+
+def run_tests(tests: List[Tuple[str, TestCase]]) -> Tuple[int, int]:
+    """Run test cases in this process.
+
+    Return tuple (number of failures, number of skipped test cases).
+    """
+    num_fail = 0
+    num_skip = 0
+    for name, test in tests:
+        is_fail, is_skip = run_single_test(name, test)
+        if is_fail: num_fail += 1
+        if is_skip: num_skip += 1
+    return num_fail, num_skip
+
+
+def run_tests_in_parallel(tests: List[Tuple[str, TestCase]],
+                          jobs: int) -> Tuple[int, int]:
+    """Run test cases, running isolated test cases in worker processes.
+
+    The isolated test cases are divided between the workers in a
+    round-robin fashion, and the output of each test case is reported in
+    the original order after all workers have finished. The remaining test
+    cases are run in this process after that, so that they never run
+    concurrently with other test cases. If a worker exits without sending
+    its results, its test cases fail.
+    
+    Return tuple (number of failures, number of skipped test cases).
+    """
+    isolated = [(name, test) for name, test in tests if test.is_isolated()]
+    others = [(name, test) for name, test in tests if not test.is_isolated()]
+    context = multiprocessing.get_context('fork')
+    receivers = List[Any]()
+    workers = List[Any]()
+    for i in range(min(jobs, len(isolated))):
+        receiver, sender = context.Pipe(duplex=False)
+        worker = context.Process(target=run_tests_in_worker,
+                                 args=(isolated[i::jobs], sender))
+        worker.start()
+        sender.close()
+        receivers.append(receiver)
+        workers.append(worker)
+    results = List[Tuple[bool, bool, float, str]]()
+    results.extend([None] * len(isolated))
+    for i, receiver in enumerate(receivers):
+        worker_results = List[Tuple[bool, bool, float, str]]()
+        try:
+            worker_results = receiver.recv()
+        except EOFError:
+            pass
+        receiver.close()
+        workers[i].join()
+        if workers[i].exitcode != 0:
+            # The worker died before sending its results.
+            worker_results = []
+            for name, test in isolated[i::jobs]:
+                worker_results.append((True, False, 0.0,
+                                       'Worker process exited with status {}'
+                                       '\n\n{} failed\n\n'.format(
+                                           workers[i].exitcode, name)))
+        for j, result in enumerate(worker_results):
+            results[i + j * len(receivers)] = result
+    num_fail = 0
+    num_skip = 0
+    for i, result in enumerate(results):
+        name = isolated[i][0]
+        is_fail, is_skip, duration, output = result
+        sys.stderr.write(output)
+        times.append((duration, name))
+        if is_fail: num_fail += 1
+        if is_skip: num_skip += 1
+    more_fail, more_skip = run_tests(others)
+    return num_fail + more_fail, num_skip + more_skip
+
+
+def run_tests_in_worker(tests: List[Tuple[str, TestCase]],
+                        sender: Any) -> None:
+    """Run test cases in a worker process and send back the results.
+
+    Send a list of tuples (is failure, is skipped, duration, output written
+    to stderr), one for each test case.
+    """
+    results = List[Tuple[bool, bool, float, str]]()
+    stderr = sys.stderr
+    try:
+        for name, test in tests:
+            output = io.StringIO()
+            sys.stderr = output
+            is_fail, is_skip = run_single_test(name, test)
+            results.append((is_fail, is_skip, times[-1][0],
+                            output.getvalue()))
+    finally:
+        sys.stderr = stderr
+    sender.send(results)
+    sender.close()
 
 
 def run_single_test(name: str, test: Any) -> Tuple[bool, bool]:
@@ -272,20 +429,14 @@ def typename(t: type) -> str:
 
 
 def match_pattern(s: str, p: str) -> bool:
-    if len(p) == 0:
-        return len(s) == 0
-    elif p[0] == '*':
-        if len(p) == 1:
-            return True
-        else:
-            for i in range(len(s) + 1):
-                if match_pattern(s[i:], p[1:]):
-                    return True
-            return False
-    elif len(s) == 0:
-        return False
-    else:
-        return s[0] == p[0] and match_pattern(s[1:], p[1:])
+    """Does a string match a pattern (where * matches any string)?"""
+    regexp = pattern_cache.get(p)
+    if regexp is None:
+        regexp = re.compile('.*'.join(re.escape(part)
+                                      for part in p.split('*')) + r'\Z',
+                            re.DOTALL)
+        pattern_cache[p] = regexp
+    return regexp.match(s) is not None
 
 
 def clean_traceback(tb: List[str]) -> List[str]:
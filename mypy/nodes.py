@@ -15,6 +15,9 @@ from mypy.util import dump_tagged, short_type
 
 class Context(metaclass=ABCMeta):
     """Base type for objects that are valid as error message locations."""
+    
+    __slots__ = ()
+    
     #@abstractmethod
     def get_line(self) -> int: pass
 
@@ -1249,6 +1252,20 @@ class TypeInfo(SymbolNode):
     # Method Resolution Order: the order of looking up attributes. The first
     # value always to refers to self.
     mro = Undefined(List['TypeInfo'])
+    # Full names of the classes in mro, for fast base class checks. Computed
+    # on demand; _mro_names_source is the mro list the set was computed from.
+    _mro_names = None # type: Set[str]
+    _mro_names_source = None # type: List[TypeInfo]
+    # Map from the name of each member inherited from base classes to the
+    # class that defines it and the symbol table node of the definition.
+    # Computed on demand and recomputed after the mro or the symbol tables
+    # of base classes change.
+    _members = None # type: Dict[str, Tuple[TypeInfo, SymbolTableNode]]
+    _members_source = None # type: List[TypeInfo]
+    # Symbol tables of the base classes in the mro and their versions when
+    # the map was computed
+    _members_tables = None # type: List[SymbolTable]
+    _members_versions = None # type: List[int]
     subtypes = Undefined(Set['TypeInfo']) # Direct subclasses
     names = Undefined('SymbolTable')      # Names defined directly in this type
     is_abstract = False       # Does the class have any abstract attributes?
@@ -1289,12 +1306,58 @@ class TypeInfo(SymbolNode):
         return self.type_vars is not None and len(self.type_vars) > 0
     
     def get(self, name: str) -> 'SymbolTableNode':
-        for cls in self.mro:
-            n = cls.names.get(name)
-            if n:
-                return n
+        member = self.lookup_member(name)
+        if member:
+            return member[1]
         return None
 
+    def lookup_member(self, name: str) -> Tuple['TypeInfo', 'SymbolTableNode']:
+        """Look up a member from the mro.
+
+        Return tuple (defining class, definition), or None if not found.
+        """
+        if not self.mro:
+            return None
+        node = self.mro[0].names.get(name)
+        if node:
+            return self.mro[0], node
+        return self.inherited_members().get(name)
+
+    def inherited_members(self) -> Dict[str, Tuple['TypeInfo',
+                                                   'SymbolTableNode']]:
+        """Return a map from the names of members defined in base classes to
+        (defining class, definition).
+
+        Members are looked up from the mro, so overridden members refer to
+        the overriding definition. The map is recomputed if the mro or the
+        symbol table of a base class has changed since it was computed, so
+        modifying the symbol table of this class (for example, during
+        semantic analysis) is cheap.
+        """
+        if self._members_source is not self.mro or self.members_changed():
+            members = Dict[str, Tuple[TypeInfo, SymbolTableNode]]()
+            for cls in reversed(self.mro[1:]):
+                for name, node in cls.names.items():
+                    members[name] = (cls, node)
+            self._members = members
+            self._members_source = self.mro
+            self._members_tables = [cls.names for cls in self.mro[1:]]
+            self._members_versions = [cls.names.version
+                                      for cls in self.mro[1:]]
+        return self._members
+
+    def members_changed(self) -> bool:
+        """Has a base class been modified since the map of inherited members
+        was computed?"""
+        tables = self._members_tables
+        versions = self._members_versions
+        if len(tables) != len(self.mro) - 1:
+            return True
+        for i, cls in enumerate(self.mro[1:]):
+            if cls.names is not tables[i] or cls.names.version != versions[i]:
+                return True
+        return False
+
     def __getitem__(self, name: str) -> 'SymbolTableNode':
         n = self.get(name)
         if n:
@@ -1304,7 +1367,19 @@ class TypeInfo(SymbolNode):
 
     def __repr__(self) -> str:
         return '<TypeInfo %s>' % self.fullname()
-        
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the attributes to pickle (omit cached lookup tables).
+
+        The tables are only valid in the process that computed them.
+        """
+        state = self.__dict__.copy()
+        for name in ('_mro_names', '_mro_names_source', '_members',
+                     '_members_source', '_members_tables',
+                     '_members_versions'):
+            state.pop(name, None)
+        return state
+
     
     # IDEA: Refactor the has* methods to be more consistent and document
     #       them.
@@ -1322,13 +1397,9 @@ class TypeInfo(SymbolNode):
         return self.get_method(name) is not None
     
     def get_var(self, name: str) -> Var:
-        for cls in self.mro:
-            if name in cls.names:
-                node = cls.names[name].node
-                if isinstance(node, Var):
-                    return cast(Var, node)
-                else:
-                    return None
+        member = self.lookup_member(name)
+        if member and isinstance(member[1].node, Var):
+            return cast(Var, member[1].node)
         return None
     
     def get_var_or_getter(self, name: str) -> SymbolNode:
@@ -1340,13 +1411,9 @@ class TypeInfo(SymbolNode):
         return self.get_var(name)
     
     def get_method(self, name: str) -> FuncBase:
-        for cls in self.mro:
-            if name in cls.names:
-                node = cls.names[name].node
-                if isinstance(node, FuncBase):
-                    return cast(FuncBase, node)
-                else:
-                    return None
+        member = self.lookup_member(name)
+        if member and isinstance(member[1].node, FuncBase):
+            return cast(FuncBase, member[1].node)
         return None
 
     def calculate_mro(self) -> None:
@@ -1361,18 +1428,19 @@ class TypeInfo(SymbolNode):
 
         This can be either via extension or via implementation.
         """
-        for cls in self.mro:
-            if cls.fullname() == fullname:
-                return True
-        return False
+        if self._mro_names_source is not self.mro:
+            # The mro has been (re)calculated since the set was computed.
+            self._mro_names = set(cls.fullname() for cls in self.mro)
+            self._mro_names_source = self.mro
+        return fullname in self._mro_names
     
     def all_subtypes(self) -> 'Set[TypeInfo]':
         """Return TypeInfos of all subtypes, including this type, as a set."""
-        set = set([self])
+        result = set([self])
         for subt in self.subtypes:
             for t in subt.all_subtypes():
-                set.add(t)
-        return set
+                result.add(t)
+        return result
     
     def all_base_classes(self) -> 'List[TypeInfo]':
         """Return a list of base classes, including indirect bases."""
@@ -1453,6 +1521,18 @@ class SymbolTableNode:
 
 
 class SymbolTable(Dict[str, SymbolTableNode]):
+    # Number of modifications of the table. Used to detect stale member maps
+    # of classes (see TypeInfo.members).
+    version = 0
+    
+    def __setitem__(self, name: str, node: SymbolTableNode) -> None:
+        self.version += 1
+        super().__setitem__(name, node)
+
+    def __delitem__(self, name: str) -> None:
+        self.version += 1
+        super().__delitem__(name)
+
     def __str__(self) -> str:
         a = List[str]()
         for key, value in self.items():
@@ -62,7 +62,7 @@ none = Token('') # Empty token
 
 
 def parse(s: str, fnam: str = None, errors: Errors = None,
-          pyversion: int = 3) -> MypyFile:
+          pyversion: int = 3, preserve_repr: bool = True) -> MypyFile:
     """Parse a source file, without doing any semantic analysis.
 
     Return the parse tree. If errors is not provided, raise ParseError
@@ -70,8 +70,12 @@ def parse(s: str, fnam: str = None, errors: Errors = None,
 
     The pyversion argument determines the Python syntax variant (2 for 2.x and
     3 for 3.x).
+
+    If preserve_repr is False, do not record the tokens of nodes (the repr
+    attributes of nodes will be None). This saves time and memory, but the
+    tree cannot be pretty-printed or transformed to source code.
     """
-    parser = Parser(fnam, errors, pyversion)
+    parser = Parser(fnam, errors, pyversion, preserve_repr)
     tree = parser.parse(s)
     tree.path = fnam
     return tree
@@ -87,10 +91,14 @@ class Parser:
     is_class_body = False
     # All import nodes encountered so far in this parse unit.
     imports = Undefined(List[Node])
+    # Record the tokens of nodes in node representations?
+    preserve_repr = True
     
-    def __init__(self, fnam: str, errors: Errors, pyversion: int) -> None:
+    def __init__(self, fnam: str, errors: Errors, pyversion: int,
+                 preserve_repr: bool = True) -> None:
         self.raise_on_error = errors is None
         self.pyversion = pyversion
+        self.preserve_repr = preserve_repr
         if errors is not None:
             self.errors = errors
         else:
@@ -1363,10 +1371,12 @@ class Parser:
                 and expr.callee.name == 'super'):
             # super() expression
             node = SuperExpr(name.string)
-            self.set_repr(node,
-                          noderepr.SuperExprRepr(expr.callee.repr.id,
-                                                 expr.repr.lparen,
-                                                 expr.repr.rparen, dot, name))
+            if self.preserve_repr:
+                self.set_repr(node,
+                              noderepr.SuperExprRepr(expr.callee.repr.id,
+                                                     expr.repr.lparen,
+                                                     expr.repr.rparen, dot,
+                                                     name))
         else:
             node = MemberExpr(expr, name.string)
             self.set_repr(node, noderepr.MemberExprRepr(dot, name))
@@ -1597,7 +1607,8 @@ class Parser:
     # Representation management
     
     def set_repr(self, node: Node, repr: Any) -> None:
-        node.repr = repr
+        if self.preserve_repr:
+            node.repr = repr
     
     def repr(self, node: Node) -> Any:
         return node.repr
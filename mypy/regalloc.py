@@ -0,0 +1,210 @@
+"""Allocate storage for the registers of icode functions (see mypy.icode).
+
+By default, each icode register of a function is stored in a separate slot
+of the function's stack frame, and all the slots are initialized on entry so
+that the garbage collector never sees uninitialized values. The C compiler
+can't keep frame slots in machine registers, since they are visible to
+other functions.
+
+allocate_registers stores in the frame only the registers whose values
+must be visible to the garbage collector, i.e. those that are live across a
+call or an allocation (see is_gc_point), plus the arguments, which the
+caller stores in the first slots. All other registers are stored in C local
+variables. Registers whose live ranges do not overlap share a frame slot or
+a local variable (linear scan over live intervals). Only the frame slots and
+the registers whose initial value may be used need to be initialized.
+
+Int operations may also call runtime functions that allocate (for long ints)
+without being GC points. Thus these runtime functions must not collect
+garbage; they defer the collection to the next allocation or function entry
+(see MCollectIfPending in vm/mypy.h). Function entry is a GC point, since
+it precedes loading the arguments into local variables.
+"""
+
+from typing import List, Dict, Set, Tuple
+
+from mypy.icode import (
+    FuncIcode, Opcode, CallDirect, CallMethod, Construct, REF
+)
+from mypy.icodeopt import (
+    add_fall_through_gotos, liveness, defined_register, uses
+)
+
+
+class RegisterAllocation:
+    """Storage locations of the registers of a function.
+
+    Attributes:
+      frame_size:  Number of slots in the stack frame (arguments are stored
+                   in the first slots)
+      frame_slots: Map from register to frame slot
+      locals:      Map from register to the number of a C local variable
+      num_locals:  Number of C local variables
+      initialized: Registers other than arguments whose initial value may
+                   be used, and which thus must be initialized on entry
+    """
+
+    def __init__(self, frame_size: int, frame_slots: Dict[int, int],
+                 locals: Dict[int, int], num_locals: int,
+                 initialized: Set[int]) -> None:
+        self.frame_size = frame_size
+        self.frame_slots = frame_slots
+        self.locals = locals
+        self.num_locals = num_locals
+        self.initialized = initialized
+
+    def initial_frame_values(self, func: FuncIcode) -> List[int]:
+        """Return the register types (INT or REF) of the values used to
+        initialize the frame slots after the arguments."""
+        types = [REF] * (self.frame_size - func.num_args)
+        for reg, slot in self.frame_slots.items():
+            if reg in self.initialized:
+                types[slot - func.num_args] = func.register_types[reg]
+        return types
+
+
+def frame_allocation(func: FuncIcode) -> RegisterAllocation:
+    """Store each register in a separate frame slot."""
+    slots = Dict[int, int]()
+    for reg in range(func.num_registers):
+        slots[reg] = reg
+    return RegisterAllocation(func.num_registers, slots, {}, 0,
+                              set(range(func.num_args, func.num_registers)))
+
+
+def allocate_registers(func: FuncIcode) -> RegisterAllocation:
+    """Store in the frame only registers visible to the garbage collector.
+
+    This may add gotos to blocks (see mypy.icodeopt.add_fall_through_gotos).
+    """
+    add_fall_through_gotos(func)
+    intervals, in_frame, initialized = live_intervals(func)
+    frame_regs = List[Tuple[int, int, int]]()
+    local_regs = List[Tuple[int, int, int]]()
+    for reg, interval in intervals.items():
+        start, end = interval
+        if reg < func.num_args and reg in in_frame:
+            # The argument stays in its slot.
+            continue
+        if reg in in_frame:
+            frame_regs.append((start, end, reg))
+        else:
+            local_regs.append((start, end, reg))
+    # The slots of the arguments are reserved until the last use of the
+    # argument.
+    reserved = List[Tuple[int, int]]()
+    for reg in range(func.num_args):
+        if reg in in_frame and reg in intervals:
+            reserved.append((intervals[reg][1], reg))
+    frame_slots, frame_size = linear_scan(frame_regs, func.num_args,
+                                          reserved)
+    for reg in range(func.num_args):
+        if reg in in_frame:
+            frame_slots[reg] = reg
+    locals, num_locals = linear_scan(local_regs, 0, [])
+    return RegisterAllocation(frame_size, frame_slots, locals, num_locals,
+                              initialized)
+
+
+def live_intervals(func: FuncIcode) -> Tuple[Dict[int, Tuple[int, int]],
+                                             Set[int], Set[int]]:
+    """Compute the live intervals of registers.
+
+    Number opcodes consecutively over all blocks. The interval of a register
+    covers all opcodes where the register is defined, used or live.
+
+    Return tuple (map from register to (first opcode, last opcode),
+    registers live across a GC point, registers other than arguments that
+    are live at function entry).
+    """
+    live_out = liveness(func)
+    intervals = Dict[int, Tuple[int, int]]()
+    in_frame = Set[int]()
+    initialized = Set[int]()
+    base = 0
+    for block in func.blocks:
+        live = set(live_out[block])
+        for i in reversed(range(len(block.ops))):
+            op = block.ops[i]
+            pos = base + i
+            target = defined_register(op)
+            if is_gc_point(op):
+                for reg in live:
+                    if reg != target:
+                        in_frame.add(reg)
+            for reg in live:
+                extend_interval(intervals, reg, pos)
+            if target >= 0:
+                extend_interval(intervals, target, pos)
+                live.discard(target)
+            for reg in uses(op):
+                extend_interval(intervals, reg, pos)
+                live.add(reg)
+        if block is func.blocks[0]:
+            for reg in live:
+                # The initial value is used.
+                extend_interval(intervals, reg, 0)
+                if reg >= func.num_args:
+                    initialized.add(reg)
+        base += len(block.ops)
+    for reg in range(func.num_args):
+        if reg in intervals:
+            # Arguments are defined on entry.
+            extend_interval(intervals, reg, 0)
+    return intervals, in_frame, initialized
+
+
+def extend_interval(intervals: Dict[int, Tuple[int, int]], reg: int,
+                    pos: int) -> None:
+    if reg in intervals:
+        start, end = intervals[reg]
+        intervals[reg] = (min(start, pos), max(end, pos))
+    else:
+        intervals[reg] = (pos, pos)
+
+
+def linear_scan(intervals: List[Tuple[int, int, int]], first: int,
+                reserved: List[Tuple[int, int]]) -> Tuple[Dict[int, int],
+                                                          int]:
+    """Assign locations to registers so that registers with overlapping
+    live intervals get different locations.
+
+    The intervals are (start, end, register) tuples. Locations are numbered
+    from first, and the reserved locations are in use until the end of the
+    given (end, location) tuples.
+
+    Return tuple (map from register to location, number of locations
+    including the locations before first).
+    """
+    locations = Dict[int, int]()
+    active = List[Tuple[int, int]]()  # (end, location)
+    free = List[int]()
+    reserved_locs = [loc for end, loc in reserved]
+    for loc in range(first):
+        if loc not in reserved_locs:
+            free.append(loc)
+    active.extend(reserved)
+    size = first
+    for start, end, reg in sorted(intervals):
+        # Expire intervals that ended before this one starts.
+        for item in active[:]:
+            if item[0] < start:
+                active.remove(item)
+                free.append(item[1])
+        if free:
+            loc = min(free)
+            free.remove(loc)
+        else:
+            loc = size
+            size += 1
+        locations[reg] = loc
+        active.append((end, loc))
+    return locations, size
+
+
+def is_gc_point(op: Opcode) -> bool:
+    """May the garbage collector run during op?
+
+    Calls and allocations are GC points.
+    """
+    return isinstance(op, (CallDirect, CallMethod, Construct))
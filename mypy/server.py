@@ -0,0 +1,152 @@
+"""Type checking server that keeps analyzed modules in memory.
+
+Type checking a program from the command line repeats all the work for
+every run, even if only a single file has changed: the interpreter is
+started, mypy is imported, and all the imported modules (including
+builtins and other stubs) are parsed, analyzed and type checked. A server
+runs until stopped and keeps the modules it has type checked in an
+in-memory snapshot (see mypy.snapshot). Each build takes the modules whose
+sources have not changed from the snapshot, and only modified modules and
+the modules that depend on them are processed again.
+
+The server listens on a Unix domain socket. A client (see
+scripts/mypy-client) connects to the socket and sends a single request,
+which is one of these tuples:
+
+  ('check', cwd, paths)  Type check the programs in the given files.
+                         Relative paths and paths in error messages are
+                         relative to directory cwd.
+  ('stop',)              Shut down the server.
+
+The server replies with a list of error messages (empty if there were no
+errors). If mypy fails with an internal error, the messages include the
+traceback of the error. Requests and replies are pickled objects, as sent
+by the Connection objects of multiprocessing.connection.
+
+Since the server unpickles requests, only the user running the server may
+connect to it. The socket is created with permissions 0600, and clients
+must also authenticate with a random key that the server generates when it
+starts and writes to the file socket + '.key' (see authkey_path), again
+only readable by the user. The key file is removed when the server stops.
+"""
+
+import os
+import os.path
+import traceback
+
+from typing import List, Any
+
+from multiprocessing.connection import Listener, AuthenticationError
+
+from mypy import build
+from mypy.errors import CompileError
+from mypy.snapshot import StubSnapshot
+
+
+class Server:
+    """Server that type checks programs on request.
+
+    Each program is type checked as if by scripts/mypy -S, using the build
+    options given when constructing the server. Programs are built one at a
+    time.
+    """
+
+    def __init__(self, address: str, bin_dir: str = None,
+                 pyversion: int = 3, flags: List[str] = None,
+                 alt_lib_path: str = None) -> None:
+        """Construct a server.
+
+        Arguments:
+          address: path of the Unix domain socket to listen on
+        The optional arguments are as for mypy.build.build.
+        """
+        self.address = address
+        # The current directory changes between requests.
+        self.bin_dir = bin_dir and os.path.abspath(bin_dir)
+        self.pyversion = pyversion
+        self.flags = flags or []
+        self.alt_lib_path = alt_lib_path and os.path.abspath(alt_lib_path)
+        self.snapshot = StubSnapshot(pyversion)
+
+    def serve(self) -> None:
+        """Handle requests until a client asks the server to stop."""
+        authkey = os.urandom(32)
+        # Create the key file and the socket readable only by the user.
+        umask = os.umask(0o177)
+        try:
+            write_authkey(self.address, authkey)
+            listener = Listener(self.address, 'AF_UNIX', authkey=authkey)
+        finally:
+            os.umask(umask)
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, EOFError, IOError):
+                    # The client did not authenticate or went away.
+                    continue
+                try:
+                    request = conn.recv() # type: Any
+                    if request[0] == 'stop':
+                        conn.send([])
+                        break
+                    conn.send(self.check(request[1], request[2]))
+                except (EOFError, IOError):
+                    # The client went away; wait for the next one.
+                    pass
+                finally:
+                    conn.close()
+        finally:
+            listener.close()
+            os.remove(authkey_path(self.address))
+
+    def check(self, cwd: str, paths: List[str]) -> List[str]:
+        """Type check programs and return the error messages.
+
+        If a build fails with an internal error, report the traceback and
+        drop the snapshot: the failed build may have left the modules that
+        it took from the snapshot in an inconsistent state.
+        """
+        os.chdir(cwd)
+        messages = List[str]()
+        for path in paths:
+            try:
+                build.build(path,
+                            target=build.TYPE_CHECK,
+                            bin_dir=self.bin_dir,
+                            pyversion=self.pyversion,
+                            flags=self.flags,
+                            alt_lib_path=self.alt_lib_path,
+                            snapshot=self.snapshot)
+            except CompileError as e:
+                messages.extend(e.messages)
+            except Exception:
+                messages.append('{}: mypy: internal error:'.format(path))
+                messages.extend(traceback.format_exc().rstrip().split('\n'))
+                self.snapshot = StubSnapshot(self.pyversion)
+        return messages
+
+
+def authkey_path(address: str) -> str:
+    """Return the path of the authentication key file of a server."""
+    return address + '.key'
+
+
+def write_authkey(address: str, authkey: bytes) -> None:
+    """Write the authentication key of a server to a new file that only the
+    user can read.
+
+    The key is written to a temporary file that is then renamed, so that
+    clients never read a partially written key.
+    """
+    path = authkey_path(address)
+    temp_path = path + '.tmp'
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    f = os.fdopen(fd, 'wb')
+    try:
+        f.write(authkey)
+    finally:
+        f.close()
+    os.rename(temp_path, path)
@@ -0,0 +1,183 @@
+"""Snapshots of analyzed library stub modules.
+
+Every build parses, semantically analyzes and type checks builtins, typing
+and the other stubs imported by the program. For small programs this is
+most of the build time. A snapshot stores the trees of such modules after
+type checking (including their symbol tables, TypeInfo objects with mros
+and function signatures) in a single pickled file, and a build that uses a
+snapshot (see the snapshot_path argument of mypy.build.build) takes the
+modules in the snapshot from it instead of processing their source files.
+
+A snapshot is created for a specific Python version by
+mypy.build.create_snapshot. It is ignored if the source file of any module
+in it has changed, or if a module would be found in a different file
+during the build (for example, if the program directory shadows a stub).
+
+A snapshot can also be kept in memory over several builds (see the snapshot
+argument of mypy.build.build). Each build then adds the modules it type
+checks to the snapshot, and removes modules whose sources have changed,
+together with the modules that depend on them.
+"""
+
+import gc
+import os.path
+import pickle
+
+from typing import Dict, List, Set, Any
+
+from mypy.cache import source_hash
+from mypy.nodes import MypyFile, MODULE_REF
+
+
+# Increment this when the format of snapshot files changes.
+SNAPSHOT_VERSION = 2
+
+
+class StubSnapshot:
+    """Analyzed modules that can be used instead of processing their sources.
+
+    Every module in a snapshot is accompanied by all the modules it depends
+    on.
+
+    Attributes:
+      pyversion: Python version the snapshot was created for (2 or 3)
+      modules:   Map from module id to the type checked tree of the module
+      hashes:    Map from module id to the hash of its source
+      paths:     Map from module id to the absolute path of its source file
+      dependencies:
+                 Map from module id to the ids of the modules it directly
+                 depends on
+    """
+
+    def __init__(self, pyversion: int,
+                 modules: Dict[str, MypyFile] = None,
+                 hashes: Dict[str, str] = None,
+                 paths: Dict[str, str] = None,
+                 dependencies: Dict[str, List[str]] = None) -> None:
+        self.pyversion = pyversion
+        self.modules = modules or {}
+        self.hashes = hashes or {}
+        self.paths = paths or {}
+        self.dependencies = dependencies or {}
+    
+    def add(self, id: str, tree: MypyFile, hash: str, path: str,
+            dependencies: List[str]) -> None:
+        """Add a type checked module to the snapshot."""
+        self.modules[id] = tree
+        self.hashes[id] = hash
+        self.paths[id] = os.path.abspath(path)
+        self.dependencies[id] = dependencies
+    
+    def stale_modules(self) -> List[str]:
+        """Return the modules that can no longer be used.
+
+        These are modules whose source files have changed or cannot be
+        read, and modules that depend on a module that is not in the
+        snapshot.
+        """
+        stale = List[str]()
+        for id in self.modules:
+            try:
+                text = read_source(self.paths[id])
+            except IOError:
+                stale.append(id)
+                continue
+            if source_hash(text) != self.hashes[id]:
+                stale.append(id)
+            elif any(dep not in self.modules
+                     for dep in self.dependencies[id]):
+                stale.append(id)
+        return stale
+    
+    def remove_modules(self, ids: List[str]) -> List[str]:
+        """Remove modules and the modules that depend on them.
+
+        Also remove references to submodules that are not in the snapshot
+        from the symbol tables of packages: the next build adds them back
+        if the submodules are imported. Return the ids of the removed
+        modules that were in the snapshot.
+        """
+        dependents = Dict[str, List[str]]()
+        for id, deps in self.dependencies.items():
+            for dep in deps:
+                dependents.setdefault(dep, []).append(id)
+        removed = Set[str]()
+        pending = list(ids)
+        while pending:
+            id = pending.pop()
+            if id not in removed:
+                removed.add(id)
+                pending.extend(dependents.get(id, []))
+        result = List[str]()
+        for id in sorted(removed):
+            if id in self.modules:
+                del self.modules[id]
+                del self.hashes[id]
+                del self.paths[id]
+                del self.dependencies[id]
+                result.append(id)
+        for id, tree in self.modules.items():
+            prefix = id + '.'
+            for name, node in list(tree.names.items()):
+                if (node.kind == MODULE_REF and
+                        isinstance(node.node, MypyFile) and
+                        node.node.fullname() == prefix + name and
+                        self.modules.get(prefix + name) is not node.node):
+                    del tree.names[name]
+        return result
+
+
+def write_snapshot(path: str, snapshot: StubSnapshot) -> None:
+    """Write a snapshot to a file."""
+    data = {'version': SNAPSHOT_VERSION,
+            'pyversion': snapshot.pyversion,
+            'hashes': snapshot.hashes,
+            'paths': snapshot.paths,
+            'dependencies': snapshot.dependencies,
+            'modules': snapshot.modules}
+    f = open(path, 'wb')
+    try:
+        pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+    finally:
+        f.close()
+
+
+def load_snapshot(path: str, pyversion: int) -> StubSnapshot:
+    """Load a snapshot file.
+
+    Return None if the file cannot be read, if it was created for a
+    different Python version or by a different version of mypy, or if the
+    source file of any module in the snapshot has changed.
+    """
+    data = None # type: Dict[str, Any]
+    try:
+        f = open(path, 'rb')
+        # Loading creates many objects but no garbage, so collecting garbage
+        # during loading would be a waste of time.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            data = pickle.load(f)
+        finally:
+            if gc_enabled:
+                gc.enable()
+            f.close()
+    except (IOError, EOFError, pickle.UnpicklingError):
+        return None
+    if (not isinstance(data, dict) or
+            data.get('version') != SNAPSHOT_VERSION or
+            data.get('pyversion') != pyversion):
+        return None
+    snapshot = StubSnapshot(pyversion, data['modules'], data['hashes'],
+                            data['paths'], data['dependencies'])
+    if snapshot.stale_modules():
+        return None
+    return snapshot
+
+
+def read_source(path: str) -> str:
+    f = open(path)
+    try:
+        return f.read()
+    finally:
+        f.close()
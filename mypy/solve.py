@@ -7,6 +7,7 @@ from mypy.constraints import Constraint, SUPERTYPE_OF
 from mypy.join import join_types
 from mypy.meet import meet_types
 from mypy.subtypes import is_subtype
+from mypy.stats import counters
 
 
 def solve_constraints(vars: List[int], constraints: List[Constraint],
@@ -16,6 +17,7 @@ def solve_constraints(vars: List[int], constraints: List[Constraint],
     Return lower bound for each type variable or None if the variable could
     not be solved.
     """
+    counters['constraint solves'] += 1
     # Collect a list of constraints for each type variable.
     cmap = Dict[int, List[Constraint]]()
     for con in constraints:
@@ -1,20 +1,71 @@
-from typing import cast, List, Dict
+from typing import cast, List, Dict, Tuple, Any
 
 from mypy.types import (
     Type, AnyType, UnboundType, TypeVisitor, ErrorType, Void, NoneTyp,
-    Instance, TypeVar, Callable, TupleType, Overloaded, ErasedType, TypeList
+    Instance, TypeVar, Callable, TupleType, Overloaded, ErasedType, TypeList,
+    type_key
 )
 from mypy.nodes import TypeInfo
 from mypy.expandtype import expand_type
+from mypy.stats import counters
+
+
+# Results of subtype checks, indexed by the structural keys of the types
+# (see mypy.types.type_key). The keys refer to TypeInfo objects, whose bases
+# must not change while they are in use; clear_subtype_cache must be called
+# before each build.
+subtype_cache = Dict[Tuple[Any, Any], bool]()
+
+# Statistics: the number of subtype checks answered using the cache, and the
+# number of checks that had to be computed. Checks that are not worth caching
+# (see is_expensive_subtype_check) are not counted.
+subtype_cache_stats = {'hits': 0, 'misses': 0} # type: Dict[str, int]
+
+
+def clear_subtype_cache() -> None:
+    subtype_cache.clear()
+    for key in subtype_cache_stats:
+        subtype_cache_stats[key] = 0
 
 
 def is_subtype(left: Type, right: Type) -> bool:
     """Is 'left' subtype of 'right'?"""
+    counters['subtype checks'] += 1
     if (isinstance(right, AnyType) or isinstance(right, UnboundType)
             or isinstance(right, ErasedType)):
         return True
-    else:
+    if not is_expensive_subtype_check(left, right):
+        return left.accept(SubtypeVisitor(right))
+    left_key = type_key(left)
+    right_key = type_key(right)
+    if left_key is None or right_key is None:
+        subtype_cache_stats['misses'] += 1
         return left.accept(SubtypeVisitor(right))
+    key = (left_key, right_key)
+    if key in subtype_cache:
+        subtype_cache_stats['hits'] += 1
+        return subtype_cache[key]
+    subtype_cache_stats['misses'] += 1
+    result = left.accept(SubtypeVisitor(right))
+    subtype_cache[key] = result
+    return result
+
+
+def is_expensive_subtype_check(left: Type, right: Type) -> bool:
+    """Is checking whether left is a subtype of right worth caching?
+
+    Checks against non-generic instances and checks involving simple types
+    (such as Any and type variables) are cheaper than computing the cache
+    key.
+    """
+    if isinstance(right, Instance):
+        if not cast(Instance, right).args:
+            return False
+    elif not (isinstance(right, Callable) or isinstance(right, Overloaded) or
+              isinstance(right, TupleType)):
+        return False
+    return (isinstance(left, Instance) or isinstance(left, Callable) or
+            isinstance(left, Overloaded) or isinstance(left, TupleType))
 
 
 def is_equivalent(a: Type, b: Type) -> bool:
@@ -55,6 +106,8 @@ class SubtypeVisitor(TypeVisitor[bool]):
             rname = right.type.fullname()
             if not left.type.has_base(rname) and rname != 'builtins.object':
                 return False
+            if not right.args:
+                return True
             
             # Map left type to corresponding right instances.
             t = map_instance_to_supertype(left, right.type)
@@ -15,9 +15,13 @@ def parse_test_cases(
             perform: Function[['DataDrivenTestCase'], None],
             base_path: str = '.',
             optional_out: bool = False,
-            include_path: str = None) -> List['DataDrivenTestCase']:
+            include_path: str = None,
+            isolated: bool = True) -> List['DataDrivenTestCase']:
     """Parse a file with test case descriptions.
 
+    If isolated is False, the test cases use fixed files and can't be run
+    concurrently (see TestCase.is_isolated).
+
     Return an array of test cases.
     """
     
@@ -69,7 +73,7 @@ def parse_test_cases(
                 input = expand_includes(p[i0].data, include_path)
                 expand_errors(input, tcout, 'main')
                 tc = DataDrivenTestCase(p[i0].arg, input, tcout, path,
-                                        p[i0].line, perform, files)
+                                        p[i0].line, perform, files, isolated)
                 out.append(tc)
         if not ok:
             raise ValueError(
@@ -93,7 +97,10 @@ class DataDrivenTestCase(TestCase):
     
     clean_up = Undefined(List[Tuple[bool, str]])
     
-    def __init__(self, name, input, output, file, line, perform, files):
+    isolated = True
+    
+    def __init__(self, name, input, output, file, line, perform, files,
+                 isolated=True):
         super().__init__(name)
         self.input = input
         self.output = output
@@ -101,6 +108,7 @@ class DataDrivenTestCase(TestCase):
         self.line = line
         self.perform = perform
         self.files = files
+        self.isolated = isolated
     
     def set_up(self) -> None:
         super().set_up()
@@ -132,6 +140,9 @@ class DataDrivenTestCase(TestCase):
         else:
             self.perform(self)
     
+    def is_isolated(self) -> bool:
+        return self.isolated and not self.files
+    
     def tear_down(self) -> None:
         for is_dir, path in reversed(self.clean_up):
             if is_dir:
@@ -0,0 +1,769 @@
+"""Test cases for build management (mypy.build)."""
+
+import json
+import os
+import os.path
+import pickle
+import shutil
+import stat
+import sys
+import threading
+import time
+
+import typing
+from typing import Dict, List, Any, cast
+
+from multiprocessing.connection import Client, AuthenticationError
+
+from mypy import build
+from mypy import cache
+from mypy.nodes import (
+    MypyFile, SymbolTable, SymbolTableNode, TypeInfo, Var, GDEF
+)
+from mypy.server import Server, authkey_path
+from mypy.snapshot import load_snapshot
+from mypy.stats import BuildStats
+from mypy.types import AnyType
+from mypy.myunit import Suite, assert_equal, assert_true, fail, run_test
+from mypy.test.config import test_temp_dir
+from mypy.errors import CompileError
+
+
+def write_module(id: str, text: str) -> None:
+    """Write the source file of a module to the test directory.
+
+    The id may refer to a module in a package directory (e.g. 'p/m').
+    """
+    f = open(os.path.join(test_temp_dir, id + '.py'), 'w')
+    f.write(text)
+    f.close()
+
+
+def build_program(program_text: str, flags: List[str] = None,
+                  cache_dir: str = None, jobs: int = 1,
+                  snapshot_path: str = None,
+                  stats: BuildStats = None) -> List[str]:
+    """Type check a program that imports modules in the test directory.
+
+    Use the test builtins. Return the error messages ([] if no errors).
+    """
+    try:
+        build.build('main',
+                    target=build.TYPE_CHECK,
+                    program_text=program_text,
+                    flags=[build.TEST_BUILTINS] + (flags or []),
+                    alt_lib_path=test_temp_dir,
+                    cache_dir=cache_dir,
+                    jobs=jobs,
+                    snapshot_path=snapshot_path,
+                    stats=stats)
+    except CompileError as e:
+        return e.messages
+    return []
+
+
+class IncrementalBuildSuite(Suite):
+    """Test reusing cached type checking results of modules."""
+
+    cache_dir = os.path.join(test_temp_dir, 'cache')
+
+    def set_up(self) -> None:
+        self.remove_cache()
+        write_module('m', 'x = 1\n'
+                          'class A:\n'
+                          '    def f(self) -> None:\n'
+                          '        self.y = ""\n')
+
+    def tear_down(self) -> None:
+        self.remove_cache()
+        os.remove(os.path.join(test_temp_dir, 'm.py'))
+
+    def test_cache_files_created(self) -> None:
+        assert_equal(self.check('import m'), [])
+        assert_true(os.path.isfile(os.path.join(self.cache_dir,
+                                                'm.cache')))
+        assert_true(os.path.isfile(os.path.join(self.cache_dir,
+                                                '__main__.cache')))
+
+    def test_inferred_types_restored_from_cache(self) -> None:
+        assert_equal(self.check('import m'), [])
+        assert_equal(self.check('import m\n'
+                                'm.x + 1\n'
+                                'm.A().y + 1'),
+                     ['main, line 2: Unsupported left operand type for + '
+                      '("int")',
+                      'main, line 3: Unsupported left operand type for + '
+                      '("str")'])
+
+    def test_modified_module_is_checked(self) -> None:
+        assert_equal(self.check('import m'), [])
+        write_module('m', 'x = 1 + ""')
+        assert_equal(self.check('import m'),
+                     ['In module imported in main, line 1:',
+                      'tmp/m.py, line 1: Unsupported left operand type '
+                      'for + ("int")'])
+
+    def test_module_with_errors_not_cached(self) -> None:
+        write_module('m', 'x = 1 + ""')
+        self.check('import m')
+        assert_true(not os.path.isfile(os.path.join(self.cache_dir,
+                                                    'm.cache')))
+
+    def test_corrupt_cache_file_ignored(self) -> None:
+        for data in b'', b'\x80', b'garbage', b'\x80\x04K\x01.':
+            assert_equal(self.check('import m'), [])
+            path = os.path.join(self.cache_dir, 'm.cache')
+            f = open(path, 'rb')
+            contents = f.read()
+            f.close()
+            for text in data, contents[:len(contents) // 2]:
+                f = open(path, 'wb')
+                f.write(text)
+                f.close()
+                assert_equal(self.check('import m\n'
+                                        'm.A().y + 1'),
+                             ['main, line 2: Unsupported left operand type '
+                              'for + ("str")'])
+
+    def test_entry_of_other_implementation_ignored(self) -> None:
+        assert_equal(self.check('import m'), [])
+        path = os.path.join(self.cache_dir, 'm.cache')
+        data = self.read_cache_file(path)
+        data['implementation'] = 'other'
+        f = open(path, 'wb')
+        pickle.dump(data, f)
+        f.close()
+        assert_equal(self.check('import m'), [])
+        # The entry was written again.
+        assert_equal(self.read_cache_file(path)['implementation'],
+                     cache.implementation_hash())
+
+    def test_no_types_restored_if_variable_missing(self) -> None:
+        x = Var('x')
+        x.is_ready = False
+        names = SymbolTable()
+        names['x'] = SymbolTableNode(GDEF, x)
+        tree = MypyFile([], [])
+        tree.names = names
+        try:
+            cache.restore_var_types(tree, [('x', AnyType()),
+                                           ('y', AnyType())])
+        except KeyError:
+            pass
+        else:
+            fail()
+        assert_equal(x.type, None)
+        assert_true(not x.is_ready)
+
+    def check(self, program_text: str) -> List[str]:
+        return build_program(program_text, [build.INCREMENTAL],
+                             cache_dir=self.cache_dir)
+
+    def read_cache_file(self, path: str) -> Dict[str, Any]:
+        f = open(path, 'rb')
+        try:
+            return pickle.load(f)
+        finally:
+            f.close()
+
+    def remove_cache(self) -> None:
+        if os.path.isdir(self.cache_dir):
+            shutil.rmtree(self.cache_dir)
+
+
+class SnapshotSuite(Suite):
+    """Test taking stub modules from snapshots."""
+
+    snapshot = os.path.join(test_temp_dir, 'stubs.snapshot')
+    cache_dir = os.path.join(test_temp_dir, 'cache')
+
+    def set_up(self) -> None:
+        write_module('m', 'import n\n'
+                          'x = n.f()\n'
+                          'class A:\n'
+                          '    def f(self) -> None:\n'
+                          '        self.y = ""\n')
+        write_module('n', 'def f() -> int: pass\n')
+        build.create_snapshot(self.snapshot, ['m'],
+                              flags=[build.TEST_BUILTINS],
+                              alt_lib_path=test_temp_dir)
+
+    def tear_down(self) -> None:
+        for path in ['m.py', 'n.py', 'stubs.snapshot']:
+            os.remove(os.path.join(test_temp_dir, path))
+        if os.path.isdir(self.cache_dir):
+            shutil.rmtree(self.cache_dir)
+
+    def test_imported_modules_included(self) -> None:
+        snapshot = load_snapshot(self.snapshot, 3)
+        assert_true(snapshot is not None)
+        for id in 'builtins', 'm', 'n':
+            assert_true(id in snapshot.modules)
+
+    def test_same_errors_with_snapshot(self) -> None:
+        for program_text in ['import m\n'
+                             'm.x + ""\n'
+                             'm.A().y + 1\n',
+                             'from m import A\n'
+                             'class B(A): pass\n'
+                             'B().f(1)\n',
+                             'import n\n'
+                             'n.f() + ""']:
+            expected = build_program(program_text)
+            assert_true(expected != [])
+            assert_equal(build_program(program_text,
+                                       snapshot_path=self.snapshot),
+                         expected)
+            assert_equal(build_program(program_text, jobs=2,
+                                       snapshot_path=self.snapshot),
+                         expected)
+
+    def test_modified_module_invalidates_snapshot(self) -> None:
+        write_module('n', 'def f() -> str: pass\n')
+        assert_equal(load_snapshot(self.snapshot, 3), None)
+        assert_equal(build_program('import m\nm.x + 1',
+                                   snapshot_path=self.snapshot),
+                     ['main, line 2: Unsupported left operand type for + '
+                      '("str")'])
+
+    def test_incremental_parallel_build(self) -> None:
+        program_text = 'import m\nm.x + ""\n'
+        expected = build_program(program_text)
+        assert_true(expected != [])
+        for i in range(2):
+            # The second build uses cached results.
+            assert_equal(build_program(program_text, [build.INCREMENTAL],
+                                       cache_dir=self.cache_dir, jobs=2,
+                                       snapshot_path=self.snapshot),
+                         expected)
+
+    def test_other_python_version(self) -> None:
+        assert_equal(load_snapshot(self.snapshot, 2), None)
+
+
+class ServerSuite(Suite):
+    """Test type checking using a server that keeps modules in memory."""
+
+    address = os.path.join(test_temp_dir, 'server.sock')
+
+    def set_up(self) -> None:
+        write_module('m', 'import n\n'
+                          'x = n.f()\n')
+        write_module('n', 'def f() -> int: pass\n')
+        write_module('main', 'import m\n'
+                             'y = m.x # type: int\n')
+        self.server = Server(self.address, flags=[build.TEST_BUILTINS],
+                             alt_lib_path=test_temp_dir)
+
+    def tear_down(self) -> None:
+        for id in 'm', 'n', 'main':
+            os.remove(os.path.join(test_temp_dir, id + '.py'))
+        bad_path = os.path.join(test_temp_dir, 'bad.py')
+        if os.path.exists(bad_path):
+            os.remove(bad_path)
+
+    def test_unchanged_modules_reused(self) -> None:
+        assert_equal(self.check(), [])
+        modules = self.server.snapshot.modules
+        assert_equal(sorted(modules), ['builtins', 'm', 'n'])
+        tree = modules['m']
+        assert_equal(self.check(), [])
+        assert_true(modules['m'] is tree)
+
+    def test_modified_module_and_dependents_checked_again(self) -> None:
+        assert_equal(self.check(), [])
+        builtins = self.server.snapshot.modules['builtins']
+        write_module('n', 'def f() -> str: pass\n')
+        assert_equal(self.check(),
+                     ['tmp/main.py, line 2: Incompatible types in '
+                      'assignment'])
+        modules = self.server.snapshot.modules
+        assert_equal(sorted(modules), ['builtins', 'm', 'n'])
+        assert_true(modules['builtins'] is builtins)
+
+    def test_shared_classes_not_modified(self) -> None:
+        write_module('main', 'class A: pass\n'
+                             'class B(A): pass\n')
+        for i in range(3):
+            assert_equal(self.check(), [])
+        builtins = self.server.snapshot.modules['builtins']
+        object_type = cast(TypeInfo, builtins.names['object'].node)
+        assert_equal(object_type.subtypes, set())
+
+    def test_module_with_errors_checked_again(self) -> None:
+        write_module('n', 'def f() -> int: return ""\n')
+        messages = ['In module imported in tmp/m.py, line 1,',
+                    '                   in tmp/main.py, line 1:',
+                    'tmp/n.py: In function "f":',
+                    'tmp/n.py, line 1: Incompatible return value type']
+        assert_equal(self.check(), messages)
+        assert_true('n' not in self.server.snapshot.modules)
+        assert_equal(self.check(), messages)
+
+    def test_internal_error_reported_and_snapshot_dropped(self) -> None:
+        assert_equal(self.check(), [])
+        # A module that cannot be decoded makes the build fail with an
+        # exception other than CompileError.
+        f = open(os.path.join(test_temp_dir, 'bad.py'), 'wb')
+        f.write(b'x = "\xff"\n')
+        f.close()
+        write_module('main', 'import m\n'
+                             'import bad\n')
+        messages = self.check()
+        assert_equal(messages[0], 'tmp/main.py: mypy: internal error:')
+        assert_equal(messages[1], 'Traceback (most recent call last):')
+        assert_true(messages[-1].startswith('UnicodeDecodeError'))
+        assert_equal(self.server.snapshot.modules, {})
+        write_module('main', 'import m\n')
+        assert_equal(self.check(), [])
+        assert_equal(sorted(self.server.snapshot.modules),
+                     ['builtins', 'm', 'n'])
+
+    def test_requests_over_socket(self) -> None:
+        thread = threading.Thread(target=self.server.serve)
+        thread.start()
+        try:
+            write_module('main', 'import m\n'
+                                 'm.x + 1\n')
+            assert_equal(self.request(('check', os.getcwd(),
+                                       [os.path.join(test_temp_dir,
+                                                     'main.py')])),
+                         ['tmp/main.py, line 2: Unsupported left operand '
+                          'type for + ("int")'])
+        finally:
+            assert_equal(self.request(('stop',)), [])
+            thread.join()
+        assert_true(not os.path.exists(self.address))
+        assert_true(not os.path.exists(self.address + '.key'))
+
+    def test_socket_and_key_private(self) -> None:
+        thread = threading.Thread(target=self.server.serve)
+        thread.start()
+        try:
+            self.wait_until_listening()
+            for path in self.address, self.address + '.key':
+                assert_equal(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+        finally:
+            assert_equal(self.request(('stop',)), [])
+            thread.join()
+
+    def test_client_with_wrong_key_rejected(self) -> None:
+        thread = threading.Thread(target=self.server.serve)
+        thread.start()
+        try:
+            assert_equal(self.request(('check', os.getcwd(),
+                                       [os.path.join(test_temp_dir,
+                                                     'main.py')])), [])
+            try:
+                Client(self.address, 'AF_UNIX', authkey=b'wrong')
+                fail()
+            except AuthenticationError:
+                pass
+            # The server still accepts clients that know the key.
+            assert_equal(self.request(('check', os.getcwd(),
+                                       [os.path.join(test_temp_dir,
+                                                     'main.py')])), [])
+        finally:
+            assert_equal(self.request(('stop',)), [])
+            thread.join()
+
+    def check(self) -> List[str]:
+        return self.server.check(os.getcwd(),
+                                 [os.path.join(test_temp_dir, 'main.py')])
+
+    def wait_until_listening(self) -> None:
+        for i in range(100):
+            if os.path.exists(self.address):
+                return
+            time.sleep(0.05)
+
+    def request(self, request: Any) -> List[str]:
+        # The server may not be listening yet, even if the socket exists.
+        for i in range(100):
+            try:
+                f = open(authkey_path(self.address), 'rb')
+                authkey = f.read()
+                f.close()
+                conn = Client(self.address, 'AF_UNIX', authkey=authkey)
+                break
+            except IOError:
+                time.sleep(0.05)
+        try:
+            conn.send(request)
+            return conn.recv()
+        finally:
+            conn.close()
+
+
+class StatsSuite(Suite):
+    """Test recording the times of build passes and operation counts."""
+
+    def set_up(self) -> None:
+        write_module('m', 'class A:\n'
+                          '    def f(self) -> int: pass\n')
+
+    def tear_down(self) -> None:
+        os.remove(os.path.join(test_temp_dir, 'm.py'))
+        for name in 'stats.json', 'trace.json':
+            path = os.path.join(test_temp_dir, name)
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def test_passes_recorded_for_each_module(self) -> None:
+        stats = self.build(jobs=1)
+        for pass_name in ['parse', 'semanal pass 1', 'semanal pass 2',
+                          'semanal pass 3', 'type check']:
+            modules = set(module for name, module, pid, start, duration
+                          in stats.events if name == pass_name)
+            assert_equal(modules, set(['__main__', 'builtins', 'm']))
+        assert_true(stats.counters['member lookups'] > 0)
+        assert_true(stats.counters['subtype checks'] > 0)
+
+    def test_type_check_in_parallel(self) -> None:
+        stats = self.build(jobs=2)
+        modules = set(module for name, module, pid, start, duration
+                      in stats.events if name == 'type check')
+        assert_equal(modules, set(['__main__', 'builtins', 'm']))
+        assert_true(stats.counters['member lookups'] > 0)
+
+    def test_stats_of_failed_build(self) -> None:
+        stats = BuildStats()
+        assert_true(build_program('import m\nm.A().f() + ""\n',
+                                  stats=stats) != [])
+        assert_true(('type check', '__main__') in
+                    [(name, module) for name, module, pid, start, duration
+                     in stats.events])
+        assert_true(stats.counters['member lookups'] > 0)
+
+    def test_write_files(self) -> None:
+        stats = self.build(jobs=1)
+        path = os.path.join(test_temp_dir, 'stats.json')
+        stats.write_json(path)
+        data = json.loads(self.read_file(path))
+        assert_equal(data['passes']['type check']['count'], 3)
+        assert_equal(sorted(data['modules']), ['__main__', 'builtins', 'm'])
+        assert_equal(data['counters'], stats.counters)
+        path = os.path.join(test_temp_dir, 'trace.json')
+        stats.write_chrome_trace(path)
+        events = json.loads(self.read_file(path))['traceEvents']
+        assert_equal(len(events), len(stats.events))
+        assert_equal(events[0]['ph'], 'X')
+
+    def build(self, jobs: int) -> BuildStats:
+        stats = BuildStats()
+        assert_equal(build_program('import m\nx = m.A().f() # type: int\n',
+                                   jobs=jobs, stats=stats), [])
+        return stats
+
+    def read_file(self, path: str) -> str:
+        f = open(path)
+        try:
+            return f.read()
+        finally:
+            f.close()
+
+
+class ContinueOnErrorsSuite(Suite):
+    """Test processing all modules that can be processed despite errors."""
+
+    modules = ['m', 'n', 'p']
+
+    def set_up(self) -> None:
+        write_module('m', 'x = 1\n'
+                          'x()\n')
+        write_module('n', 'import p\n')
+        write_module('p', 'x = (\n')
+
+    def tear_down(self) -> None:
+        for id in self.modules:
+            os.remove(os.path.join(test_temp_dir, id + '.py'))
+
+    def test_errors_of_all_modules_reported(self) -> None:
+        assert_equal(self.check('import m\n'
+                                'm.x()\n'),
+                     ['In module imported in main, line 1:',
+                      'tmp/m.py, line 2: "int" not callable',
+                      'main, line 2: "int" not callable',
+                      'Type checked despite errors: m, __main__'])
+
+    def test_dependents_of_unparsable_module_skipped(self) -> None:
+        assert_equal(self.check('import m\n'
+                                'import n\n'),
+                     ['In module imported in tmp/n.py, line 1,',
+                      '                   in main, line 2:',
+                      'tmp/p.py, line 2: Parse error before end of line',
+                      'In module imported in main, line 1:',
+                      'tmp/m.py, line 2: "int" not callable',
+                      'Type checked despite errors: m',
+                      'Not type checked because of errors: __main__ '
+                      '(depends on n), n (depends on p), p (parse errors)'])
+
+    def test_uninferred_variable_of_module_with_errors(self) -> None:
+        write_module('m', 'x = None\n')
+        assert_equal(self.check('import m\n'
+                                'm.x\n'),
+                     ['In module imported in main, line 1:',
+                      'tmp/m.py, line 1: Need type annotation for variable',
+                      'Type checked despite errors: m'])
+
+    def test_stop_at_first_module_with_errors_by_default(self) -> None:
+        stats = BuildStats()
+        assert_equal(build_program('import m\nm.x()\n', stats=stats),
+                     ['In module imported in main, line 1:',
+                      'tmp/m.py, line 2: "int" not callable'])
+        checked = set(module for name, module, pid, start, duration
+                      in stats.events if name == 'type check')
+        assert_true('m' in checked)
+        assert_true('__main__' not in checked)
+
+    def check(self, program_text: str) -> List[str]:
+        return build_program(program_text, [build.CONTINUE_ON_ERRORS])
+
+
+class ComponentSuite(Suite):
+    """Test computing the strongly connected components of import graphs."""
+
+    def test_no_edges(self) -> None:
+        assert_equal(self.components('a b', {}), [['a'], ['b']])
+
+    def test_dependencies_first(self) -> None:
+        assert_equal(self.components('a b c', {'a': 'b', 'b': 'c'}),
+                     [['c'], ['b'], ['a']])
+
+    def test_cycle(self) -> None:
+        assert_equal(self.components('a b c', {'a': 'b', 'b': 'a c'}),
+                     [['c'], ['a', 'b']])
+
+    def test_self_loop(self) -> None:
+        assert_equal(self.components('a', {'a': 'a'}), [['a']])
+
+    def test_nested_cycles(self) -> None:
+        assert_equal(self.components('a b c d e',
+                                     {'a': 'b', 'b': 'c d', 'c': 'a',
+                                      'd': 'e', 'e': 'd'}),
+                     [['d', 'e'], ['a', 'b', 'c']])
+
+    def test_long_chain(self) -> None:
+        # This would exceed the recursion limit with a recursive algorithm.
+        n = 5000
+        vertices = [str(i) for i in range(n)]
+        edges = dict((str(i), [str(i + 1)]) for i in range(n - 1))
+        edges[str(n - 1)] = [str(0)]
+        components = build.strongly_connected_components(vertices, edges)
+        assert_equal(len(components), 1)
+        assert_equal(len(components[0]), n)
+
+    def components(self, vertices: str,
+                   edges: Dict[str, str]) -> List[List[str]]:
+        graph = Dict[str, List[str]]()
+        for v in vertices.split():
+            graph[v] = edges.get(v, '').split()
+        components = build.strongly_connected_components(vertices.split(),
+                                                          graph)
+        return [sorted(c) for c in components]
+
+
+class ParallelBuildSuite(Suite):
+    """Test that parallel builds (type checking in worker processes and
+    prefetching modules in threads) produce the same output as a serial
+    build.
+    """
+
+    modules = ['a', 'b', 'c']
+
+    def tear_down(self) -> None:
+        for id in self.modules:
+            path = os.path.join(test_temp_dir, id + '.py')
+            if os.path.isfile(path):
+                os.remove(path)
+        if os.path.isdir(os.path.join(test_temp_dir, 'p')):
+            shutil.rmtree(os.path.join(test_temp_dir, 'p'))
+
+    def test_inferred_types_from_other_worker(self) -> None:
+        write_module('a', 'x = 1\n'
+                          'class A:\n'
+                          '    def __init__(self) -> None:\n'
+                          '        self.y = ""\n')
+        write_module('b', 'import a\n'
+                          'def f() -> None:\n'
+                          '    a.x + 1\n'
+                          '    a.A().y + 1\n')
+        self.assert_same_output('import b')
+
+    def test_first_type_error_reported(self) -> None:
+        write_module('a', 'x = 1\nx + 1')
+        write_module('b', 'import a\ny = ""\ny + 1')
+        write_module('c', 'import b\nz = 1\nz + 1')
+        self.assert_same_output('import c\nimport b\nimport a')
+
+    def test_semantic_analysis_error_after_type_error(self) -> None:
+        write_module('a', 'x = 1\nx + 1')
+        write_module('b', 'import a\nundefined')
+        self.assert_same_output('import b')
+
+    def test_semantic_analysis_error_before_type_error(self) -> None:
+        write_module('a', 'undefined')
+        write_module('b', 'import a\nx = 1\nx + 1')
+        self.assert_same_output('import b')
+
+    def test_no_errors(self) -> None:
+        write_module('a', 'x = 1')
+        write_module('b', 'import a\ny = a.x')
+        write_module('c', 'import a\nimport b\nz = b.y')
+        self.assert_same_output('import c\nimport b')
+
+    def test_parse_error_in_prefetched_module(self) -> None:
+        write_module('a', 'import b\nimport c')
+        write_module('b', 'x = 1')
+        write_module('c', 'x = (')
+        self.assert_same_output('import a')
+
+    def test_missing_module(self) -> None:
+        write_module('a', 'import b\nimport missing')
+        write_module('b', 'import missing')
+        self.assert_same_output('import a')
+
+    def test_package(self) -> None:
+        os.mkdir(os.path.join(test_temp_dir, 'p'))
+        write_module('p/__init__', 'x = 1')
+        write_module('p/q', 'import a\ny = ""')
+        write_module('a', 'from p import q\nq.y + 1')
+        self.assert_same_output('import p.q\np.x + 1')
+
+    def test_internal_error_in_worker(self) -> None:
+        # The test builtins do not define dict, so type checking a function
+        # with **kwargs fails.
+        write_module('a', 'import c\n'
+                          'def f(**kw: int) -> None: pass\n')
+        write_module('c', 'import a\n')
+        write_module('b', 'import a\n')
+        try:
+            build_program('import b', jobs=2)
+        except RuntimeError as e:
+            lines = str(e).split('\n')
+            assert_equal(lines[0],
+                         'Internal error: type checking module a (strongly '
+                         'connected component c, a) failed in a worker '
+                         'process:')
+            assert_equal(lines[1], 'Traceback (most recent call last):')
+            assert_equal(lines[-2], "KeyError: 'dict'")
+        else:
+            fail()
+
+    def assert_same_output(self, program_text: str) -> None:
+        serial = build_program(program_text)
+        assert_equal(build_program(program_text, jobs=3), serial)
+        assert_equal(build_program(program_text, jobs=2), serial)
+
+
+class FindModuleSuite(Suite):
+    """Test finding module source files using cached directory listings."""
+
+    dir = os.path.join(test_temp_dir, 'lib')
+
+    def set_up(self) -> None:
+        os.makedirs(os.path.join(self.dir, 'p', 'q'))
+        os.mkdir(os.path.join(self.dir, 'nopkg'))
+        for path in ['m.py', 'p/__init__.py', 'p/m.py', 'p/q/__init__.py',
+                     'nopkg/m.py']:
+            self.write_file(path)
+        build.clear_find_module_cache()
+
+    def tear_down(self) -> None:
+        shutil.rmtree(self.dir)
+        build.clear_find_module_cache()
+
+    def test_find_module(self) -> None:
+        assert_equal(self.find('m'), 'm.py')
+        assert_equal(self.find('p'), 'p/__init__.py')
+        assert_equal(self.find('p.m'), 'p/m.py')
+        assert_equal(self.find('p.q'), 'p/q/__init__.py')
+
+    def test_module_not_found(self) -> None:
+        assert_equal(self.find('x'), None)
+        assert_equal(self.find('p.x'), None)
+        assert_equal(self.find('x.m'), None)
+
+    def test_package_without_init(self) -> None:
+        assert_equal(self.find('nopkg.m'), None)
+
+    def test_search_path_order(self) -> None:
+        other = os.path.join(self.dir, 'p')
+        assert_equal(build.find_module('m', [other, self.dir]),
+                     os.path.join(other, 'm.py'))
+        assert_equal(build.find_module('m', [self.dir, other]),
+                     os.path.join(self.dir, 'm.py'))
+
+    def test_repeated_lookup_avoids_stat_calls(self) -> None:
+        self.find('p.m')
+        listed = build.find_module_stats['listdir']
+        avoided = build.find_module_stats['stat_calls_avoided']
+        assert_equal(self.find('p.m'), 'p/m.py')
+        assert_equal(build.find_module_stats['listdir'], listed)
+        assert_true(build.find_module_stats['stat_calls_avoided'] > avoided)
+
+    def test_cache_cleared(self) -> None:
+        assert_equal(self.find('n'), None)
+        self.write_file('n.py')
+        assert_equal(self.find('n'), None)
+        build.clear_find_module_cache()
+        assert_equal(self.find('n'), 'n.py')
+
+    def test_concurrent_lookups(self) -> None:
+        ids = ['m', 'p', 'p.m', 'p.q', 'x', 'p.x', 'nopkg.m']
+        for id in ids:
+            self.find(id)
+        num_checks = sum(build.find_module_cache[(id, self.dir)][1]
+                         for id in ids)
+        build.clear_find_module_cache()
+        # Switch threads often, so that the lookups interleave.
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=self.find_repeatedly,
+                                        args=(ids,))
+                       for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        # Each file existence check was either answered by listing a
+        # directory or counted as avoided.
+        assert_equal(build.find_module_stats['listdir'] +
+                     build.find_module_stats['stat_calls_avoided'],
+                     4 * 100 * num_checks)
+
+    def find_repeatedly(self, ids: List[str]) -> None:
+        for i in range(100):
+            for id in ids:
+                self.find(id)
+
+    def find(self, id: str) -> str:
+        path = build.find_module(id, [self.dir])
+        if path is None:
+            return None
+        return os.path.relpath(path, self.dir).replace(os.sep, '/')
+
+    def write_file(self, path: str) -> None:
+        f = open(os.path.join(self.dir, path), 'w')
+        f.close()
+
+
+class BuildSuite(Suite):
+    def __init__(self) -> None:
+        self.test_components = ComponentSuite()
+        self.test_find_module = FindModuleSuite()
+        self.test_incremental = IncrementalBuildSuite()
+        self.test_parallel = ParallelBuildSuite()
+        self.test_snapshot = SnapshotSuite()
+        self.test_server = ServerSuite()
+        self.test_stats = StatsSuite()
+        self.test_continue_on_errors = ContinueOnErrorsSuite()
+        super().__init__()
+
+
+if __name__ == '__main__':
+    import sys
+    run_test(BuildSuite(), sys.argv[1:])
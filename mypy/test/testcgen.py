@@ -29,7 +29,8 @@ class CGenCompileSuite(Suite):
         c = []
         for f in self.files:
             c += parse_test_cases(os.path.join(test_data_prefix, f),
-                                  test_cgen_compile, test_temp_dir, True)
+                                  test_cgen_compile, test_temp_dir, True,
+                                  isolated=False)
         return c
 
 
@@ -70,7 +71,8 @@ class CGenRunSuite(Suite):
         c = []
         for f in self.files:
             c += parse_test_cases(os.path.join(test_data_prefix, f),
-                                  test_cgen, test_temp_dir, True)
+                                  test_cgen, test_temp_dir, True,
+                                  isolated=False)
         return c
 
 
@@ -40,10 +40,21 @@ files = [
 ]
 
 
+# Files used for verifying that parallel type checking produces the same
+# output as serial type checking.
+parallel_files = [
+    'check-modules.test',
+    'check-inference.test',
+]
+
+
 class TypeCheckSuite(Suite):
+    files = files
+    jobs = 1
+    
     def cases(self):
         c = []
-        for f in files:
+        for f in self.files:
             c += parse_test_cases(os.path.join(test_data_prefix, f),
                                   self.run_test, test_temp_dir, True)
         return c
@@ -57,7 +68,8 @@ class TypeCheckSuite(Suite):
                         program_text=src,
                         pyversion=testfile_pyversion(testcase.file),
                         flags=[build.TEST_BUILTINS],
-                        alt_lib_path=test_temp_dir)
+                        alt_lib_path=test_temp_dir,
+                        jobs=self.jobs)
         except CompileError as e:
             a = normalize_error_messages(e.messages)
         assert_string_arrays_equal(
@@ -66,6 +78,13 @@ class TypeCheckSuite(Suite):
                 testcase.file, testcase.line))
 
 
+class ParallelTypeCheckSuite(TypeCheckSuite):
+    """Type check using worker processes; output must be identical."""
+    
+    files = parallel_files
+    jobs = 2
+
+
 if __name__ == '__main__':
     import sys
     run_test(TypeCheckSuite(), sys.argv[1:])
@@ -34,7 +34,7 @@ class DyncheckTransformSuite(Suite):
                 builtins_wrapper(test_transform,
                                  os.path.join(test_data_prefix,
                                               TRANSFORM_BUILTINS)),
-                test_temp_dir, True)
+                test_temp_dir, True, isolated=False)
         return c
 
 
@@ -0,0 +1,160 @@
+"""Test cases for reporting errors (mypy.errors)."""
+
+import io
+import json
+import os
+import os.path
+import subprocess
+import sys
+
+import typing
+from typing import List, Tuple
+
+from mypy import build
+from mypy.errors import Errors, ErrorReporter, CompileError, JSON_FORMAT
+from mypy.myunit import Suite, assert_equal, assert_true, run_test
+from mypy.test.config import test_temp_dir
+
+
+class ErrorsSuite(Suite):
+    def test_sort_by_line_within_file(self) -> None:
+        errors = self.errors()
+        errors.report(3, 'c')
+        errors.report(1, 'a')
+        errors.report(3, 'b')
+        errors.report(2, 'd')
+        assert_equal(errors.messages(), ['file, line 1: a',
+                                         'file, line 2: d',
+                                         'file, line 3: c',
+                                         'file, line 3: b'])
+
+    def test_remove_duplicates(self) -> None:
+        errors = self.errors()
+        for i in range(3):
+            errors.report(1, 'a')
+            errors.report(1, 'b')
+        errors.report(2, 'a')
+        assert_equal(errors.messages(), ['file, line 1: a',
+                                         'file, line 1: b',
+                                         'file, line 2: a'])
+
+    def test_flush_reports_new_messages(self) -> None:
+        errors = self.errors()
+        stream = io.StringIO()
+        errors.reporter = ErrorReporter(stream)
+        errors.report(2, 'a')
+        errors.flush()
+        errors.flush()
+        errors.set_file('file2')
+        errors.report(1, 'b')
+        try:
+            errors.raise_error()
+        except CompileError as e:
+            assert_equal(e.messages, ['file, line 2: a', 'file2, line 1: b'])
+        assert_equal(stream.getvalue(), 'file, line 2: a\nfile2, line 1: b\n')
+
+    def test_json_format(self) -> None:
+        errors = self.errors()
+        stream = io.StringIO()
+        errors.reporter = ErrorReporter(stream, JSON_FORMAT)
+        errors.push_import_context('main', 3)
+        errors.push_function('f')
+        errors.report(2, 'a')
+        errors.report(2, 'a')
+        errors.report(1, 'b')
+        errors.flush()
+        lines = stream.getvalue().splitlines()
+        assert_equal(len(lines), 2)
+        assert_equal(json.loads(lines[0]),
+                     {'file': 'file', 'line': 1, 'message': 'b',
+                      'type': None, 'function': 'f',
+                      'import_context': [['main', 3]]})
+        assert_equal(json.loads(lines[1])['message'], 'a')
+
+    def test_errors_of_module_reported_during_build(self) -> None:
+        stream = io.StringIO()
+        try:
+            build.build('main',
+                        target=build.TYPE_CHECK,
+                        program_text='x = 1\nx()\n',
+                        flags=[build.TEST_BUILTINS],
+                        reporter=ErrorReporter(stream))
+        except CompileError as e:
+            assert_true(e.messages != [])
+            assert_equal(stream.getvalue().splitlines(), e.messages)
+        else:
+            assert_true(False, 'No errors reported')
+
+    def errors(self) -> Errors:
+        errors = Errors()
+        errors.set_file('file')
+        return errors
+
+
+class ScriptErrorsSuite(Suite):
+    """Test reporting errors using scripts/mypy."""
+
+    def test_unreadable_file_with_stream_errors(self) -> None:
+        self.assert_reported(['--stream-errors', '-S', self.missing_file()],
+                             ["mypy: can't read file '{}': No such file or "
+                              "directory".format(self.missing_file())])
+
+    def test_unreadable_file_with_json_errors(self) -> None:
+        self.assert_reported(['--json-errors', '-S', self.missing_file()],
+                             ["mypy: can't read file '{}': No such file or "
+                              "directory".format(self.missing_file())])
+
+    def test_missing_module_with_stream_errors(self) -> None:
+        self.assert_reported(['--stream-errors', '-S', '-m', 'nosuchmod'],
+                             ["mypy: can't find module 'nosuchmod'"])
+
+    def test_json_errors_do_not_run_program(self) -> None:
+        path = os.path.join(test_temp_dir, 'program.py')
+        f = open(path, 'w')
+        f.write('print("output")\n')
+        f.close()
+        try:
+            status, out, err = run_mypy(['--json-errors', path])
+        finally:
+            os.remove(path)
+        assert_equal(status, 0)
+        assert_equal(out, '')
+
+    def assert_reported(self, args: List[str], messages: List[str]) -> None:
+        """Run mypy and check that it fails and writes the messages to
+        stderr (and nothing to stdout)."""
+        status, out, err = run_mypy(args)
+        assert_equal(status, 1)
+        assert_equal(out, '')
+        assert_equal(err.splitlines(), messages)
+
+    def missing_file(self) -> str:
+        return os.path.join(test_temp_dir, 'nonexist.py')
+
+
+def run_mypy(args: List[str]) -> Tuple[int, str, str]:
+    """Run scripts/mypy in a new process.
+
+    Return tuple (exit status, output, error output).
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([os.path.join('lib-typing', '3.2'),
+                                         os.getcwd()])
+    # Deprecation warnings of the interpreter are not mypy messages.
+    process = subprocess.Popen([sys.executable, '-W', 'ignore',
+                                os.path.join('scripts', 'mypy')] + args,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               env=env)
+    out, err = process.communicate()
+    return process.returncode, str(out, 'utf8'), str(err, 'utf8')
+
+
+class CombinedErrorsSuite(Suite):
+    def __init__(self):
+        self.test_errors = ErrorsSuite()
+        self.test_script_errors = ScriptErrorsSuite()
+        super().__init__()
+
+
+if __name__ == '__main__':
+    run_test(CombinedErrorsSuite(), sys.argv[1:])
@@ -7,6 +7,7 @@ import typing
 
 from mypy import build
 from mypy import icode
+from mypy import icodeopt
 from mypy.myunit import Suite, run_test
 from mypy.test.helpers import assert_string_arrays_equal_wildcards
 from mypy.test.data import parse_test_cases
@@ -33,11 +34,31 @@ class IcodeGenerationSuite(Suite):
                 builtins_wrapper(test_transform,
                                  os.path.join(test_data_prefix,
                                               ICODE_GEN_BUILTINS)),
-                test_temp_dir, True)
+                test_temp_dir, True, isolated=False)
         return c
 
 
-def test_transform(testcase):
+class IcodeOptimizationSuite(Suite):
+    test_case_files = ['icode-opt.test']
+    
+    def cases(self):
+        c = []
+        for f in self.test_case_files:
+            c += parse_test_cases(
+                os.path.join(test_data_prefix, f),
+                builtins_wrapper(test_optimization,
+                                 os.path.join(test_data_prefix,
+                                              ICODE_GEN_BUILTINS)),
+                test_temp_dir, True, isolated=False)
+        return c
+
+
+def test_optimization(testcase):
+    """Perform an icode optimization test case (with all passes)."""
+    test_transform(testcase, optimize=True)
+
+
+def test_transform(testcase, optimize=False):
     """Perform a runtime checking transformation test case."""
     
     expected = remove_comment_lines(testcase.output)
@@ -61,6 +82,8 @@ def test_transform(testcase):
             except KeyError:
                 raise RuntimeError('no icode for %s (%s)' % (
                     fn, list(result.icode.keys())))
+            if optimize:
+                icodeopt.optimize(funccode)
             code = icode.render(funccode)
             a.extend(code)
     except CompileError as e:
@@ -71,6 +94,13 @@ def test_transform(testcase):
                                                           testcase.line))
 
 
+class CombinedIcodeSuite(Suite):
+    def __init__(self):
+        self.test_icodegen = IcodeGenerationSuite()
+        self.test_icodeopt = IcodeOptimizationSuite()
+        super().__init__()
+
+
 def get_func_names(expected):
     res = []
     for s in expected:
@@ -84,4 +114,4 @@ def get_func_names(expected):
 
 if __name__ == '__main__':
     import sys
-    run_test(IcodeGenerationSuite(), sys.argv[1:])
+    run_test(CombinedIcodeSuite(), sys.argv[1:])
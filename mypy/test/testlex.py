@@ -376,6 +376,20 @@ class LexerSuite(Suite):
         self.assert_lex('0x', 'LexError(  ) ...')
         self.assert_lex('0xax', 'LexError(    ) ...')
     
+    def test_adjacent_tokens(self):
+        self.assert_lex('f(x)[0].y',
+                        'Name(f) Punct(() Name(x) Punct()) Punct([) IntLit(0) '
+                        'Punct(]) Op(.) Name(y) ...')
+        self.assert_lex("x'a'", "Name(x) StrLit('a') ...")
+        self.assert_lex('1.5+.5*0x1f', 'FloatLit(1.5) Op(+) FloatLit(.5) '
+                        'Op(*) IntLit(0x1f) ...')
+        self.assert_lex('x**=-1', 'Name(x) Punct(**=) Op(-) IntLit(1) ...')
+        self.assert_lex('a;b', 'Name(a) Break(;) Name(b) ...')
+    
+    def test_invalid_characters(self):
+        self.assert_lex('x!y', 'Name(x) LexError(!) Name(y) ...')
+        self.assert_lex('$', 'LexError($) ...')
+    
     # TODO
     #   invalid escape sequences in string literals etc.
     
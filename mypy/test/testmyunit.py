@@ -0,0 +1,184 @@
+"""Test cases for the test runner (mypy.myunit)."""
+
+import io
+import os
+import sys
+
+import typing
+from typing import List, Tuple
+
+from mypy import myunit
+from mypy.myunit import (
+    Suite, TestCase, assert_equal, assert_true, fail, match_pattern, run_test
+)
+
+
+class RecordingCase(TestCase):
+    """Test case that records its name when run.
+
+    It may also fail, or exit the process when run.
+    """
+
+    def __init__(self, name: str, log: List[str], fails: bool = False,
+                 isolated: bool = False, exit_status: int = None) -> None:
+        super().__init__(name)
+        self.log = log
+        self.fails = fails
+        self.isolated = isolated
+        self.exit_status = exit_status
+
+    def run(self) -> None:
+        self.log.append(self.name)
+        if self.exit_status is not None:
+            os._exit(self.exit_status)
+        if self.fails:
+            fail()
+
+    def is_isolated(self) -> bool:
+        return self.isolated
+
+
+def glob_match(s: str, p: str) -> bool:
+    """Does a string match a pattern (where * matches any string)?
+
+    This is the original recursive implementation of match_pattern.
+    """
+    if len(p) == 0:
+        return len(s) == 0
+    elif p[0] == '*':
+        if len(p) == 1:
+            return True
+        else:
+            for i in range(len(s) + 1):
+                if glob_match(s[i:], p[1:]):
+                    return True
+            return False
+    elif len(s) == 0:
+        return False
+    else:
+        return s[0] == p[0] and glob_match(s[1:], p[1:])
+
+
+class MyunitSuite(Suite):
+    """Test running test cases in shards and in worker processes."""
+
+    def set_up(self) -> None:
+        # run_test replaces the options of the test run in progress.
+        self.is_verbose = myunit.is_verbose
+        self.is_quiet = myunit.is_quiet
+        self.patterns = myunit.patterns
+        self.num_times = len(myunit.times)
+        self.log = List[str]()
+
+    def tear_down(self) -> None:
+        myunit.is_verbose = self.is_verbose
+        myunit.is_quiet = self.is_quiet
+        myunit.patterns = self.patterns
+        del myunit.times[self.num_times:]
+
+    def test_shards_cover_all_test_cases_once(self) -> None:
+        suite = self.make_suite(['a', 'b', 'c', 'd'],
+                                ['e', 'f', 'g', 'h', 'i', 'j', 'k'])
+        names = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k']
+        for num_shards in 1, 2, 3, 4, 13:
+            del self.log[:]
+            for shard in range(1, num_shards + 1):
+                self.run_suite(suite, ['--shard',
+                                       '{}/{}'.format(shard, num_shards)])
+            assert_equal(sorted(self.log), names)
+
+    def test_shards_cover_matching_test_cases_once(self) -> None:
+        suite = self.make_suite(['a', 'b', 'c'], ['d', 'e', 'f', 'g', 'h'])
+        for shard in 1, 2, 3:
+            self.run_suite(suite, ['sub.*', '--shard', '{}/3'.format(shard)])
+        assert_equal(sorted(self.log), ['d', 'e', 'f', 'g', 'h'])
+
+    def test_pattern_matches_like_glob(self) -> None:
+        names = ['', 'a', 'ab', 'abc', 'abab', 'x.y', 'xzy', 'a+b', 'a*b',
+                 'a?b', 'a[b]', 'a\\b', 'a$b', 'a.b\nc',
+                 'TypeCheckSuite.testTuple', 'test_build.test_stop_at_first']
+        patterns = ['', '*', '**', 'a', 'a*', '*b', 'a*b', '*a*', '*b*b',
+                    'ab*ab', 'x.y', 'x.*', 'a+b', 'a?b', 'a[b]', 'a\\b',
+                    'a$b', '*\n*', 'a*c', '*Tuple', 'test_build.*first',
+                    '*.test_*']
+        for pattern in patterns:
+            for name in names:
+                assert_equal(match_pattern(name, pattern),
+                             glob_match(name, pattern),
+                             '{{}} != {{}} for {!r} and pattern {!r}'.format(
+                                 name, pattern))
+
+    def test_success_in_workers(self) -> None:
+        suite = self.make_suite(['a', 'b', 'c'], [], isolated=True)
+        status, output = self.run_suite(suite, ['-j', '2'])
+        assert_equal(status, 0)
+        assert_equal(output, '')
+
+    def test_failure_in_worker_gives_error_status(self) -> None:
+        suite = self.make_suite(['a', 'b', 'c', 'd'], [], isolated=True)
+        suite.add_test(RecordingCase('e', self.log, fails=True,
+                                     isolated=True))
+        status, output = self.run_suite(suite, ['-j', '2'])
+        assert_equal(status, 1)
+        assert_true('\ne failed\n' in output, output)
+        assert_true('1/5 test cases failed.' in output, output)
+
+    def test_worker_exit_gives_error_status(self) -> None:
+        suite = self.make_suite(['a', 'b', 'c'], [], isolated=True)
+        suite.add_test(RecordingCase('d', self.log, isolated=True,
+                                     exit_status=3))
+        status, output = self.run_suite(suite, ['-j', '2'])
+        assert_equal(status, 1)
+        # The worker that exited was running test cases b and d.
+        assert_true('Worker process exited with status 3\n\nb failed\n'
+                    in output, output)
+        assert_true('\nd failed\n' in output, output)
+        assert_true('2/4 test cases failed.' in output, output)
+
+    def test_failure_gives_error_status(self) -> None:
+        suite = self.make_suite(['a'], [])
+        suite.add_test(RecordingCase('b', self.log, fails=True))
+        status, output = self.run_suite(suite, [])
+        assert_equal(status, 1)
+        assert_true('1/2 test cases failed.' in output, output)
+
+    def test_slowest_reported_to_stderr(self) -> None:
+        suite = self.make_suite(['a', 'b', 'c'], [])
+        status, output = self.run_suite(suite, ['--slowest', '2'])
+        lines = output.splitlines()
+        assert_equal(lines[0], 'Slowest test cases:')
+        assert_equal(len(lines), 3)
+
+    def make_suite(self, names: List[str], sub_names: List[str],
+                   isolated: bool = False) -> Suite:
+        """Return a suite with test cases and a nested suite 'sub.' of test
+        cases that record their names in self.log."""
+        suite = Suite()
+        for name in names:
+            suite.add_test(RecordingCase(name, self.log, isolated=isolated))
+        sub = Suite()
+        for name in sub_names:
+            sub.add_test(RecordingCase(name, self.log, isolated=isolated))
+        suite.add_test(('sub.', sub))
+        return suite
+
+    def run_suite(self, suite: Suite, args: List[str]) -> Tuple[int, str]:
+        """Run a suite quietly.
+
+        Return tuple (exit status, output written to stderr).
+        """
+        stderr = sys.stderr
+        output = io.StringIO()
+        sys.stderr = output
+        status = 0
+        try:
+            run_test(suite, ['-q'] + args)
+        except SystemExit as e:
+            status = e.code
+        finally:
+            sys.stderr = stderr
+        return status, output.getvalue()
+
+
+if __name__ == '__main__':
+    run_test(MyunitSuite(), sys.argv[1:])
@@ -29,7 +29,7 @@ class DyncheckOpGenSuite(Suite):
                 builtins_wrapper(test_op_gen,
                                  os.path.join(test_data_prefix,
                                               TRANSFORM_BUILTINS)),
-                test_temp_dir, True)
+                test_temp_dir, True, isolated=False)
         return c
 
 
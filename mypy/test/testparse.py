@@ -27,7 +27,19 @@ class ParserSuite(Suite):
         return c
 
 
-def test_parser(testcase):
+class NoReprParserSuite(Suite):
+    """Test parsing without node representations (the output is the same)."""
+    
+    def cases(self):
+        c = []
+        for f in ParserSuite.parse_files:
+            c += parse_test_cases(
+                os.path.join(config.test_data_prefix, f),
+                test_parser_without_repr)
+        return c
+
+
+def test_parser(testcase, preserve_repr=True):
     """Perform a single parser test case.
 
     The argument contains the description of the test case.
@@ -38,7 +50,8 @@ def test_parser(testcase):
         pyversion = 2
     
     try:
-        n = parse('\n'.join(testcase.input), pyversion=pyversion)
+        n = parse('\n'.join(testcase.input), pyversion=pyversion,
+                  preserve_repr=preserve_repr)
         a = str(n).split('\n')
     except CompileError as e:
         a = e.messages
@@ -47,6 +60,10 @@ def test_parser(testcase):
                                    testcase.file, testcase.line))
 
 
+def test_parser_without_repr(testcase):
+    test_parser(testcase, preserve_repr=False)
+
+
 # The file name shown in test case output. This is displayed in error
 # messages, and must match the file name in the test case descriptions.
 INPUT_FILE_NAME = 'file'
@@ -78,6 +95,7 @@ class CombinedParserSuite(Suite):
     def __init__(self):
         self.test_parse = ParserSuite()
         self.test_parse_errors = ParseErrorSuite()
+        self.test_parse_without_repr = NoReprParserSuite()
         super().__init__()
 
 
@@ -39,7 +39,8 @@ class PythonEvaluationSuite(Suite):
         c = []
         for f in python_eval_files:
             c += parse_test_cases(os.path.join(test_data_prefix, f),
-                                  test_python_evaluation, test_temp_dir, True)
+                                  test_python_evaluation, test_temp_dir, True,
+                                  isolated=False)
         return c
 
 
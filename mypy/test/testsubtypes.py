@@ -1,7 +1,10 @@
 import typing
 
-from mypy.myunit import Suite, assert_true, run_test
-from mypy.subtypes import is_subtype
+from mypy.myunit import Suite, assert_equal, assert_true, run_test
+from mypy.subtypes import (
+    is_subtype, clear_subtype_cache, subtype_cache_stats
+)
+from mypy.types import Instance
 from mypy.typefixture import TypeFixture, InterfaceTypeFixture
 
 
@@ -33,6 +36,19 @@ class SubtypingSuite(Suite):
         self.assert_subtype(self.fx.gsab, self.fx.gb)
         self.assert_not_subtype(self.fx.gsab, self.fx.ga)
     
+    def test_cached_generic_instance_subtyping(self):
+        clear_subtype_cache()
+        self.assert_subtype(self.fx.gsab, self.fx.gb)
+        self.assert_not_subtype(self.fx.gsab, self.fx.ga)
+        assert_equal(subtype_cache_stats['hits'], 0)
+        # Structurally identical types share cache entries.
+        gsab = Instance(self.fx.gsi, [self.fx.a, self.fx.b])
+        self.assert_subtype(gsab, Instance(self.fx.gi, [self.fx.b]))
+        self.assert_not_subtype(gsab, Instance(self.fx.gi, [self.fx.a]))
+        assert_equal(subtype_cache_stats['hits'], 2)
+        clear_subtype_cache()
+        assert_equal(subtype_cache_stats['hits'], 0)
+    
     def test_interface_subtyping(self):
         self.assert_subtype(self.fx.e, self.fx.f)
         self.assert_equivalent(self.fx.f, self.fx.f)
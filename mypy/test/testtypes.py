@@ -5,16 +5,20 @@ from typing import List
 from mypy.myunit import Suite, assert_equal, assert_true, run_test
 from mypy.erasetype import erase_type
 from mypy.expandtype import expand_type
-from mypy.join import join_types
-from mypy.meet import meet_types
+from mypy.join import join_types, join_cache_stats
+from mypy.meet import meet_types, meet_cache_stats
 from mypy.types import (
     UnboundType, AnyType, Void, Callable, TupleType, TypeVarDef, Type,
-    Instance, NoneTyp, ErrorType
+    Instance, NoneTyp, ErrorType, type_key
+)
+from mypy.nodes import (
+    ARG_POS, ARG_OPT, ARG_STAR, MDEF, Var, SymbolTableNode
 )
-from mypy.nodes import ARG_POS, ARG_OPT, ARG_STAR
 from mypy.replacetvars import replace_type_vars
 from mypy.subtypes import is_subtype
-from mypy.typefixture import TypeFixture, InterfaceTypeFixture
+from mypy.typefixture import (
+    TypeFixture, InterfaceTypeFixture, make_type_info
+)
 
 
 class TypesSuite(Suite):
@@ -173,11 +177,39 @@ class TypeOpsSuite(Suite):
     def assert_erase(self, orig, result):
         assert_equal(str(erase_type(orig, self.fx.basic)), str(result))
     
+    # TypeKey
+    
+    def test_type_key_of_structurally_identical_types(self):
+        for t in (self.fx.a, self.fx.ga, self.fx.hab, self.fx.t,
+                  self.fx.void, self.fx.nonet, self.fx.anyt, self.fx.err,
+                  self.tuple(self.fx.a, self.fx.gb),
+                  self.callable(['T'], self.fx.a, self.fx.ga, self.fx.b)):
+            assert_equal(type_key(t), type_key(expand_type(t, {})))
+    
+    def test_type_key_of_different_types(self):
+        types = [self.fx.a, self.fx.b, self.fx.ga, self.fx.gb, self.fx.hab,
+                 self.fx.t, self.fx.s1, self.fx.tf, self.fx.void,
+                 self.fx.nonet, self.fx.anyt, self.fx.err,
+                 self.tuple(self.fx.a), self.tuple(self.fx.a, self.fx.a),
+                 self.callable([], self.fx.a, self.fx.b),
+                 self.callable([], self.fx.b, self.fx.a),
+                 self.callable(['T'], self.fx.b, self.fx.a)]
+        keys = [type_key(t) for t in types]
+        assert_equal(len(set(keys)), len(types))
+    
+    def test_type_key_of_unbound_type(self):
+        assert_equal(type_key(self.x()), None)
+        assert_equal(type_key(self.fx.callable(self.x(), self.fx.a)), None)
+        assert_equal(type_key(Instance(self.fx.gi, [self.x()])), None)
+    
     # Helpers
     
     def tuple(self, *a):
         return TupleType(a)
     
+    def x(self):
+        return UnboundType('X')
+    
     def callable(self, vars, *a) -> Callable:
         """callable(args, a1, ..., an, r) constructs a callable with
         argument types a1, ... an and return type r and type arguments
@@ -381,6 +413,18 @@ class JoinSuite(Suite):
         self.assert_join(self.fx.type_type, self.fx.type_type,
                          self.fx.type_type)
     
+    def test_cached_generic_join(self):
+        self.assert_join(self.fx.gsab, self.fx.ga, self.fx.o)
+        hits = join_cache_stats['hits']
+        self.assert_join(self.fx.gsab, self.fx.ga, self.fx.o)
+        assert_true(join_cache_stats['hits'] > hits)
+        # Structurally identical types share cache entries.
+        hits = join_cache_stats['hits']
+        self.assert_join(Instance(self.fx.gsi, [self.fx.a, self.fx.b]),
+                         Instance(self.fx.gi, [self.fx.a]), self.fx.o)
+        assert_true(join_cache_stats['hits'] > hits)
+        self.assert_join(self.fx.gsab, self.fx.gb, self.fx.gb)
+    
     # There are additional test cases in check-inference.test.
     
     # FIX interfaces with different paths
@@ -591,6 +635,12 @@ class MeetSuite(Suite):
         self.assert_meet(fx.gfa, fx.gfa, fx.gfa)
         self.assert_meet(fx.gfb, fx.m1, fx.nonet)
     
+    def test_cached_generic_meet(self):
+        self.assert_meet(self.fx.gsab, self.fx.gb, self.fx.gsab)
+        hits = meet_cache_stats['hits']
+        self.assert_meet(self.fx.gsab, self.fx.gb, self.fx.gsab)
+        assert_true(meet_cache_stats['hits'] > hits)
+    
     # FIX generic interfaces + ranges
     
     def assert_meet(self, s, t, meet):
@@ -623,12 +673,60 @@ class MeetSuite(Suite):
                         a[-1], False)
 
 
+class MemberLookupSuite(Suite):
+    def set_up(self):
+        self.oi = make_type_info('builtins.object')
+        self.ai = make_type_info('A', mro=[self.oi])
+        self.bi = make_type_info('B', mro=[self.ai, self.oi])
+    
+    def test_inherited_member(self):
+        x = self.define(self.ai, 'x')
+        assert_true(self.bi.get_var('x') is x)
+        assert_true(self.bi.lookup_member('x')[0] is self.ai)
+    
+    def test_overridden_member(self):
+        self.define(self.ai, 'x')
+        x = self.define(self.bi, 'x')
+        assert_true(self.bi.get_var('x') is x)
+    
+    def test_add_member_to_base_class_after_lookup(self):
+        assert_equal(self.bi.get('x'), None)
+        x = self.define(self.ai, 'x')
+        assert_true(self.bi.get_var('x') is x)
+        y = self.define(self.oi, 'y')
+        assert_true(self.bi.get_var('y') is y)
+    
+    def test_replace_and_remove_member_of_base_class_after_lookup(self):
+        self.define(self.oi, 'x')
+        self.bi.get('x')
+        x = self.define(self.ai, 'x')
+        assert_true(self.bi.get_var('x') is x)
+        del self.ai.names['x']
+        assert_true(self.bi.get_var('x') is self.oi.names['x'].node)
+        del self.oi.names['x']
+        assert_equal(self.bi.get('x'), None)
+    
+    def test_modify_unrelated_class_keeps_inherited_members(self):
+        self.define(self.ai, 'x')
+        members = self.bi.inherited_members()
+        self.define(make_type_info('C', mro=[self.oi]), 'x')
+        self.define(self.bi, 'y')
+        assert_true(self.bi.inherited_members() is members)
+    
+    def define(self, info, name):
+        """Define an attribute in a class and return the Var."""
+        var = Var(name)
+        info.names[name] = SymbolTableNode(MDEF, var)
+        return var
+
+
 class CombinedTypesSuite(Suite):
     def __init__(self):
         self.test_types = TypesSuite()
         self.test_type_ops = TypeOpsSuite()
         self.test_join = JoinSuite()
         self.test_meet = MeetSuite()
+        self.test_member_lookup = MemberLookupSuite()
         super().__init__()
 
 
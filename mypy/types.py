@@ -1,7 +1,7 @@
 """Classes for representing mypy types."""
 
 from abc import abstractmethod
-from typing import Undefined, Any, typevar, List, Tuple, cast, Generic
+from typing import Any, typevar, List, Tuple, cast, Generic
 
 import mypy.nodes
 
@@ -12,12 +12,12 @@ T = typevar('T')
 class Type(mypy.nodes.Context):
     """Abstract base class for all types."""
     
-    line = 0
-    repr = Undefined(Any)
+    # Type checking creates lots of types; avoid per-instance dictionaries.
+    __slots__ = ('line', 'repr')
     
     def __init__(self, line: int = -1, repr=None) -> None:
-        self.line = line
-        self.repr = repr
+        self.line = line # type: int
+        self.repr = repr # type: Any
 
     def get_line(self) -> int:
         return self.line
@@ -32,19 +32,15 @@ class Type(mypy.nodes.Context):
 class TypeVarDef(mypy.nodes.Context):
     """Definition of a single type variable."""
     
-    name = ''
-    id = 0
-    values = Undefined(List[Type])
-    line = 0
-    repr = Undefined(Any)
+    __slots__ = ('name', 'id', 'values', 'line', 'repr')
     
     def __init__(self, name: str, id: int, values: List[Type], line: int = -1,
                  repr: Any = None) -> None:
-        self.name = name
-        self.id = id
-        self.values = values
-        self.line = line
-        self.repr = repr
+        self.name = name # type: str
+        self.id = id # type: int
+        self.values = values # type: List[Type]
+        self.line = line # type: int
+        self.repr = repr # type: Any
 
     def get_line(self) -> int:
         return self.line
@@ -59,15 +55,14 @@ class TypeVarDef(mypy.nodes.Context):
 class UnboundType(Type):
     """Instance type that has not been bound during semantic analysis."""
     
-    name = ''
-    args = Undefined(List[Type])
+    __slots__ = ('name', 'args')
     
     def __init__(self, name: str, args: List[Type] = None, line: int = -1,
                  repr: Any = None) -> None:
         if not args:
             args = []
-        self.name = name
-        self.args = args
+        self.name = name # type: str
+        self.args = args # type: List[Type]
         super().__init__(line, repr)
     
     def accept(self, visitor: 'TypeVisitor[T]') -> T:
@@ -77,6 +72,8 @@ class UnboundType(Type):
 class ErrorType(Type):
     """The error type is used as the result of failed type operations."""
     
+    __slots__ = ()
+    
     def accept(self, visitor: 'TypeVisitor[T]') -> T:
         return visitor.visit_error_type(self)
 
@@ -88,12 +85,12 @@ class TypeList(Type):
     [arg, ...] in Function[[arg, ...], ret].
     """
 
-    items = Undefined(List[Type])
+    __slots__ = ('items',)
 
     def __init__(self, items: List[Type], line: int = -1,
                  repr: Any = None) -> None:
         super().__init__(line, repr)
-        self.items = items
+        self.items = items # type: List[Type]
     
     def accept(self, visitor: 'TypeVisitor[T]') -> T:
         return visitor.visit_type_list(self)
@@ -102,6 +99,8 @@ class TypeList(Type):
 class AnyType(Type):
     """The type 'Any'."""
     
+    __slots__ = ()
+    
     def accept(self, visitor: 'TypeVisitor[T]') -> T:
         return visitor.visit_any(self)
 
@@ -113,11 +112,12 @@ class Void(Type):
     the result type of calling such callable.
     """
     
-    source = ''   # May be None; function that generated this value
+    # source: function that generated this value (may be None)
+    __slots__ = ('source',)
     
     def __init__(self, source: str = None, line: int = -1,
                  repr: Any = None) -> None:
-        self.source = source
+        self.source = source # type: str
         super().__init__(line, repr)
     
     def accept(self, visitor: 'TypeVisitor[T]') -> T:
@@ -140,6 +140,8 @@ class NoneTyp(Type):
     to do anything with the return value.
     """
     
+    __slots__ = ()
+    
     def __init__(self, line: int = -1, repr=None) -> None:
         super().__init__(line, repr)
     
@@ -154,6 +156,8 @@ class ErasedType(Type):
     it is ignored during type inference.
     """
     
+    __slots__ = ()
+    
     def accept(self, visitor: 'TypeVisitor[T]') -> T:
         return visitor.visit_erased_type(self)
 
@@ -164,16 +168,16 @@ class Instance(Type):
     The list of type variables may be empty.
     """
     
-    type = Undefined(mypy.nodes.TypeInfo)
-    args = Undefined(List[Type])
-    erased = False      # True if result of type variable substitution
+    __slots__ = ('type',
+                 'args',
+                 'erased')  # True if result of type variable substitution
     
     def __init__(self, typ: mypy.nodes.TypeInfo, args: List[Type],
                  line: int = -1, repr: Any = None,
                  erased: Any = False) -> None:
-        self.type = typ
-        self.args = args
-        self.erased = erased
+        self.type = typ # type: mypy.nodes.TypeInfo
+        self.args = args # type: List[Type]
+        self.erased = erased # type: Any
         super().__init__(line, repr)
     
     def accept(self, visitor: 'TypeVisitor[T]') -> T:
@@ -191,22 +195,22 @@ class TypeVar(Type):
     type variable (id < 0).
     """
     
-    name = '' # Name of the type variable (for messages and debugging)
-    id = 0 # 1, 2, ... for type-related, -1, ... for function-related
-    
-    # True if refers to the value of the type variable stored in a generic
-    # instance wrapper. This is only relevant for generic class wrappers. If
-    # False (default), this refers to the type variable value(s) given as the
-    # implicit type variable argument.
+    # name: Name of the type variable (for messages and debugging)
+    # id: 1, 2, ... for type-related, -1, ... for function-related
+    #
+    # is_wrapper_var: True if refers to the value of the type variable stored
+    # in a generic instance wrapper. This is only relevant for generic class
+    # wrappers. If False (default), this refers to the type variable value(s)
+    # given as the implicit type variable argument.
     #
     # Can also be BoundVar/ObjectVar TODO better representation
-    is_wrapper_var = Undefined(Any)
+    __slots__ = ('name', 'id', 'is_wrapper_var')
     
     def __init__(self, name: str, id: int, is_wrapper_var: Any = False,
                  line: int = -1, repr: Any = None) -> None:
-        self.name = name
-        self.id = id
-        self.is_wrapper_var = is_wrapper_var
+        self.name = name # type: str
+        self.id = id # type: int
+        self.is_wrapper_var = is_wrapper_var # type: Any
         super().__init__(line, repr)
     
     def accept(self, visitor: 'TypeVisitor[T]') -> T:
@@ -216,6 +220,8 @@ class TypeVar(Type):
 class FunctionLike(Type):
     """Abstract base class for function types."""
 
+    __slots__ = ()
+
     @abstractmethod
     def is_type_obj(self) -> bool: pass
 
@@ -229,15 +235,16 @@ class FunctionLike(Type):
 class Callable(FunctionLike):
     """Type of a non-overloaded callable object (function)."""
     
-    arg_types = Undefined(List[Type]) # Types of function arguments
-    arg_kinds = Undefined(List[int])  # mypy.nodes.ARG_ constants
-    arg_names = Undefined(List[str])  # None if not a keyword argument
-    minargs = 0                # Minimum number of arguments
-    is_var_arg = False         # Is it a varargs function?
-    ret_type = Undefined(Type) # Return value type
-    name = ''                  # Name (may be None; for error messages)
-    # Type variables for a generic function
-    variables = Undefined(List[TypeVarDef])
+    __slots__ = ('arg_types',    # Types of function arguments
+                 'arg_kinds',    # mypy.nodes.ARG_ constants
+                 'arg_names',    # None if not a keyword argument
+                 'min_args',     # Minimum number of arguments
+                 'is_var_arg',   # Is it a varargs function?
+                 'ret_type',     # Return value type
+                 'name',         # Name (may be None; for error messages)
+                 'variables',    # Type variables for a generic function
+                 'bound_vars',   # Implicit bound values of type variables
+                 '_is_type_obj') # Does this represent a type object?
     
     # Implicit bound values of type variables. These can be either for
     # class type variables or for generic function type variables.
@@ -252,9 +259,6 @@ class Callable(FunctionLike):
     # (absolute value this time).
     #
     # Stored as tuples (id, type).
-    bound_vars = Undefined(List[Tuple[int, Type]])
-    
-    _is_type_obj = False # Does this represent a type object?
     
     def __init__(self, arg_types: List[Type],
                  arg_kinds: List[int],
@@ -268,17 +272,17 @@ class Callable(FunctionLike):
             variables = []
         if not bound_vars:
             bound_vars = []
-        self.arg_types = arg_types
-        self.arg_kinds = arg_kinds
-        self.arg_names = arg_names
-        self.min_args = arg_kinds.count(mypy.nodes.ARG_POS)
-        self.is_var_arg = mypy.nodes.ARG_STAR in arg_kinds
-        self.ret_type = ret_type
-        self._is_type_obj = is_type_obj
+        self.arg_types = arg_types # type: List[Type]
+        self.arg_kinds = arg_kinds # type: List[int]
+        self.arg_names = arg_names # type: List[str]
+        self.min_args = arg_kinds.count(mypy.nodes.ARG_POS) # type: int
+        self.is_var_arg = mypy.nodes.ARG_STAR in arg_kinds # type: bool
+        self.ret_type = ret_type # type: Type
+        self._is_type_obj = is_type_obj # type: bool
         assert not name or '<bound method' not in name
-        self.name = name
-        self.variables = variables
-        self.bound_vars = bound_vars
+        self.name = name # type: str
+        self.variables = variables # type: List[TypeVarDef]
+        self.bound_vars = bound_vars # type: List[Tuple[int, Type]]
         super().__init__(line, repr)
     
     def is_type_obj(self) -> bool:
@@ -332,10 +336,10 @@ class Overloaded(FunctionLike):
     matching signature is the target.
     """
     
-    _items = Undefined(List[Callable]) # Must not be empty
+    __slots__ = ('_items',) # _items must not be empty
     
     def __init__(self, items: List[Callable]) -> None:
-        self._items = items
+        self._items = items # type: List[Callable]
         super().__init__(items[0].line, None)
     
     def items(self) -> List[Callable]:
@@ -362,11 +366,11 @@ class Overloaded(FunctionLike):
 class TupleType(Type):
     """The tuple type Tuple[T1, ..., Tn] (at least one type argument)."""
     
-    items = Undefined(List[Type])
+    __slots__ = ('items',)
     
     def __init__(self, items: List[Type], line: int = -1,
                  repr: Any = None) -> None:
-        self.items = items
+        self.items = items # type: List[Type]
         super().__init__(line, repr)
     
     def length(self) -> int:
@@ -384,10 +388,10 @@ class RuntimeTypeVar(Type):
     mainly).
     """
     
-    node = Undefined(mypy.nodes.Node)
+    __slots__ = ('node',)
     
     def __init__(self, node: mypy.nodes.Node) -> None:
-        self.node = node
+        self.node = node # type: mypy.nodes.Node
         super().__init__(-1, None)
     
     def accept(self, visitor: 'TypeVisitor[T]') -> T:
@@ -626,6 +630,106 @@ class TypeStrVisitor(TypeVisitor[str]):
         return ', '.join(res)
 
 
+class TypeKeyVisitor(TypeVisitor[Any]):
+    """Visitor for constructing hashable keys that identify types.
+
+    Two types have equal keys if they are structurally identical (ignoring
+    line numbers and the original representation). Classes are identified by
+    TypeInfo object identity. Types that may still change or that have no
+    meaningful identity (unbound types, type lists and runtime type variables)
+    have the key None, as do types that contain them.
+    """
+    
+    def visit_unbound_type(self, t: UnboundType) -> Any:
+        return None
+
+    def visit_type_list(self, t: TypeList) -> Any:
+        return None
+    
+    def visit_error_type(self, t: ErrorType) -> Any:
+        return ('Error',)
+    
+    def visit_any(self, t: AnyType) -> Any:
+        return ('Any',)
+    
+    def visit_void(self, t: Void) -> Any:
+        return ('Void', t.source)
+    
+    def visit_none_type(self, t: NoneTyp) -> Any:
+        return ('None',)
+    
+    def visit_erased_type(self, t: ErasedType) -> Any:
+        return ('Erased',)
+    
+    def visit_instance(self, t: Instance) -> Any:
+        args = self.keys(t.args)
+        if args is None:
+            return None
+        return ('Instance', t.type, bool(t.erased), args)
+    
+    def visit_type_var(self, t: TypeVar) -> Any:
+        return ('TypeVar', t.name, t.id, t.is_wrapper_var)
+    
+    def visit_callable(self, t: Callable) -> Any:
+        arg_types = self.keys(t.arg_types)
+        ret_type = t.ret_type.accept(self)
+        if arg_types is None or ret_type is None:
+            return None
+        variables = List[Any]()
+        for v in t.variables:
+            values = ()
+            if v.values:
+                values = self.keys(v.values)
+                if values is None:
+                    return None
+            variables.append((v.name, v.id, values))
+        bound_vars = List[Any]()
+        for id, bt in t.bound_vars:
+            key = bt.accept(self)
+            if key is None:
+                return None
+            bound_vars.append((id, key))
+        return ('Callable', arg_types, tuple(t.arg_kinds),
+                tuple(t.arg_names), ret_type, t.is_type_obj(), t.name,
+                tuple(variables), tuple(bound_vars))
+    
+    def visit_overloaded(self, t: Overloaded) -> Any:
+        items = self.keys(t.items())
+        if items is None:
+            return None
+        return ('Overloaded', items)
+    
+    def visit_tuple_type(self, t: TupleType) -> Any:
+        items = self.keys(t.items)
+        if items is None:
+            return None
+        return ('Tuple', items)
+    
+    def visit_runtime_type_var(self, t: RuntimeTypeVar) -> Any:
+        return None
+    
+    def keys(self, types: List[Any]) -> Any:
+        """Return a tuple of the keys of types (or None if any is None)."""
+        result = List[Any]()
+        for t in types:
+            key = t.accept(self)
+            if key is None:
+                return None
+            result.append(key)
+        return tuple(result)
+
+
+_type_key_visitor = TypeKeyVisitor()
+
+
+def type_key(t: Type) -> Any:
+    """Return a hashable key that identifies a type structurally, or None.
+
+    See TypeKeyVisitor for details.
+    """
+    return t.accept(_type_key_visitor)
+
+
 # These constants define the method used by TypeQuery to combine multiple
 # query results, e.g. for tuple types. The strategy is not used for empty
 # result lists; in that case the default value takes precedence.
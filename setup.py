@@ -57,7 +57,7 @@ setup(name='mypy',
       package_dir={'': 'lib-typing/3.2', 'mypy': 'mypy'},
       py_modules=['typing'],
       packages=['mypy'],
-      scripts=['scripts/mypy'],
+      scripts=['scripts/mypy', 'scripts/mypy-client'],
       data_files=stubs,
       classifiers=classifiers,
       )
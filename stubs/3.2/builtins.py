@@ -25,6 +25,7 @@ property = object()
 class object:
     __doc__ = ''
     __class__ = Undefined # type: type
+    __dict__ = Undefined(Dict[str, Any])
     
     def __init__(self) -> None: pass
     
@@ -1064,7 +1065,8 @@ class BaseException:
 
 class GeneratorExit(BaseException): pass
 class KeyboardInterrupt(BaseException): pass
-class SystemExit(BaseException): pass
+class SystemExit(BaseException):
+    code = Undefined # type: Any
 
 # Base classes
 class Exception(BaseException): pass
@@ -0,0 +1,25 @@
+# Stubs for concurrent.futures
+
+# NOTE: These are incomplete!
+
+from typing import Any
+
+class Future:
+    def cancel(self) -> bool: pass
+    def cancelled(self) -> bool: pass
+    def running(self) -> bool: pass
+    def done(self) -> bool: pass
+    # TODO None value for float
+    def result(self, timeout: float = None) -> Any: pass
+    def exception(self, timeout: float = None) -> BaseException: pass
+
+class Executor:
+    def submit(self, fn: Any, *args: Any,
+               **kwargs: Any) -> Future: pass
+    def shutdown(self, wait: bool = True) -> None: pass
+
+class ThreadPoolExecutor(Executor):
+    def __init__(self, max_workers: int) -> None: pass
+
+class ProcessPoolExecutor(Executor):
+    def __init__(self, max_workers: int = None) -> None: pass
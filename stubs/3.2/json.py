@@ -0,0 +1,23 @@
+# Stubs for json
+
+# NOTE: These are incomplete!
+
+from typing import Any, IO
+
+def dumps(obj: Any, *, skipkeys: bool = False, ensure_ascii: bool = True,
+          check_circular: bool = True, allow_nan: bool = True,
+          cls: Any = None, indent: Any = None, separators: Any = None,
+          default: Any = None, sort_keys: bool = False) -> str: pass
+def dump(obj: Any, fp: IO, *, skipkeys: bool = False,
+         ensure_ascii: bool = True, check_circular: bool = True,
+         allow_nan: bool = True, cls: Any = None, indent: Any = None,
+         separators: Any = None, default: Any = None,
+         sort_keys: bool = False) -> None: pass
+def loads(s: str, *, cls: Any = None, object_hook: Any = None,
+          parse_float: Any = None, parse_int: Any = None,
+          parse_constant: Any = None,
+          object_pairs_hook: Any = None) -> Any: pass
+def load(fp: IO, *, cls: Any = None, object_hook: Any = None,
+         parse_float: Any = None, parse_int: Any = None,
+         parse_constant: Any = None,
+         object_pairs_hook: Any = None) -> Any: pass
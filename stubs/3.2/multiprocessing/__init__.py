@@ -0,0 +1,33 @@
+# Stubs for multiprocessing
+
+# NOTE: These are incomplete!
+
+from typing import Any, Dict, Tuple
+
+from multiprocessing.connection import Connection
+
+class Process:
+    name = ''
+    pid = 0
+    exitcode = 0
+    daemon = False
+    
+    def __init__(self, group: Any = None, target: Any = None, name: str = None,
+                 args: Any = (), kwargs: Dict[Any, Any] = None) -> None: pass
+    def start(self) -> None: pass
+    def run(self) -> None: pass
+    # TODO None value for float
+    def join(self, timeout: float = None) -> None: pass
+    def is_alive(self) -> bool: pass
+    def terminate(self) -> None: pass
+
+class BaseContext:
+    # TODO this is the Process class of the context
+    def Process(self, group: Any = None, target: Any = None, name: str = None,
+                args: Any = (), kwargs: Dict[Any, Any] = None) -> Any: pass
+    def Pipe(self, duplex: bool = True) -> Tuple[Connection, Connection]: pass
+    def cpu_count(self) -> int: pass
+
+def get_context(method: str = None) -> BaseContext: pass
+def Pipe(duplex: bool = True) -> Tuple[Connection, Connection]: pass
+def cpu_count() -> int: pass
@@ -0,0 +1,27 @@
+# Stubs for multiprocessing.connection
+
+# NOTE: These are incomplete!
+
+from typing import Undefined, Any, List, Iterable
+
+class AuthenticationError(Exception): pass
+
+class Connection:
+    def send(self, obj: Any) -> None: pass
+    def recv(self) -> Any: pass
+    def poll(self, timeout: float = 0.0) -> bool: pass
+    def fileno(self) -> int: pass
+    def close(self) -> None: pass
+
+class Listener:
+    def __init__(self, address: Any = None, family: str = None,
+                 backlog: int = 1, authkey: bytes = None) -> None: pass
+    def accept(self) -> Connection: pass
+    def close(self) -> None: pass
+    address = Undefined(Any)
+
+def Client(address: Any, family: str = None,
+           authkey: bytes = None) -> Connection: pass
+
+# TODO None value for float
+def wait(object_list: Iterable[Any], timeout: float = None) -> List[Any]: pass
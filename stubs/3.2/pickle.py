@@ -4,9 +4,30 @@
 
 from typing import Any, IO
 
+HIGHEST_PROTOCOL = 0
+DEFAULT_PROTOCOL = 0
+
+def dump(obj: Any, file: IO, protocol: int = None, *,
+         fix_imports: bool = True) -> None: pass
 def dumps(obj: Any, protocol: int = None, *,
           fix_imports: bool = True) -> bytes: pass
 def loads(p: bytes, *, fix_imports: bool = True,
           encoding: str = 'ASCII', errors: str = 'strict') -> Any: pass
 def load(file: IO, *, fix_imports: bool = True, encoding: str = 'ASCII',
          errors: str = 'strict') -> Any: pass
+
+class PickleError(Exception): pass
+class PicklingError(PickleError): pass
+class UnpicklingError(PickleError): pass
+
+class Pickler:
+    def __init__(self, file: IO, protocol: int = None, *,
+                 fix_imports: bool = True) -> None: pass
+    def dump(self, obj: Any) -> None: pass
+    def persistent_id(self, obj: Any) -> Any: pass
+
+class Unpickler:
+    def __init__(self, file: IO, *, fix_imports: bool = True,
+                 encoding: str = 'ASCII', errors: str = 'strict') -> None: pass
+    def load(self) -> Any: pass
+    def persistent_load(self, pid: Any) -> Any: pass
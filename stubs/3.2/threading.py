@@ -32,6 +32,14 @@ class Event:
     # TOOD None value for float
     def wait(self, timeout: float = None) -> bool: pass
 
+class Lock:
+    # TODO may return None
+    def acquire(self, blocking: bool = True,
+                timeout: float = -1.0) -> bool: pass
+    def release(self) -> None: pass
+    def __enter__(self) -> bool: pass
+    def __exit__(self, type, value, traceback) -> None: pass
+
 class RLock:
     # TODO may return None
     def acquire(self, blocking: bool = True,
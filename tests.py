@@ -16,6 +16,9 @@ from mypy.test import testtypegen
 from mypy.test import testoutput
 from mypy.test import testdyncheck
 from mypy.test import testicodegen
+from mypy.test import testbuild
+from mypy.test import testerrors
+from mypy.test import testmyunit
 
 
 class AllSuite(Suite):
@@ -24,22 +27,30 @@ class AllSuite(Suite):
         self.test_typeops = testtypes.TypeOpsSuite()
         self.test_join = testtypes.JoinSuite()
         self.test_meet = testtypes.MeetSuite()
+        self.test_member_lookup = testtypes.MemberLookupSuite()
         self.test_subtypes = testsubtypes.SubtypingSuite()
         self.test_solve = testsolve.SolveSuite()
         self.test_infer = testinfer.MapActualsToFormalsSuite()
         self.test_lex = testlex.LexerSuite()
         self.test_parse = testparse.ParserSuite()
         self.test_parse_errors = testparse.ParseErrorSuite()
+        self.test_parse_without_repr = testparse.NoReprParserSuite()
         self.test_semanal = testsemanal.SemAnalSuite()
         self.test_semanal_errors = testsemanal.SemAnalErrorSuite()
         self.test_semanal_symtable = testsemanal.SemAnalSymtableSuite()
         self.test_semanal_typeinfos = testsemanal.SemAnalTypeInfoSuite()
         self.test_transform = testtransform.TransformSuite()
         self.test_check = testcheck.TypeCheckSuite()
+        self.test_check_parallel = testcheck.ParallelTypeCheckSuite()
         self.test_typegen = testtypegen.TypeExportSuite()
         self.test_output = testoutput.OutputSuite()
         self.test_dyncheck = testdyncheck.DyncheckTransformSuite()
         self.test_icodegen = testicodegen.IcodeGenerationSuite()
+        self.test_icodeopt = testicodegen.IcodeOptimizationSuite()
+        self.test_build = testbuild.BuildSuite()
+        self.test_errors = testerrors.ErrorsSuite()
+        self.test_script_errors = testerrors.ScriptErrorsSuite()
+        self.test_myunit = testmyunit.MyunitSuite()
         super().__init__()
 
 
@@ -0,0 +1,295 @@
+/* Generational copying garbage collector (see the comment in mypy.h) */
+
+#include <stdio.h>
+#include <string.h>
+#include <time.h>
+#include "mypy.h"
+
+/* Size of the nursery in bytes */
+#define M_NURSERY_SIZE (1L << 20)
+
+/* Minimum size of other chunks in bytes */
+#define M_CHUNK_SIZE (1L << 20)
+
+/* Perform a major collection when the old generation has grown to this
+   many bytes, or to twice its size after the previous major collection */
+#define M_MIN_MAJOR_THRESHOLD (8L << 20)
+
+MHeap MTheHeap;
+MGCStats MTheGCStats;
+
+/* Is a major collection in progress? */
+static int MMajor;
+
+
+static inline char *MChunkStart(MChunk *chunk)
+{
+    return (char *)(chunk + 1);
+}
+
+static inline size_t MObjectSize(MInstanceHeader *h)
+{
+    return h->gcinfo >> M_GC_FLAG_BITS;
+}
+
+/* Allocate a zero-initialized chunk with room for size bytes. */
+static MChunk *MNewChunk(size_t size)
+{
+    MChunk *chunk = calloc(1, sizeof(MChunk) + size);
+    if (chunk == NULL) {
+        fprintf(stderr, "Out of memory\n");
+        abort();
+    }
+    chunk->next = NULL;
+    chunk->top = MChunkStart(chunk);
+    chunk->end = chunk->top + size;
+    return chunk;
+}
+
+static void MFreeChunks(MChunk *chunk)
+{
+    while (chunk != NULL) {
+        MChunk *next = chunk->next;
+        free(chunk);
+        chunk = next;
+    }
+}
+
+static void MInitHeap(void)
+{
+    MTheHeap.nursery = MNewChunk(M_NURSERY_SIZE);
+    MTheHeap.young_chunk = MTheHeap.nursery;
+    MTheHeap.young_top = MTheHeap.nursery->top;
+    MTheHeap.young_end = MTheHeap.nursery->end;
+    MTheHeap.major_threshold = M_MIN_MAJOR_THRESHOLD;
+}
+
+/* Continue allocating young objects in a new chunk with room for at least
+   size bytes. */
+static void MNewYoungChunk(size_t size)
+{
+    MChunk *chunk = MNewChunk(size > M_CHUNK_SIZE ? size : M_CHUNK_SIZE);
+    MTheHeap.young_chunk->top = MTheHeap.young_top;
+    chunk->next = MTheHeap.extra_young;
+    MTheHeap.extra_young = chunk;
+    MTheHeap.young_chunk = chunk;
+    MTheHeap.young_top = chunk->top;
+    MTheHeap.young_end = chunk->end;
+}
+
+/* Return the number of bytes allocated in the young generation. */
+static size_t MYoungSize(void)
+{
+    size_t size = MTheHeap.young_top - MChunkStart(MTheHeap.young_chunk);
+    if (MTheHeap.young_chunk != MTheHeap.nursery)
+        size += MTheHeap.nursery->top - MChunkStart(MTheHeap.nursery);
+    for (MChunk *c = MTheHeap.extra_young; c != NULL; c = c->next) {
+        if (c != MTheHeap.young_chunk)
+            size += c->top - MChunkStart(c);
+    }
+    return size;
+}
+
+MValue MAllocSlow(MEnv *e, size_t size)
+{
+    if (MTheHeap.nursery == NULL)
+        MInitHeap();
+    else
+        MCollect(e);
+    if ((size_t)(MTheHeap.young_end - MTheHeap.young_top) < size)
+        MNewYoungChunk(size);
+    return MAlloc(e, size);
+}
+
+MValue MAllocData(MEnv *e, size_t size)
+{
+    size = MAlignSize(size);
+    if (MTheHeap.nursery == NULL)
+        MInitHeap();
+    if ((size_t)(MTheHeap.young_end - MTheHeap.young_top) < size) {
+        /* We can't collect garbage here, so defer the collection. */
+        MNewYoungChunk(size);
+        MTheHeap.pending = 1;
+    }
+    char *p = MTheHeap.young_top;
+    MTheHeap.young_top = p + size;
+    ((MInstanceHeader *)p)->gcinfo = (size << M_GC_FLAG_BITS) | M_GC_NO_REFS;
+    return (MValue)p | 1;
+}
+
+void MRemember(MValue object)
+{
+    if (MTheHeap.num_remembered == MTheHeap.max_remembered) {
+        MTheHeap.max_remembered = 2 * MTheHeap.max_remembered + 64;
+        MTheHeap.remembered = realloc(MTheHeap.remembered,
+                                      MTheHeap.max_remembered *
+                                      sizeof(MValue));
+        if (MTheHeap.remembered == NULL) {
+            fprintf(stderr, "Out of memory\n");
+            abort();
+        }
+    }
+    MTheHeap.remembered[MTheHeap.num_remembered++] = object;
+    MHeader(object)->gcinfo |= M_GC_REMEMBERED;
+}
+
+/* Allocate space for a copied object in the old generation. */
+static char *MAllocOld(size_t size)
+{
+    MChunk *tail = MTheHeap.old_tail;
+    if (tail == NULL || (size_t)(tail->end - tail->top) < size) {
+        MChunk *chunk = MNewChunk(size > M_CHUNK_SIZE ? size : M_CHUNK_SIZE);
+        if (tail == NULL)
+            MTheHeap.old = chunk;
+        else
+            tail->next = chunk;
+        MTheHeap.old_tail = tail = chunk;
+    }
+    char *p = tail->top;
+    tail->top += size;
+    MTheHeap.old_size += size;
+    return p;
+}
+
+/* Copy an object to the old generation, unless it's already there (or
+   the value is not a reference). Return the new value. */
+static MValue MEvacuate(MValue v)
+{
+    if (!MIsPointer(v))
+        return v;
+    MInstanceHeader *h = MHeader(v);
+    MValue info = h->gcinfo;
+    if (info & M_GC_FORWARDED)
+        return (MValue)h->type;
+    if ((info & M_GC_OLD) && !MMajor)
+        return v;
+    size_t size = info >> M_GC_FLAG_BITS;
+    char *p = MAllocOld(size);
+    memcpy(p, h, size);
+    ((MInstanceHeader *)p)->gcinfo = (size << M_GC_FLAG_BITS) | M_GC_OLD |
+        (info & M_GC_NO_REFS);
+    MValue copy = (MValue)p | 1;
+    h->type = (MTypeRepr *)copy;
+    h->gcinfo = info | M_GC_FORWARDED;
+    if (!(info & M_GC_OLD))
+        MTheGCStats.promoted += size;
+    return copy;
+}
+
+static void MScanObject(MInstanceHeader *h)
+{
+    if (h->gcinfo & M_GC_NO_REFS)
+        return;
+    MValue *slot = (MValue *)(h + 1);
+    MValue *end = (MValue *)((char *)h + MObjectSize(h));
+    for (; slot < end; slot++)
+        *slot = MEvacuate(*slot);
+}
+
+/* Scan the objects copied to the old generation, starting from address p
+   in chunk (or from the first chunk if chunk is NULL). Scanning may copy
+   more objects. */
+static void MScanCopied(MChunk *chunk, char *p)
+{
+    if (chunk == NULL) {
+        chunk = MTheHeap.old;
+        if (chunk == NULL)
+            return;
+        p = MChunkStart(chunk);
+    }
+    for (;;) {
+        while (p < chunk->top) {
+            MInstanceHeader *h = (MInstanceHeader *)p;
+            MScanObject(h);
+            p += MObjectSize(h);
+        }
+        if (chunk->next == NULL)
+            break;
+        chunk = chunk->next;
+        p = MChunkStart(chunk);
+    }
+}
+
+static void MScanRoots(MEnv *e)
+{
+    for (MValue *p = e->stack; p < e->frame; p++)
+        *p = MEvacuate(*p);
+    for (long i = 0; i < e->num_globals; i++)
+        e->globals[i] = MEvacuate(e->globals[i]);
+}
+
+static void MMinorCollection(MEnv *e)
+{
+    MChunk *start_chunk = MTheHeap.old_tail;
+    char *start = start_chunk ? start_chunk->top : NULL;
+    MMajor = 0;
+    MScanRoots(e);
+    for (size_t i = 0; i < MTheHeap.num_remembered; i++) {
+        MInstanceHeader *h = MHeader(MTheHeap.remembered[i]);
+        MScanObject(h);
+        h->gcinfo &= ~(MValue)M_GC_REMEMBERED;
+    }
+    MScanCopied(start_chunk, start);
+    MTheGCStats.minor_collections++;
+}
+
+static void MMajorCollection(MEnv *e)
+{
+    MChunk *from = MTheHeap.old;
+    MTheHeap.old = MTheHeap.old_tail = NULL;
+    MTheHeap.old_size = 0;
+    MMajor = 1;
+    MScanRoots(e);
+    MScanCopied(NULL, NULL);
+    MFreeChunks(from);
+    MTheGCStats.live = MTheHeap.old_size;
+    MTheHeap.major_threshold = 2 * MTheHeap.old_size;
+    if (MTheHeap.major_threshold < M_MIN_MAJOR_THRESHOLD)
+        MTheHeap.major_threshold = M_MIN_MAJOR_THRESHOLD;
+    MTheGCStats.major_collections++;
+}
+
+void MCollect(MEnv *e)
+{
+    clock_t t0 = clock();
+    size_t young_size = MYoungSize();
+    size_t heap_size = young_size + MTheHeap.old_size;
+    if (heap_size > MTheGCStats.max_heap)
+        MTheGCStats.max_heap = heap_size;
+    MTheGCStats.allocated += young_size;
+    MTheHeap.young_chunk->top = MTheHeap.young_top;
+
+    if (MTheHeap.old_size >= MTheHeap.major_threshold)
+        MMajorCollection(e);
+    else
+        MMinorCollection(e);
+    MTheHeap.num_remembered = 0;
+    MTheHeap.pending = 0;
+
+    /* All young objects have been copied, so the young generation can be
+       reused. */
+    MChunk *nursery = MTheHeap.nursery;
+    memset(MChunkStart(nursery), 0, nursery->top - MChunkStart(nursery));
+    nursery->top = MChunkStart(nursery);
+    MFreeChunks(MTheHeap.extra_young);
+    MTheHeap.extra_young = NULL;
+    MTheHeap.young_chunk = nursery;
+    MTheHeap.young_top = nursery->top;
+    MTheHeap.young_end = nursery->end;
+    MTheGCStats.seconds += (double)(clock() - t0) / CLOCKS_PER_SEC;
+}
+
+void MPrintGCStats(void)
+{
+    size_t allocated = MTheGCStats.allocated;
+    if (MTheHeap.nursery != NULL)
+        allocated += MYoungSize();
+    fprintf(stderr, "gc: %ld minor and %ld major collections in %.3f s\n",
+            MTheGCStats.minor_collections, MTheGCStats.major_collections,
+            MTheGCStats.seconds);
+    fprintf(stderr, "gc: %zu bytes allocated, %zu bytes promoted\n",
+            allocated, MTheGCStats.promoted);
+    fprintf(stderr, "gc: %zu bytes live after the last major collection, "
+            "heap size at most %zu bytes\n",
+            MTheGCStats.live, MTheGCStats.max_heap);
+}
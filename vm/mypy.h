@@ -13,6 +13,11 @@ typedef int MBool;
 typedef struct {
     MValue *frame;
     MValue *stack_top;
+    /* Garbage collection roots: the frames in [stack, frame) and the global
+       variables */
+    MValue *stack;
+    MValue *globals;
+    long num_globals;
 } MEnv;
 
 typedef MValue (*MFunction)(MEnv *e);
@@ -25,20 +30,105 @@ typedef struct {
 } MTypeRepr;
 
 typedef struct {
-    MTypeRepr *type;
-    MValue gcinfo; /* TODO this is just a placeholder */
+    MTypeRepr *type;    /* Forwarding address if M_GC_FORWARDED is set */
+    MValue gcinfo;      /* Object size in bytes and M_GC_* flags */
 } MInstanceHeader;
 
 #define MNone  0x1L
 #define MError 0x3L
 
+/* Heap objects are referenced by their address + 1. */
+#define MIsPointer(v) (((v) & 1) && (v) > MError)
+
 /* Dummy error handler; used instead of raising an exception for now */
 MValue MAbort(MEnv *e);
 
+/* Garbage collection (see gc.c)
+
+   New objects are allocated from the nursery by bumping a pointer. When the
+   nursery is full, a minor collection copies the objects in the nursery
+   that are reachable from the roots (see MEnv) or from old objects to the
+   old generation. When the old generation has grown enough, a major
+   collection copies all reachable objects to a new old generation.
+
+   Garbage is only collected during MAlloc (a Construct operation) and on
+   function entry (see MCollectIfPending), since compiled code keeps only the
+   values that are live across these points in frames, where the collector
+   can find and update them. */
+
+/* gcinfo flags */
+#define M_GC_OLD        1   /* In the old generation */
+#define M_GC_REMEMBERED 2   /* In the remembered set */
+#define M_GC_FORWARDED  4   /* Copied during collection */
+#define M_GC_NO_REFS    8   /* Contains no references (e.g. a long int) */
+#define M_GC_FLAG_BITS  4
+
+typedef struct MChunk {
+    struct MChunk *next;
+    char *top;  /* Start of the free space */
+    char *end;
+} MChunk;
+
+typedef struct {
+    char *young_top;       /* Bump pointer of the young generation */
+    char *young_end;
+    MChunk *young_chunk;   /* Chunk that contains the bump pointer */
+    MChunk *nursery;
+    MChunk *extra_young;   /* Chunks for objects that didn't fit in the
+                              nursery */
+    MChunk *old;           /* Old generation (in allocation order) */
+    MChunk *old_tail;
+    size_t old_size;       /* Bytes in the old generation */
+    size_t major_threshold;
+    MValue *remembered;    /* Old objects that may refer to young objects */
+    size_t num_remembered;
+    size_t max_remembered;
+    int pending;           /* Collect at the next opportunity */
+} MHeap;
+
+typedef struct {
+    long minor_collections;
+    long major_collections;
+    size_t allocated;      /* Total bytes allocated */
+    size_t promoted;       /* Total bytes copied to the old generation */
+    size_t live;           /* Bytes in the old generation after the last
+                              major collection */
+    size_t max_heap;       /* Largest heap size (in bytes) */
+    double seconds;        /* Total time spent collecting */
+} MGCStats;
+
+extern MHeap MTheHeap;
+extern MGCStats MTheGCStats;
+
+MValue MAllocSlow(MEnv *e, size_t size);
+MValue MAllocData(MEnv *e, size_t size);
+void MCollect(MEnv *e);
+void MRemember(MValue object);
+void MPrintGCStats(void);
+
+static inline size_t MAlignSize(size_t size)
+{
+    return (size + sizeof(MValue) - 1) & ~(sizeof(MValue) - 1);
+}
+
+/* Allocate a zero-initialized object; may collect garbage. */
 static inline MValue MAlloc(MEnv *e, size_t size)
 {
-    // TODO use garbage collector heap
-    return (MValue)malloc(size) | 1;
+    size = MAlignSize(size);
+    char *p = MTheHeap.young_top;
+    if ((size_t)(MTheHeap.young_end - p) < size)
+        return MAllocSlow(e, size);
+    MTheHeap.young_top = p + size;
+    ((MInstanceHeader *)p)->gcinfo = size << M_GC_FLAG_BITS;
+    return (MValue)p | 1;
+}
+
+/* Collect garbage if an allocation that could not collect garbage
+   (MAllocData) ran out of space in the nursery. */
+static inline void MCollectIfPending(MEnv *e)
+{
+    if (MTheHeap.pending)
+        MCollect(e);
 }
 
 static inline MInstanceHeader *MHeader(MValue instance)
@@ -50,7 +140,6 @@ static inline void MInitInstance(MValue instance, MTypeRepr *type)
 {
     MInstanceHeader *h = MHeader(instance);
     h->type = type;
-    h->gcinfo = 0;
 }
 
 static inline MValue *MSlotPtr(MValue object, int index)
@@ -65,7 +154,11 @@ static inline MValue MGetSlot(MValue object, int index) {
 
 /* Assume object != MNone */
 static inline void MSetSlot(MValue object, int index, MValue value) {
-    /* TODO use write barrier */
+    /* Write barrier: remember old objects that refer to young objects. */
+    MValue info = MHeader(object)->gcinfo;
+    if ((info & (M_GC_OLD | M_GC_REMEMBERED)) == M_GC_OLD &&
+            MIsPointer(value) && !(MHeader(value)->gcinfo & M_GC_OLD))
+        MRemember(object);
     *MSlotPtr(object, index)  = value;
 }
 
@@ -78,8 +171,22 @@ static inline MValue MInvokeVirtual(MEnv *e, MValue receiver,
     return h->type->vtable[vtable_index](e);
 }
 
+/* Call a method whose implementation is known at compile time. */
+static inline MValue MInvokeDirect(MEnv *e, MValue receiver, MFunction method)
+{
+    if (receiver == MNone)
+        return MAbort(e);
+    return method(e);
+}
+
+/* Is value an instance of exactly the given type (not a subtype)? */
+static inline MBool MHasType(MValue value, MTypeRepr *type)
+{
+    return value != MNone && MHeader(value)->type == type;
+}
+
 /* TODO do not assume 64-bit values */
-#define M_SHORT_MIN (-0x8000000000000001L - 1)
+#define M_SHORT_MIN (-0x7fffffffffffffffL - 1)
 
 /* Short ints have the lowest bit unset. */
 #define MIsShort(v) (((v) & 1) == 0)
@@ -104,6 +211,10 @@ MValue MIntShr(MEnv *e, MValue x, MValue y);
 MValue MIntUnaryMinus(MEnv *e, MValue x);
 MValue MIntInvert(MEnv *e, MValue x);
 
+/* Construct an int from a string of decimal digits (used for literals that
+   don't fit in a short int). */
+MValue MIntFromDecimal(MEnv *e, const char *s);
+
 /* TODO this is just a trivial dummy print placeholder for test cases */
 MValue Mprint(MEnv *e);
 
@@ -119,13 +230,13 @@ static inline MBool MIsSubOverflow(MValue diff, MValue left, MValue right)
             (MSignedValue)(diff ^ right) >= 0);
 }
 
-/* The multiplication of two non-negative values no larger than this constant
+/* The multiplication of two non-negative values smaller than this constant
    always fits in a short int. */
 #define M_SAFE_MUL (0x80000000L * 2)
 
 static inline MBool MIsPotentialMulOverflow(MValue left, MValue right)
 {
-    return left > M_SAFE_MUL || right > M_SAFE_MUL;
+    return left >= M_SAFE_MUL || right >= M_SAFE_MUL;
 }
 
 static inline MBool MIsPotentialFloorDivOverflow(MValue left, MValue right)
@@ -143,9 +254,11 @@ static inline MBool MIsShlOverflow(MValue n, MValue s)
     return s >= M_VALUE_BITS || ((n << s) >> s) != n;
 }
 
+/* Right shifts of negative values are handled by MIntShr, since the fast
+   path uses a logical shift. */
 static inline MBool MIsShrOverflow(MValue n, MValue s)
 {
-    return s >= M_VALUE_BITS || (MSignedValue)s < 0;
+    return s >= M_VALUE_BITS || (MSignedValue)s < 0 || (MSignedValue)n < 0;
 }
 
 static inline MBool MShortEq(MValue left, MValue right)
@@ -1,4 +1,6 @@
+#include <stdint.h>
 #include <stdio.h>
+#include <string.h>
 #include "mypy.h"
 
 
@@ -8,126 +10,686 @@ MValue MAbort(MEnv *e)
 }
 
 
+/* Long ints
+
+   Ints outside the range of short ints are boxed long ints. The magnitude
+   of a long int is an array of digits (least significant digit first), and
+   the sign is the sign of the size. Results that fit in a short int are
+   always returned as short ints, so a long int never equals a short int.
+
+   These functions allocate memory using MAllocData, which never collects
+   garbage, since int operations are not GC points in compiled code (see
+   mypy.regalloc). Errors (such as division by zero) are handled by
+   MAbort. */
+
+typedef uint32_t MDigit;
+typedef uint64_t MDoubleDigit;
+typedef int64_t MSignedDoubleDigit;
+
+#define M_DIGIT_BITS 32
+#define M_DIGIT_BASE ((MDoubleDigit)1 << M_DIGIT_BITS)
+
+/* The largest shift count supported by left shifts. */
+#define M_MAX_SHIFT (1L << 30)
+
+typedef struct {
+    MInstanceHeader header;
+    long size; /* Number of digits; negative for negative values */
+    MDigit digits[];
+} MLongInt;
+
+static MTypeRepr MLongIntType = { NULL, 0, "builtins.int" };
+
+/* Sign and magnitude of an int operand (a short int or a long int) */
+typedef struct {
+    int negative;
+    long n;          /* Number of digits, without leading zero digits */
+    MDigit *digits;
+    MDigit buf[2];   /* Digits of a short int */
+} MNum;
+
+static inline MLongInt *MLong(MValue v)
+{
+    return (MLongInt *)MHeader(v);
+}
+
+static inline int MIsLong(MValue v)
+{
+    return !MIsShort(v) && v != MNone && MHeader(v)->type == &MLongIntType;
+}
+
+static void MGetNum(MValue v, MNum *num)
+{
+    if (MIsShort(v)) {
+        MSignedValue x = (MSignedValue)v / 2;
+        MDoubleDigit m = x < 0 ? -(MDoubleDigit)x : (MDoubleDigit)x;
+        num->negative = x < 0;
+        num->buf[0] = (MDigit)m;
+        num->buf[1] = (MDigit)(m >> M_DIGIT_BITS);
+        num->n = num->buf[1] ? 2 : (num->buf[0] ? 1 : 0);
+        num->digits = num->buf;
+    } else {
+        MLongInt *l = MLong(v);
+        num->negative = l->size < 0;
+        num->n = l->size < 0 ? -l->size : l->size;
+        num->digits = l->digits;
+    }
+}
+
+/* Allocate an uninitialized long int with room for n digits. */
+static MLongInt *MNewLong(MEnv *e, long n)
+{
+    MValue v = MAllocData(e, sizeof(MLongInt) + n * sizeof(MDigit));
+    MInitInstance(v, &MLongIntType);
+    return MLong(v);
+}
+
+/* Finish a long int whose magnitude has n digits (possibly with leading
+   zero digits). If the value fits in a short int, return the short int. */
+static MValue MFinishLong(MLongInt *l, int negative, long n)
+{
+    while (n > 0 && l->digits[n - 1] == 0)
+        n--;
+    if (n <= 2) {
+        MDoubleDigit m = n == 0 ? 0 : l->digits[0];
+        if (n == 2)
+            m |= (MDoubleDigit)l->digits[1] << M_DIGIT_BITS;
+        if (m < ((MDoubleDigit)1 << 62))
+            return (MValue)(negative ? -(MSignedDoubleDigit)m
+                            : (MSignedDoubleDigit)m) << 1;
+        else if (negative && m == ((MDoubleDigit)1 << 62))
+            return (MValue)M_SHORT_MIN;
+    }
+    l->size = negative ? -n : n;
+    return (MValue)l | 1;
+}
+
+/* Return an int with the given sign and magnitude. */
+static MValue MMakeInt(MEnv *e, int negative, const MDigit *digits, long n)
+{
+    while (n > 0 && digits[n - 1] == 0)
+        n--;
+    MLongInt *l = MNewLong(e, n);
+    memcpy(l->digits, digits, n * sizeof(MDigit));
+    return MFinishLong(l, negative, n);
+}
+
+static MValue MFromSigned(MEnv *e, MSignedDoubleDigit x)
+{
+    if (x >= M_SHORT_MIN / 2 && x <= -(M_SHORT_MIN / 2) - 1)
+        return (MValue)x << 1;
+    MDoubleDigit m = x < 0 ? -(MDoubleDigit)x : (MDoubleDigit)x;
+    MDigit digits[2] = { (MDigit)m, (MDigit)(m >> M_DIGIT_BITS) };
+    return MMakeInt(e, x < 0, digits, 2);
+}
+
+/* Compare magnitudes; return -1, 0 or 1. */
+static int MCompareMagnitude(const MNum *a, const MNum *b)
+{
+    if (a->n != b->n)
+        return a->n < b->n ? -1 : 1;
+    for (long i = a->n - 1; i >= 0; i--) {
+        if (a->digits[i] != b->digits[i])
+            return a->digits[i] < b->digits[i] ? -1 : 1;
+    }
+    return 0;
+}
+
+/* Compare values; return -1, 0 or 1. */
+static int MCompare(MValue x, MValue y)
+{
+    MNum a, b;
+    MGetNum(x, &a);
+    MGetNum(y, &b);
+    if (a.negative != b.negative)
+        return a.negative ? -1 : 1;
+    int c = MCompareMagnitude(&a, &b);
+    return a.negative ? -c : c;
+}
+
+/* r = |a| + |b|; r has room for max(a->n, b->n) + 1 digits. */
+static long MAddMagnitude(MDigit *r, const MNum *a, const MNum *b)
+{
+    if (a->n < b->n) {
+        const MNum *t = a;
+        a = b;
+        b = t;
+    }
+    MDoubleDigit carry = 0;
+    long i;
+    for (i = 0; i < b->n; i++) {
+        carry += (MDoubleDigit)a->digits[i] + b->digits[i];
+        r[i] = (MDigit)carry;
+        carry >>= M_DIGIT_BITS;
+    }
+    for (; i < a->n; i++) {
+        carry += a->digits[i];
+        r[i] = (MDigit)carry;
+        carry >>= M_DIGIT_BITS;
+    }
+    r[i] = (MDigit)carry;
+    return i + 1;
+}
+
+/* r = |a| - |b|, assuming |a| >= |b|; r has room for a->n digits. */
+static long MSubMagnitude(MDigit *r, const MNum *a, const MNum *b)
+{
+    MSignedDoubleDigit borrow = 0;
+    long i;
+    for (i = 0; i < b->n; i++) {
+        borrow += (MSignedDoubleDigit)a->digits[i] - b->digits[i];
+        r[i] = (MDigit)borrow;
+        borrow >>= M_DIGIT_BITS;
+    }
+    for (; i < a->n; i++) {
+        borrow += a->digits[i];
+        r[i] = (MDigit)borrow;
+        borrow >>= M_DIGIT_BITS;
+    }
+    return a->n;
+}
+
+/* Return a + b, or a - b if subtract is true. */
+static MValue MAddNums(MEnv *e, const MNum *a, const MNum *b, int subtract)
+{
+    int b_negative = b->negative ^ subtract;
+    long n = (a->n > b->n ? a->n : b->n) + 1;
+    MLongInt *l = MNewLong(e, n);
+    if (a->negative == b_negative) {
+        n = MAddMagnitude(l->digits, a, b);
+        return MFinishLong(l, a->negative, n);
+    } else if (MCompareMagnitude(a, b) >= 0) {
+        n = MSubMagnitude(l->digits, a, b);
+        return MFinishLong(l, a->negative, n);
+    } else {
+        n = MSubMagnitude(l->digits, b, a);
+        return MFinishLong(l, b_negative, n);
+    }
+}
+
+/* Divide |a| by |b| (b->n > 0, |a| >= |b|). Store the quotient in q
+   (a->n - b->n + 1 digits) and the remainder in r (b->n digits). This is
+   Algorithm D from Knuth, TAOCP Vol 2, 4.3.1. */
+static void MDivMagnitude(MDigit *q, MDigit *r, const MNum *a, const MNum *b)
+{
+    long na = a->n;
+    long nb = b->n;
+    if (nb == 1) {
+        MDoubleDigit rem = 0;
+        for (long i = na - 1; i >= 0; i--) {
+            MDoubleDigit cur = (rem << M_DIGIT_BITS) | a->digits[i];
+            q[i] = (MDigit)(cur / b->digits[0]);
+            rem = cur % b->digits[0];
+        }
+        r[0] = (MDigit)rem;
+        return;
+    }
+    /* Normalize so that the most significant digit of the divisor has the
+       highest bit set. */
+    int s = __builtin_clz(b->digits[nb - 1]);
+    MDigit *un = malloc((na + 1 + nb) * sizeof(MDigit));
+    MDigit *vn = un + na + 1;
+    for (long i = nb - 1; i > 0; i--)
+        vn[i] = (b->digits[i] << s) |
+            (MDigit)((MDoubleDigit)b->digits[i - 1] >> (M_DIGIT_BITS - s));
+    vn[0] = b->digits[0] << s;
+    un[na] = (MDigit)((MDoubleDigit)a->digits[na - 1] >> (M_DIGIT_BITS - s));
+    for (long i = na - 1; i > 0; i--)
+        un[i] = (a->digits[i] << s) |
+            (MDigit)((MDoubleDigit)a->digits[i - 1] >> (M_DIGIT_BITS - s));
+    un[0] = a->digits[0] << s;
+    for (long j = na - nb; j >= 0; j--) {
+        /* Estimate the quotient digit. */
+        MDoubleDigit num = ((MDoubleDigit)un[j + nb] << M_DIGIT_BITS) |
+            un[j + nb - 1];
+        MDoubleDigit qhat = num / vn[nb - 1];
+        MDoubleDigit rhat = num % vn[nb - 1];
+        while (qhat >= M_DIGIT_BASE ||
+               qhat * vn[nb - 2] > ((rhat << M_DIGIT_BITS) | un[j + nb - 2])) {
+            qhat--;
+            rhat += vn[nb - 1];
+            if (rhat >= M_DIGIT_BASE)
+                break;
+        }
+        /* Multiply and subtract. */
+        MSignedDoubleDigit k = 0;
+        MSignedDoubleDigit t;
+        for (long i = 0; i < nb; i++) {
+            MDoubleDigit p = qhat * vn[i];
+            t = (MSignedDoubleDigit)un[i + j] - k -
+                (MSignedDoubleDigit)(p & 0xffffffffUL);
+            un[i + j] = (MDigit)t;
+            k = (MSignedDoubleDigit)(p >> M_DIGIT_BITS) - (t >> M_DIGIT_BITS);
+        }
+        t = (MSignedDoubleDigit)un[j + nb] - k;
+        un[j + nb] = (MDigit)t;
+        q[j] = (MDigit)qhat;
+        if (t < 0) {
+            /* The estimate was one too large; add back. */
+            q[j]--;
+            MDoubleDigit carry = 0;
+            for (long i = 0; i < nb; i++) {
+                carry += (MDoubleDigit)un[i + j] + vn[i];
+                un[i + j] = (MDigit)carry;
+                carry >>= M_DIGIT_BITS;
+            }
+            un[j + nb] += (MDigit)carry;
+        }
+    }
+    /* Unnormalize the remainder. */
+    for (long i = 0; i < nb - 1; i++)
+        r[i] = (MDigit)(((((MDoubleDigit)un[i + 1] << M_DIGIT_BITS) |
+                          un[i]) >> s));
+    r[nb - 1] = un[nb - 1] >> s;
+    free(un);
+}
+
+/* Compute floor division and/or modulus as in Python. Store the results
+   in *quotient and *modulus if they are not NULL. */
+static void MDivMod(MEnv *e, MValue x, MValue y, MValue *quotient,
+                    MValue *modulus)
+{
+    if (MIsShort(x) && MIsShort(y)) {
+        MSignedDoubleDigit a = (MSignedValue)x / 2;
+        MSignedDoubleDigit b = (MSignedValue)y / 2;
+        MSignedDoubleDigit q = a / b;
+        MSignedDoubleDigit r = a % b;
+        if (r != 0 && (r < 0) != (b < 0)) {
+            q--;
+            r += b;
+        }
+        if (quotient)
+            *quotient = MFromSigned(e, q);
+        if (modulus)
+            *modulus = MFromSigned(e, r);
+        return;
+    }
+    MNum a, b;
+    MGetNum(x, &a);
+    MGetNum(y, &b);
+    int differ = a.negative != b.negative;
+    if (MCompareMagnitude(&a, &b) < 0) {
+        /* |x| < |y| */
+        if (quotient)
+            *quotient = differ && a.n > 0 ? MFromSigned(e, -1) : 0;
+        if (modulus) {
+            /* x % y == x + y if the signs differ */
+            if (differ && a.n > 0)
+                *modulus = MAddNums(e, &a, &b, 0);
+            else
+                *modulus = x;
+        }
+        return;
+    }
+    MLongInt *q = MNewLong(e, a.n - b.n + 2);
+    MLongInt *r = MNewLong(e, b.n);
+    MDivMagnitude(q->digits, r->digits, &a, &b);
+    long nr = b.n;
+    while (nr > 0 && r->digits[nr - 1] == 0)
+        nr--;
+    if (quotient) {
+        long nq = a.n - b.n + 1;
+        q->digits[nq] = 0;
+        if (differ && nr > 0) {
+            /* Round towards negative infinity. */
+            long i = 0;
+            while (++q->digits[i] == 0)
+                i++;
+            nq++;
+        }
+        *quotient = MFinishLong(q, differ, nq);
+    }
+    if (modulus) {
+        if (differ && nr > 0) {
+            MNum rem;
+            rem.negative = b.negative;
+            rem.n = nr;
+            rem.digits = r->digits;
+            /* |y| - |r| with the sign of y */
+            MLongInt *m = MNewLong(e, b.n);
+            long n = MSubMagnitude(m->digits, &b, &rem);
+            *modulus = MFinishLong(m, b.negative, n);
+        } else
+            *modulus = MFinishLong(r, b.negative, nr);
+    }
+}
+
+/* Store n digits of the two's complement representation of x in r. */
+static void MToTwosComplement(MDigit *r, const MNum *x, long n)
+{
+    memmove(r, x->digits, x->n * sizeof(MDigit));
+    memset(r + x->n, 0, (n - x->n) * sizeof(MDigit));
+    if (x->negative) {
+        MDoubleDigit carry = 1;
+        for (long i = 0; i < n; i++) {
+            carry += (MDigit)~r[i];
+            r[i] = (MDigit)carry;
+            carry >>= M_DIGIT_BITS;
+        }
+    }
+}
+
+/* Compute a bitwise operation ('&', '|' or '^') as in Python. */
+static MValue MBitwise(MEnv *e, MValue x, MValue y, char op)
+{
+    MNum a, b;
+    MGetNum(x, &a);
+    MGetNum(y, &b);
+    long n = (a.n > b.n ? a.n : b.n) + 1;
+    MLongInt *l = MNewLong(e, n);
+    MDigit *t = malloc(n * sizeof(MDigit));
+    MToTwosComplement(l->digits, &a, n);
+    MToTwosComplement(t, &b, n);
+    for (long i = 0; i < n; i++) {
+        if (op == '&')
+            l->digits[i] &= t[i];
+        else if (op == '|')
+            l->digits[i] |= t[i];
+        else
+            l->digits[i] ^= t[i];
+    }
+    free(t);
+    int negative = l->digits[n - 1] >> (M_DIGIT_BITS - 1);
+    if (negative) {
+        /* Convert back to sign and magnitude. */
+        MNum r;
+        r.negative = 1;
+        r.n = n;
+        r.digits = l->digits;
+        MToTwosComplement(l->digits, &r, n);
+    }
+    return MFinishLong(l, negative, n);
+}
+
+/* Get a shift count (abort if it's negative). Return -1 if it's too large
+   for a left shift. */
+static long MShiftCount(MEnv *e, MValue y)
+{
+    if (MIsShort(y)) {
+        MSignedValue s = (MSignedValue)y / 2;
+        if (s < 0)
+            MAbort(e);
+        return s <= M_MAX_SHIFT ? s : -1;
+    }
+    if (MLong(y)->size < 0)
+        MAbort(e);
+    return -1;
+}
+
+/* Return |a| >> s; set *inexact if any nonzero bits were shifted out. */
+static MValue MShiftRightMagnitude(MEnv *e, const MNum *a, long s,
+                                   int negative, int *inexact)
+{
+    long w = s / M_DIGIT_BITS;
+    int bits = s % M_DIGIT_BITS;
+    *inexact = 0;
+    for (long i = 0; i < w && i < a->n; i++)
+        if (a->digits[i])
+            *inexact = 1;
+    if (w >= a->n) {
+        *inexact = a->n > 0;
+        return 0;
+    }
+    if (bits && (a->digits[w] & (((MDigit)1 << bits) - 1)))
+        *inexact = 1;
+    long n = a->n - w;
+    MLongInt *l = MNewLong(e, n + 1);
+    for (long i = 0; i < n; i++) {
+        MDoubleDigit d = a->digits[i + w];
+        if (i + w + 1 < a->n)
+            d |= (MDoubleDigit)a->digits[i + w + 1] << M_DIGIT_BITS;
+        l->digits[i] = (MDigit)(d >> bits);
+    }
+    l->digits[n] = 0;
+    if (negative && *inexact) {
+        /* Round towards negative infinity. */
+        long i = 0;
+        while (++l->digits[i] == 0)
+            i++;
+        n++;
+    }
+    return MFinishLong(l, negative, n);
+}
+
+
 MBool MIntEq(MValue left, MValue right)
 {
-    abort();
+    return MCompare(left, right) == 0;
 }
 
 
 MBool MIntNe(MValue left, MValue right)
 {
-    abort();
+    return MCompare(left, right) != 0;
 }
 
 
 MBool MIntLt(MValue left, MValue right)
 {
-    abort();
+    return MCompare(left, right) < 0;
 }
 
 
 MBool MIntLe(MValue left, MValue right)
 {
-    abort();
+    return MCompare(left, right) <= 0;
 }
 
 
 MBool MIntGt(MValue left, MValue right)
 {
-    abort();
+    return MCompare(left, right) > 0;
 }
 
 
 MBool MIntGe(MValue left, MValue right)
 {
-    abort();
+    return MCompare(left, right) >= 0;
 }
 
 
 MValue MIntAdd(MEnv *e, MValue x, MValue y)
 {
-    abort();
+    if (MIsShort(x) && MIsShort(y))
+        return MFromSigned(e, (MSignedValue)x / 2 + (MSignedValue)y / 2);
+    MNum a, b;
+    MGetNum(x, &a);
+    MGetNum(y, &b);
+    return MAddNums(e, &a, &b, 0);
 }
 
 
 MValue MIntSub(MEnv *e, MValue x, MValue y)
 {
-    abort();
+    if (MIsShort(x) && MIsShort(y))
+        return MFromSigned(e, (MSignedValue)x / 2 - (MSignedValue)y / 2);
+    MNum a, b;
+    MGetNum(x, &a);
+    MGetNum(y, &b);
+    return MAddNums(e, &a, &b, 1);
 }
 
 
 MValue MIntMul(MEnv *e, MValue x, MValue y)
 {
-    /* TODO handle at least multiplications that fit within a short int */
-    abort();
+    MNum a, b;
+    MGetNum(x, &a);
+    MGetNum(y, &b);
+    long n = a.n + b.n;
+    MLongInt *l = MNewLong(e, n);
+    memset(l->digits, 0, n * sizeof(MDigit));
+    for (long i = 0; i < a.n; i++) {
+        MDoubleDigit carry = 0;
+        MDoubleDigit d = a.digits[i];
+        for (long j = 0; j < b.n; j++) {
+            carry += d * b.digits[j] + l->digits[i + j];
+            l->digits[i + j] = (MDigit)carry;
+            carry >>= M_DIGIT_BITS;
+        }
+        l->digits[i + b.n] = (MDigit)carry;
+    }
+    return MFinishLong(l, a.negative != b.negative, n);
 }
 
 
 MValue MIntFloorDiv(MEnv *e, MValue x, MValue y)
 {
-    /* TODO handle at least divisions that fit within a short int */
-    abort();
+    MValue result;
+    if (y == 0)
+        return MAbort(e);
+    MDivMod(e, x, y, &result, NULL);
+    return result;
 }
 
 
 MValue MIntMod(MEnv *e, MValue x, MValue y)
 {
-    /* TODO handle at least mod operations that fit within a short int */
-    abort();
+    MValue result;
+    if (y == 0)
+        return MAbort(e);
+    MDivMod(e, x, y, NULL, &result);
+    return result;
 }
 
 
 MValue MIntUnaryMinus(MEnv *e, MValue x)
 {
-    abort();
+    if (MIsShort(x))
+        return MFromSigned(e, -((MSignedValue)x / 2));
+    MNum a;
+    MGetNum(x, &a);
+    return MMakeInt(e, !a.negative, a.digits, a.n);
 }
 
 
 MValue MIntAnd(MEnv *e, MValue x, MValue y)
 {
-    abort();
+    return MBitwise(e, x, y, '&');
 }
 
 
 MValue MIntOr(MEnv *e, MValue x, MValue y)
 {
-    abort();
+    return MBitwise(e, x, y, '|');
 }
 
 
 MValue MIntXor(MEnv *e, MValue x, MValue y)
 {
-    abort();
+    return MBitwise(e, x, y, '^');
 }
 
 
 MValue MIntShl(MEnv *e, MValue x, MValue y)
 {
-    abort();
+    long s = MShiftCount(e, y);
+    if (x == 0)
+        return 0;
+    if (s < 0)
+        return MAbort(e);
+    MNum a;
+    MGetNum(x, &a);
+    long w = s / M_DIGIT_BITS;
+    int bits = s % M_DIGIT_BITS;
+    long n = a.n + w + 1;
+    MLongInt *l = MNewLong(e, n);
+    memset(l->digits, 0, w * sizeof(MDigit));
+    MDigit carry = 0;
+    for (long i = 0; i < a.n; i++) {
+        MDoubleDigit d = (MDoubleDigit)a.digits[i] << bits;
+        l->digits[i + w] = (MDigit)d | carry;
+        carry = (MDigit)(d >> M_DIGIT_BITS);
+    }
+    l->digits[n - 1] = carry;
+    return MFinishLong(l, a.negative, n);
 }
 
 
 MValue MIntShr(MEnv *e, MValue x, MValue y)
 {
-    abort();
+    long s = MShiftCount(e, y);
+    MNum a;
+    MGetNum(x, &a);
+    if (s < 0)
+        return a.negative ? MFromSigned(e, -1) : 0;
+    int inexact;
+    MValue result = MShiftRightMagnitude(e, &a, s, a.negative, &inexact);
+    if (result == 0 && a.negative)
+        return MFromSigned(e, -1);
+    return result;
 }
 
 
 MValue MIntInvert(MEnv *e, MValue v)
 {
-    abort();
+    /* ~v == -v - 1 */
+    MNum a, one;
+    MGetNum(v, &a);
+    MGetNum(2, &one);
+    a.negative = !a.negative;
+    return MAddNums(e, &a, &one, 1);
+}
+
+
+MValue MIntFromDecimal(MEnv *e, const char *s)
+{
+    long n = strlen(s) / 9 + 1;
+    MLongInt *l = MNewLong(e, n);
+    memset(l->digits, 0, n * sizeof(MDigit));
+    for (; *s; s++) {
+        MDoubleDigit carry = *s - '0';
+        for (long i = 0; i < n; i++) {
+            carry += (MDoubleDigit)l->digits[i] * 10;
+            l->digits[i] = (MDigit)carry;
+            carry >>= M_DIGIT_BITS;
+        }
+    }
+    return MFinishLong(l, 0, n);
+}
+
+
+/* Print a long int in decimal. */
+static void MPrintLong(MValue v)
+{
+    MNum a;
+    MGetNum(v, &a);
+    /* Split the value into chunks of 9 decimal digits (each digit yields
+       at most 2 chunks). */
+    MDigit *m = malloc(a.n * sizeof(MDigit));
+    MDigit *chunks = malloc((2 * a.n + 1) * sizeof(MDigit));
+    memcpy(m, a.digits, a.n * sizeof(MDigit));
+    long n = a.n;
+    long num_chunks = 0;
+    do {
+        MDoubleDigit rem = 0;
+        for (long i = n - 1; i >= 0; i--) {
+            MDoubleDigit cur = (rem << M_DIGIT_BITS) | m[i];
+            m[i] = (MDigit)(cur / 1000000000);
+            rem = cur % 1000000000;
+        }
+        chunks[num_chunks++] = (MDigit)rem;
+        while (n > 0 && m[n - 1] == 0)
+            n--;
+    } while (n > 0);
+    printf("%s%u", a.negative ? "-" : "", chunks[num_chunks - 1]);
+    for (long i = num_chunks - 2; i >= 0; i--)
+        printf("%09u", chunks[i]);
+    printf("\n");
+    free(chunks);
+    free(m);
 }
 
 
 MValue Mprint(MEnv *e)
 {
     /* TODO implement properly */
-    /* TODO don't use blindly assume that the argument is a short int */
     /* Integer division truncates in C99 (but not necessarily in C89). */
     MSignedValue arg = e->frame[0];
     if (!MIsShort(arg)) {
         if (arg == MNone)
             printf("None\n");
+        else if (MIsLong(arg))
+            MPrintLong(arg);
         else {
             MInstanceHeader *h = MHeader(arg);
             printf("<%s object>\n", h->type->full_name);